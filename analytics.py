@@ -0,0 +1,66 @@
+from collections import deque
+from datetime import datetime
+from typing import Dict, List
+
+SENTIMENT_SCORES = {"😊 Positive": 1, "😐 Neutral": 0, "😟 Negative": -1}
+
+
+class AnalyticsAggregator:
+    """Incrementally updated conversation analytics
+
+    Counters and a ring buffer of recent sentiments are updated once per event
+    instead of being recomputed from the history on every rerun. ``version``
+    increases whenever chart data changes so rendered figures can be cached
+    against it.
+    """
+
+    def __init__(self, window: int = 10):
+        self.total_messages = 0
+        self.user_messages = 0
+        self.bot_messages = 0
+        self.sentiments = {"😊 Positive": 0, "😟 Negative": 0, "😐 Neutral": 0}
+        self.intents: Dict[str, int] = {}
+        self.feedback = {"👍": 0, "👎": 0}
+        self.conversation_start = datetime.now()
+        self.recent_sentiments = deque(maxlen=window)
+        self.version = 0
+
+    def record_user(self, sentiment: str, intent: str):
+        self.total_messages += 1
+        self.user_messages += 1
+        self.sentiments[sentiment] += 1
+        self.intents[intent] = self.intents.get(intent, 0) + 1
+        self.version += 1
+
+    def record_bot(self, sentiment: str):
+        """Count a completed reply; the turn's user sentiment enters the trend buffer"""
+        self.total_messages += 1
+        self.bot_messages += 1
+        self.recent_sentiments.append(sentiment)
+        self.version += 1
+
+    def record_feedback(self, vote: str):
+        # Feedback only feeds the satisfaction bar, which is not a cached figure
+        self.feedback[vote] += 1
+
+    def top_intents(self, limit: int = 5) -> List:
+        return list(self.intents.items())[:limit]
+
+    def sentiment_trend(self) -> List[int]:
+        return [SENTIMENT_SCORES.get(s, 0) for s in self.recent_sentiments]
+
+    def satisfaction(self) -> float:
+        total = self.feedback["👍"] + self.feedback["👎"]
+        return self.feedback["👍"] / total if total else 0.0
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable snapshot used for exports"""
+        return {
+            "total_messages": self.total_messages,
+            "user_messages": self.user_messages,
+            "bot_messages": self.bot_messages,
+            "sentiments": dict(self.sentiments),
+            "intents": dict(self.intents),
+            "feedback": dict(self.feedback),
+            "conversation_start": self.conversation_start.isoformat(),
+        }
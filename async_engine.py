@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import AsyncIterator, Callable, Deque, Dict, List, Optional, Set, TypeVar
+
+from local_chatbot import LocalChatbot
+from metrics import TurnMetrics
+
+_DONE = object()
+
+T = TypeVar("T")
+
+
+class _Ticket:
+    """A request waiting for an Ollama slot"""
+
+    def __init__(self, session_id: str, loop: asyncio.AbstractEventLoop):
+        self.session_id = session_id
+        self.enqueued = time.perf_counter()
+        self.granted = loop.create_future()
+
+
+class AsyncChatEngine:
+    """Concurrency-limited asyncio front end for LocalChatbot
+
+    At most ``max_concurrency`` requests are in flight against Ollama. Waiting
+    requests are queued per session and slots are handed out round-robin across
+    sessions, so one chatty session cannot starve the others. Blocking HTTP runs
+    on worker threads through the chatbot's pooled client; a slot is held until
+    that thread finishes, even when the caller has been cancelled, so Ollama never
+    sees more than the configured load.
+    """
+
+    def __init__(self, chatbot: LocalChatbot, max_concurrency: int = 4, wait_samples: int = 1000,
+                 metrics: Optional[TurnMetrics] = None):
+        self.chatbot = chatbot
+        self.metrics_sink = metrics
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._queues: Dict[str, Deque[_Ticket]] = {}
+        self._ring: Deque[str] = deque()
+        self._tasks: Dict[str, Set[asyncio.Task]] = {}
+        self._wait_times: Deque[float] = deque(maxlen=wait_samples)
+        self.completed = 0
+        self.cancelled = 0
+
+    # ---- scheduling ----
+
+    def _enqueue(self, session_id: str) -> _Ticket:
+        ticket = _Ticket(session_id, asyncio.get_running_loop())
+        queue = self._queues.setdefault(session_id, deque())
+        if not queue:
+            self._ring.append(session_id)
+        queue.append(ticket)
+        self._dispatch()
+        return ticket
+
+    def _dispatch(self):
+        """Grant free slots to the head ticket of each session in turn"""
+        while self.in_flight < self.max_concurrency and self._ring:
+            session_id = self._ring.popleft()
+            queue = self._queues[session_id]
+            ticket = queue.popleft()
+            if queue:
+                self._ring.append(session_id)
+            else:
+                del self._queues[session_id]
+            if ticket.granted.done():
+                continue
+            self.in_flight += 1
+            waited = time.perf_counter() - ticket.enqueued
+            self._wait_times.append(waited)
+            if self.metrics_sink is not None:
+                self.metrics_sink.observe_span("queue", waited)
+            ticket.granted.set_result(None)
+
+    def _release(self):
+        self.in_flight -= 1
+        self._dispatch()
+
+    def _withdraw(self, ticket: _Ticket):
+        """Remove a ticket that was cancelled before it got a slot"""
+        queue = self._queues.get(ticket.session_id)
+        if queue and ticket in queue:
+            queue.remove(ticket)
+            if not queue:
+                del self._queues[ticket.session_id]
+                self._ring.remove(ticket.session_id)
+
+    async def _acquire(self, session_id: str):
+        ticket = self._enqueue(session_id)
+        try:
+            await ticket.granted
+        except asyncio.CancelledError:
+            if ticket.granted.done() and not ticket.granted.cancelled():
+                # Granted and cancelled in the same tick: hand the slot back
+                self._release()
+            else:
+                self._withdraw(ticket)
+            raise
+
+    def _track(self, session_id: str):
+        task = asyncio.current_task()
+        if task is not None:
+            self._tasks.setdefault(session_id, set()).add(task)
+        return task
+
+    def _untrack(self, session_id: str, task: Optional[asyncio.Task]):
+        tasks = self._tasks.get(session_id)
+        if tasks is not None and task is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._tasks[session_id]
+
+    # ---- public API ----
+
+    async def generate(self, session_id: str, messages: List[Dict], temperature: float = 0.7,
+                       stats: Optional[Dict] = None) -> str:
+        """Async equivalent of LocalChatbot.generate_response"""
+        chunks = []
+        async for token in self.stream(session_id, messages, temperature, stats=stats):
+            chunks.append(token)
+        return "".join(chunks)
+
+    async def stream(self, session_id: str, messages: List[Dict], temperature: float = 0.7,
+                     stats: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Async equivalent of LocalChatbot.stream_response, queued fairly per session
+
+        ``stats`` is filled by the worker thread and is complete once the stream ends.
+        """
+        task = self._track(session_id)
+        loop = asyncio.get_running_loop()
+        tokens: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        worker = None
+        try:
+            await self._acquire(session_id)
+
+            def produce():
+                stream = self.chatbot.stream_response(messages, temperature, stats=stats, session_id=session_id)
+                try:
+                    for token in stream:
+                        if stop.is_set():
+                            break
+                        loop.call_soon_threadsafe(tokens.put_nowait, token)
+                except Exception as e:
+                    loop.call_soon_threadsafe(tokens.put_nowait, e)
+                finally:
+                    stream.close()
+                    loop.call_soon_threadsafe(tokens.put_nowait, _DONE)
+
+            worker = loop.run_in_executor(None, produce)
+            worker.add_done_callback(lambda _: self._release())
+
+            while True:
+                item = await tokens.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+            self.completed += 1
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            # Tell the worker thread to stop reading; its slot is released when it exits
+            stop.set()
+            self._untrack(session_id, task)
+
+    async def call(self, session_id: str, func: Callable[..., T], *args) -> T:
+        """Run another blocking Ollama call (e.g. summarizing) on a worker thread within the slots"""
+        task = self._track(session_id)
+        try:
+            await self._acquire(session_id)
+            worker = asyncio.get_running_loop().run_in_executor(None, func, *args)
+            worker.add_done_callback(lambda _: self._release())
+            # Shielded so cancelling the caller keeps the slot until the thread finishes
+            return await asyncio.shield(worker)
+        finally:
+            self._untrack(session_id, task)
+
+    def cancel_session(self, session_id: str) -> int:
+        """Cancel every queued or running request of a session (e.g. the user left)"""
+        tasks = list(self._tasks.get(session_id, ()))
+        for task in tasks:
+            task.cancel()
+        return len(tasks)
+
+    def metrics(self) -> Dict:
+        """Queue depth, in-flight count and queue wait-time percentiles in seconds"""
+        waits = sorted(self._wait_times)
+
+        def percentile(p: float) -> float:
+            if not waits:
+                return 0.0
+            return waits[min(len(waits) - 1, int(p * len(waits)))]
+
+        return {
+            "queue_depth": sum(len(q) for q in self._queues.values()),
+            "waiting_sessions": len(self._ring),
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "wait_p50": percentile(0.50),
+            "wait_p95": percentile(0.95),
+            "wait_max": waits[-1] if waits else 0.0,
+        }
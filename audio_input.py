@@ -0,0 +1,141 @@
+import numpy as np
+
+try:
+    import opuslib
+except Exception:
+    # opuslib raises a plain Exception at import when the system libopus is missing
+    opuslib = None
+
+ENCODINGS = ("pcm_s16le", "pcm_f32le", "opus")
+
+# Rates libopus can decode to directly
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+# Longest Opus packet (120 ms) at 48 kHz, in samples per channel
+OPUS_MAX_FRAME = 5760
+
+# Taps of the low-pass filter applied before downsampling
+LOWPASS_TAPS = 63
+
+
+def lowpass_kernel(cutoff, taps=LOWPASS_TAPS):
+    """Hann-windowed sinc low-pass; ``cutoff`` is a fraction of the input Nyquist rate"""
+    n = np.arange(taps) - (taps - 1) / 2
+    kernel = cutoff * np.sinc(cutoff * n) * np.hanning(taps)
+    return (kernel / kernel.sum()).astype(np.float32)
+
+
+class Resampler:
+    """Streaming linear-interpolation resampler over float32 mono blocks
+
+    The read position and the last input sample carry over between blocks, so
+    consecutive frames join without clicks. When downsampling, a low-pass FIR
+    (its history also carried over) removes what would alias below the new
+    Nyquist rate first.
+    """
+
+    def __init__(self, in_rate, out_rate):
+        self.step = in_rate / out_rate
+        self.position = 0.0
+        self.previous = None
+        self.kernel = None
+        if out_rate < in_rate:
+            self.kernel = lowpass_kernel(0.9 * out_rate / in_rate)
+            self.history = np.zeros(len(self.kernel) - 1, dtype=np.float32)
+
+    def process(self, samples):
+        if len(samples) == 0:
+            # np.convolve would swap its operands and emit a sample from the filter history alone
+            return np.zeros(0, dtype=np.float32)
+        if self.kernel is not None:
+            padded = np.concatenate([self.history, samples])
+            self.history = padded[len(padded) - len(self.history):]
+            samples = np.convolve(padded, self.kernel, mode="valid").astype(np.float32)
+        if self.previous is not None:
+            samples = np.concatenate([self.previous, samples])
+        last = len(samples) - 1
+        count = int(np.floor((last - self.position) / self.step)) + 1 if self.position <= last else 0
+        positions = self.position + np.arange(count) * self.step
+        output = np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+        # Next position relative to this block's last sample, which starts the next block
+        self.position = self.position + count * self.step - last
+        self.previous = samples[last:]
+        return output
+
+
+class AudioConverter:
+    """Turns one connection's frames into the 16-bit mono PCM a recognizer expects
+
+    Clients declare ``sampleRate``, ``channels`` and ``encoding`` in ``start``;
+    each binary frame is interleaved little-endian PCM (16-bit int or 32-bit
+    float) or, for ``opus``, one raw Opus packet (e.g. from WebCodecs'
+    AudioEncoder). Frames already in the target format pass through untouched;
+    otherwise samples are viewed in place with ``np.frombuffer``, downmixed by
+    averaging channels and resampled with ``Resampler``. Bytes left over from a
+    frame that ends mid-sample are carried into the next one. An Opus packet
+    that fails to decode is skipped and counted in ``dropped_frames``. Not
+    thread-safe: DecodeStream converts a connection's frames one at a time, in
+    order.
+    """
+
+    def __init__(self, sample_rate, channels=1, encoding="pcm_s16le", target_rate=16000):
+        if encoding not in ENCODINGS:
+            raise ValueError(f"Unsupported encoding '{encoding}' (use one of {', '.join(ENCODINGS)})")
+        if channels < 1:
+            raise ValueError("channels must be at least 1")
+        self.sample_rate = sample_rate
+        self.input_channels = channels
+        self.channels = channels
+        self.encoding = encoding
+        self.target_rate = target_rate
+        self.pending = b""
+        self.decoder = None
+        self.dropped_frames = 0
+        decoded_rate = sample_rate
+        if encoding == "opus":
+            if opuslib is None:
+                raise ValueError("Opus input needs the opuslib package on the server")
+            # libopus resamples and downmixes while decoding when asked for the target format
+            decoded_rate = target_rate if target_rate in OPUS_RATES else 48000
+            self.decoder = opuslib.Decoder(decoded_rate, 1)
+            self.channels = 1
+        elif sample_rate <= 0:
+            raise ValueError("sampleRate must be positive")
+        self.resampler = Resampler(decoded_rate, target_rate) if decoded_rate != target_rate else None
+        self.passthrough = self.resampler is None and self.channels == 1 and encoding == "pcm_s16le"
+
+    def _samples(self, frame):
+        """Whole samples of ``frame`` (plus any carried-over bytes) as an ndarray view"""
+        if self.decoder is not None:
+            try:
+                frame = self.decoder.decode(bytes(frame), OPUS_MAX_FRAME)
+            except opuslib.OpusError:
+                # One corrupt packet costs its few milliseconds of audio, not the utterance
+                self.dropped_frames += 1
+                return np.zeros(0, dtype="<i2")
+            return np.frombuffer(frame, dtype="<i2")
+        dtype = np.dtype("<f4" if self.encoding == "pcm_f32le" else "<i2")
+        block = dtype.itemsize * self.channels
+        if self.pending:
+            frame = self.pending + bytes(frame)
+        usable = len(frame) - len(frame) % block
+        self.pending = bytes(frame[usable:])
+        return np.frombuffer(memoryview(frame)[:usable], dtype=dtype)
+
+    def convert(self, frame):
+        """16-bit mono PCM at ``target_rate`` for one incoming frame"""
+        if self.passthrough and not self.pending and len(frame) % 2 == 0:
+            return frame
+        samples = self._samples(frame)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1, dtype=np.float32)
+        else:
+            samples = samples.astype(np.float32)
+        if self.encoding == "pcm_f32le":
+            samples *= 32767.0
+        if self.resampler is not None:
+            samples = self.resampler.process(samples)
+        return np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+
+    def describe(self):
+        return {"inputSampleRate": self.sample_rate, "channels": self.input_channels, "encoding": self.encoding}
@@ -0,0 +1,214 @@
+import argparse
+import asyncio
+import functools
+import gzip
+import json
+import os
+import time
+from typing import Dict, Iterator, List, Optional, Set
+
+from async_engine import AsyncChatEngine
+from context_window import ContextWindow
+from local_chatbot import LocalChatbot
+from model_lifecycle import ModelLifecycle
+from ollama_client import OllamaClient, OllamaError
+from ollama_pool import OllamaPool
+from text_analysis import analyze
+
+
+def read_items(path: str, replay: bool = False) -> Iterator[Dict]:
+    """Batch items from JSONL (or a gzip-compressed conversation export)
+
+    Accepted lines:
+      {"id": ..., "prompt": "..."}                    one user message
+      {"id": ..., "messages": [{"role", "content"}]}  a conversation ending with the user turn
+      {"user": "...", "bot": "...", ...}              a turn from a conversation export
+
+    With ``replay``, export turns are answered with the earlier turns of the
+    export as history, as they were in the original session, and are marked
+    ``replay`` so they share one rolling summary. Lines without
+    any of these keys (e.g. the export header) are skipped.
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    history: List[Dict] = []
+    with opener(path, "rt", encoding="utf-8") as handle:
+        for number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            item_id = str(record.get("id", f"line-{number}"))
+            if "messages" in record:
+                yield {"id": item_id, "messages": record["messages"]}
+            elif "prompt" in record:
+                yield {"id": item_id, "messages": [{"role": "user", "content": record["prompt"]}]}
+            elif "user" in record:
+                turn = {"role": "user", "content": record["user"]}
+                if not replay:
+                    yield {"id": item_id, "messages": [turn]}
+                    continue
+                yield {"id": item_id, "messages": history + [turn], "replay": True}
+                history = history + [turn, {"role": "assistant", "content": record.get("bot", "")}]
+
+
+def completed_ids(path: str) -> Set[str]:
+    """Ids already answered without error in an earlier run's output
+
+    The file is rewritten to keep only those results, one line per id, so the
+    errored items retried by this run never leave their old error next to the
+    new result. A line cut off by an interruption is dropped as well.
+    """
+    done: Set[str] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "rb") as handle:
+        data = handle.read()
+    lines = data[:data.rfind(b"\n") + 1].splitlines()
+    kept: List[bytes] = []
+    for line in lines:
+        try:
+            result = json.loads(line)
+        except ValueError:
+            continue
+        if "error" not in result and result["id"] not in done:
+            done.add(result["id"])
+            kept.append(line + b"\n")
+    if sum(map(len, kept)) != len(data):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as handle:
+            handle.writelines(kept)
+        os.replace(tmp_path, path)
+    return done
+
+
+class BatchRunner:
+    """Runs batch items through the chat app's prompt assembly with bounded concurrency
+
+    Every item gets the same system prompt, rolling summary and sentiment
+    notes as a turn in chatbot.py. Summarize requests share the engine's
+    concurrency limit with generation, and replayed turns reuse one context
+    window, so the conversation is folded incrementally as it was in the app
+    instead of from scratch for every turn. Results are appended to the output
+    as each item finishes, in completion order, so an interrupted run loses at
+    most the items in flight.
+    """
+
+    def __init__(self, chatbot: LocalChatbot, concurrency: int = 4, temperature: float = 0.7):
+        self.chatbot = chatbot
+        self.engine = AsyncChatEngine(chatbot, max_concurrency=concurrency)
+        self.concurrency = concurrency
+        self.temperature = temperature
+        self.replay_window = self.new_window()
+        # Replayed turns build their prompts one at a time, in input order
+        self.replay_lock = asyncio.Lock()
+
+    def new_window(self, session_id: Optional[str] = None) -> ContextWindow:
+        return ContextWindow(
+            functools.partial(self.chatbot.summarize, session_id=session_id),
+            max_tokens=self.chatbot.context_tokens,
+        )
+
+    def build_messages(self, history: List[Dict], context_window: Optional[ContextWindow] = None,
+                       session_id: Optional[str] = None) -> List[Dict]:
+        notes = self.chatbot.turn_notes(analyze(history[-1]["content"])["sentiment"])
+        context_window = context_window or self.new_window(session_id)
+        return context_window.build(self.chatbot.system_prompt, history, notes)
+
+    async def prepare(self, item: Dict) -> List[Dict]:
+        if not item.get("replay"):
+            return await self.engine.call(item["id"], self.build_messages, item["messages"], None, item["id"])
+        async with self.replay_lock:
+            return await self.engine.call(item["id"], self.build_messages, item["messages"], self.replay_window)
+
+    async def run_item(self, item: Dict) -> Dict:
+        result = {"id": item["id"]}
+        started = time.perf_counter()
+        stats: Dict = {}
+        try:
+            messages = await self.prepare(item)
+            result["response"] = await self.engine.generate(item["id"], messages, self.temperature, stats=stats)
+        except OllamaError as e:
+            result["error"] = str(e)
+        except Exception as e:
+            # A bad item (e.g. malformed messages) is recorded instead of aborting the run
+            result["error"] = f"{type(e).__name__}: {e}"
+        result["latency"] = time.perf_counter() - started
+        for name in ("ttft", "backend", "cached"):
+            if name in stats:
+                result[name] = stats[name]
+        result["prompt_tokens"] = stats.get("prompt_eval_count", 0)
+        result["completion_tokens"] = stats.get("eval_count", 0)
+        return result
+
+    async def run(self, items: Iterator[Dict], output_path: str, skip: Optional[Set[str]] = None) -> Dict:
+        """Answer every item not in ``skip`` and append one JSON line per result"""
+        skip = skip or set()
+        totals = {"done": 0, "errors": 0, "skipped": 0}
+        running: Set[asyncio.Task] = set()
+
+        with open(output_path, "a", encoding="utf-8") as output:
+            def write(task: asyncio.Task):
+                result = task.result()
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+                totals["errors" if "error" in result else "done"] += 1
+
+            for item in items:
+                if item["id"] in skip:
+                    totals["skipped"] += 1
+                    continue
+                # Keep the input read lazily: only a bounded number of items is in memory
+                while len(running) >= self.concurrency * 2:
+                    finished, running = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    for task in finished:
+                        write(task)
+                running.add(asyncio.create_task(self.run_item(item)))
+            if running:
+                finished, _ = await asyncio.wait(running)
+                for task in finished:
+                    write(task)
+        return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run JSONL prompts or conversations through LocalChatbot")
+    parser.add_argument("input", help="JSONL of prompts/conversations, or a conversation export (.ndjson[.gz])")
+    parser.add_argument("output", help="JSONL results; existing results are kept and their ids skipped")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--model", default="llama3.2:latest")
+    parser.add_argument("--temperature", type=float, default=0.7)
+    parser.add_argument("--num-predict", type=int, default=800, help="maximum tokens per response")
+    parser.add_argument("--keep-alive", default="30m", help="how long Ollama keeps the model loaded between items")
+    parser.add_argument("--ollama-urls", default=os.environ.get("CHATBOT_OLLAMA_URLS", ""),
+                        help="comma-separated Ollama URLs (default: CHATBOT_OLLAMA_URLS or localhost)")
+    parser.add_argument("--replay", action="store_true", help="answer export turns with the earlier turns as history")
+    parser.add_argument("--restart", action="store_true", help="ignore and overwrite earlier results")
+    args = parser.parse_args()
+
+    urls = [url.strip() for url in args.ollama_urls.split(",") if url.strip()]
+    if len(urls) > 1:
+        client = OllamaPool(urls)
+    else:
+        client = OllamaClient(urls[0]) if urls else OllamaClient()
+    chatbot = LocalChatbot(model_name=args.model, client=client, num_predict=args.num_predict,
+                           keep_alive=int(args.keep_alive) if args.keep_alive.lstrip("-").isdigit() else args.keep_alive)
+
+    if args.restart and os.path.exists(args.output):
+        os.remove(args.output)
+    skip = completed_ids(args.output)
+
+    runner = BatchRunner(chatbot, concurrency=args.concurrency, temperature=args.temperature)
+    # Load the model up front so the first items' latency does not include it
+    for backend in ModelLifecycle(chatbot).warm_up():
+        if "error" in backend:
+            print(f"Warm-up failed on {backend['url']}: {backend['error']}")
+    started = time.perf_counter()
+    try:
+        totals = asyncio.run(runner.run(read_items(args.input, replay=args.replay), args.output, skip))
+    finally:
+        client.close()
+    print(f"{totals['done']} done, {totals['errors']} failed, {totals['skipped']} skipped "
+          f"in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
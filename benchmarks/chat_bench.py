@@ -0,0 +1,262 @@
+"""Benchmarks for the chatbot hot path against a local fake Ollama
+
+    python -m benchmarks.chat_bench --output bench.json
+    python -m benchmarks.chat_bench --suites latency,throughput --token-ms 5 --error-rate 0.05
+
+Suites:
+  latency     sequential turns through LocalChatbot.stream_response and
+              generate_response: connect, time to first token, total
+  throughput  turns/sec and latency through AsyncChatEngine at each
+              ``--concurrency`` level
+  analytics   per-message cost of text analysis and the incremental
+              aggregator, against a full re-scan, at each history length
+  prompt      per-turn prompt assembly (analysis, notes, ContextWindow.build)
+              at each history length, with summarization stubbed out
+
+Everything is written as one JSON report so runs can be diffed.
+"""
+import argparse
+import asyncio
+import time
+
+from analytics import AnalyticsAggregator
+from async_engine import AsyncChatEngine
+from benchmarks.fake_ollama import FakeOllama, add_settings_arguments, settings_from_args
+from benchmarks.report import summarize, write_report
+from context_window import ContextWindow
+from local_chatbot import LocalChatbot
+from ollama_client import OllamaClient, OllamaError
+from text_analysis import ConversationAnalytics, analyze, analyze_batch
+
+SUITES = ("latency", "throughput", "analytics", "prompt")
+
+USER_LINES = (
+    "Hi there, can you help me plan a trip to Paris in May?",
+    "I'm really frustrated, the booking site keeps failing and this is terrible.",
+    "What is the weather usually like? Thanks so much!",
+    "How do I compare flight prices from London on Tuesday?",
+    "Great, that was helpful. Can you explain how travel insurance works?",
+)
+BOT_LINE = "Here is a structured answer with a few options and the trade-offs between them. " * 3
+
+
+def make_history(turns):
+    history = []
+    for index in range(turns):
+        history.append({"role": "user", "content": USER_LINES[index % len(USER_LINES)]})
+        history.append({"role": "assistant", "content": BOT_LINE})
+    return history
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def bench_latency(chatbot, args):
+    messages = [{"role": "system", "content": chatbot.system_prompt},
+                {"role": "user", "content": USER_LINES[0]}]
+    spans = {"connect": [], "ttft": [], "total": []}
+    blocking = []
+    errors = 0
+    for _ in range(args.turns):
+        stats = {}
+        try:
+            for _ in chatbot.stream_response(messages, stats=stats):
+                pass
+        except OllamaError:
+            errors += 1
+            continue
+        for name in spans:
+            if name in stats:
+                spans[name].append(stats[name])
+    for _ in range(args.turns):
+        try:
+            seconds, _ = timed(chatbot.generate_response, messages)
+        except OllamaError:
+            errors += 1
+            continue
+        blocking.append(seconds)
+    return {
+        "streamMs": {name: summarize(samples) for name, samples in spans.items()},
+        "blockingMs": summarize(blocking),
+        "errors": errors,
+    }
+
+
+async def run_concurrent(engine, messages, sessions, requests):
+    latencies = []
+    errors = 0
+
+    async def turn(index):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            await engine.generate(f"bench-{index % sessions}", messages)
+        except OllamaError:
+            errors += 1
+            return
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(turn(index) for index in range(requests)))
+    return time.perf_counter() - started, latencies, errors
+
+
+def bench_throughput(chatbot, args):
+    messages = [{"role": "system", "content": chatbot.system_prompt},
+                {"role": "user", "content": USER_LINES[0]}]
+    results = {}
+    for level in args.concurrency:
+        engine = AsyncChatEngine(chatbot, max_concurrency=level)
+        requests = max(args.turns, level * 4)
+        wall, latencies, errors = asyncio.run(run_concurrent(engine, messages, level * 2, requests))
+        results[str(level)] = {
+            "requests": requests,
+            "turnsPerSecond": len(latencies) / wall if wall else 0.0,
+            "latencyMs": summarize(latencies),
+            "queueWaitP95Ms": engine.metrics()["wait_p95"] * 1000,
+            "errors": errors,
+        }
+    return results
+
+
+def bench_analytics(args):
+    results = {}
+    for turns in args.history:
+        history = make_history(turns)
+        user_texts = [m["content"] for m in history if m["role"] == "user"]
+
+        # What a turn costs today: analyze the new message, update counters
+        aggregator = AnalyticsAggregator()
+        started = time.perf_counter()
+        for text in user_texts:
+            analysis = analyze(text)
+            aggregator.record_user(analysis["sentiment"], analysis["intent"])
+            aggregator.record_bot(analysis["sentiment"])
+        incremental = (time.perf_counter() - started) / len(user_texts)
+
+        # The legacy per-field helpers analyse the same text three times
+        started = time.perf_counter()
+        for text in user_texts:
+            ConversationAnalytics.analyze_sentiment(text)
+            ConversationAnalytics.detect_intent(text)
+            ConversationAnalytics.extract_entities(text)
+        helpers = (time.perf_counter() - started) / len(user_texts)
+
+        # Recomputing from the whole history on every turn, for comparison
+        rescan, _ = timed(analyze_batch, [m["content"] for m in history])
+
+        results[str(turns)] = {
+            "incrementalUsPerMessage": incremental * 1e6,
+            "helpersUsPerMessage": helpers * 1e6,
+            "fullRescanMs": rescan * 1000,
+        }
+    return results
+
+
+def assemble_turn(chatbot, context_window, history, user_input):
+    """The per-turn prompt assembly of chatbot.py, without the UI"""
+    notes = chatbot.turn_notes(analyze(user_input)["sentiment"])
+    history.append({"role": "user", "content": user_input})
+    return context_window.build(chatbot.system_prompt, history, notes)
+
+
+def bench_prompt(chatbot, args):
+    results = {}
+    for turns in args.history:
+        folds = []
+
+        def summarize_stub(previous, messages):
+            folds.append(len(messages))
+            return "The user is planning a trip and asked about flights, weather and insurance."
+
+        history = make_history(turns)
+        context_window = ContextWindow(summarize_stub)
+        first, messages = timed(assemble_turn, chatbot, context_window, history, USER_LINES[1])
+        history.append({"role": "assistant", "content": BOT_LINE})
+
+        samples = []
+        for index in range(args.turns):
+            seconds, messages = timed(assemble_turn, chatbot, context_window, history, USER_LINES[index % 5])
+            samples.append(seconds)
+            history.append({"role": "assistant", "content": BOT_LINE})
+
+        results[str(turns)] = {
+            "firstBuildMs": first * 1000,
+            "steadyStateMs": summarize(samples),
+            "folds": len(folds),
+            "promptMessages": len(messages),
+        }
+    return results
+
+
+def parse_list(text, cast=int):
+    return [cast(item) for item in text.split(",") if item]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chatbot hot path against a fake Ollama")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"comma-separated subset of {', '.join(SUITES)}")
+    parser.add_argument("--turns", type=int, default=20, help="samples per measurement")
+    parser.add_argument("--concurrency", type=parse_list, default=[1, 4, 8])
+    parser.add_argument("--history", type=parse_list, default=[10, 100, 1000], help="history lengths in turns")
+    parser.add_argument("--url", help="benchmark a real Ollama instead of the fake")
+    parser.add_argument("--model", default="llama3.2:latest")
+    parser.add_argument("--output", default="-", help="JSON report path; - prints it")
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    suites = parse_list(args.suites, str)
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    fake = None
+    url = args.url
+    if not url and {"latency", "throughput"} & set(suites):
+        fake = FakeOllama(settings_from_args(args)).start()
+        url = fake.base_url
+
+    client = OllamaClient(url) if url else OllamaClient()
+    chatbot = LocalChatbot(model_name=args.model, client=client)
+    report = {"suites": {}}
+    try:
+        if "latency" in suites:
+            report["suites"]["latency"] = bench_latency(chatbot, args)
+        if "throughput" in suites:
+            report["suites"]["throughput"] = bench_throughput(chatbot, args)
+        if "analytics" in suites:
+            report["suites"]["analytics"] = bench_analytics(args)
+        if "prompt" in suites:
+            report["suites"]["prompt"] = bench_prompt(chatbot, args)
+    finally:
+        client.close()
+        if fake is not None:
+            fake.stop()
+
+    report["config"] = {
+        "url": args.url or "fake",
+        "turns": args.turns,
+        "concurrency": args.concurrency,
+        "history": args.history,
+    }
+    if fake is not None:
+        settings = fake.settings
+        report["config"]["fakeOllama"] = {
+            "prefillMs": settings.prefill_ms,
+            "prefillMsPer1k": settings.prefill_ms_per_1k,
+            "tokenMs": settings.token_ms,
+            "replyTokens": settings.reply_tokens,
+            "errorRate": settings.error_rate,
+            "dropRate": settings.drop_rate,
+            "requests": settings.requests,
+            "injectedErrors": settings.errors,
+            "droppedStreams": settings.drops,
+        }
+    write_report(args.output, report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Local stand-in for Ollama's /api/chat
+
+    python -m benchmarks.fake_ollama --port 11435 --prefill-ms 200 --token-ms 20
+
+Answers streaming (NDJSON) and non-streaming requests, honouring the
+``stream`` flag of each request the way Ollama does. Prefill waits
+``prefill_ms`` plus ``prefill_ms_per_1k`` per thousand prompt tokens, then every
+reply token costs ``token_ms``. The final chunk carries Ollama's counters and
+nanosecond durations so the client-side metrics code sees realistic data.
+A fraction of requests can fail with HTTP 500 (``error_rate``) or be cut off
+mid-stream (``drop_rate``). Every model that has been chatted with is listed as
+loaded by /api/ps.
+"""
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = ("Sure", " thing", ",", " here", " is", " a", " simulated", " reply", " from", " the", " fake", " model", ".")
+
+
+class FakeOllamaSettings:
+    def __init__(self, prefill_ms=100.0, prefill_ms_per_1k=0.0, token_ms=10.0, reply_tokens=50,
+                 error_rate=0.0, drop_rate=0.0, seed=None):
+        self.prefill_ms = prefill_ms
+        self.prefill_ms_per_1k = prefill_ms_per_1k
+        self.token_ms = token_ms
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.drops = 0
+        self.loaded = set()
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+
+class FakeOllamaHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/api/version":
+            self._send_json(200, {"version": "0.0.0-fake"})
+        elif self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": "fake:latest"}]})
+        elif self.path == "/api/ps":
+            settings = self.server.settings
+            with settings.lock:
+                models = [{"name": name, "model": name} for name in sorted(settings.loaded)]
+            self._send_json(200, {"models": models})
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        if self.path != "/api/chat":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        settings = self.server.settings
+        with settings.lock:
+            settings.requests += 1
+        if settings.roll(settings.error_rate):
+            with settings.lock:
+                settings.errors += 1
+            self._send_json(500, {"error": "injected failure"})
+            return
+
+        started = time.perf_counter_ns()
+        prompt_tokens = sum(math.ceil(len(m.get("content", "")) / 4) + 4 for m in payload.get("messages", []))
+        time.sleep((settings.prefill_ms + settings.prefill_ms_per_1k * prompt_tokens / 1000) / 1000)
+        prefilled = time.perf_counter_ns()
+
+        options = payload.get("options", {})
+        limit = int(options.get("num_predict", -1))
+        count = settings.reply_tokens if limit < 0 else min(settings.reply_tokens, limit)
+        tokens = [WORDS[i % len(WORDS)] for i in range(count)]
+        model = payload.get("model", "fake:latest")
+        with settings.lock:
+            settings.loaded.add(model)
+
+        def final(content):
+            finished = time.perf_counter_ns()
+            return {
+                "model": model,
+                "message": {"role": "assistant", "content": content},
+                "done": True,
+                "load_duration": 0,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": prefilled - started,
+                "eval_count": count,
+                "eval_duration": finished - prefilled,
+                "total_duration": finished - started,
+            }
+
+        if payload.get("stream", True) is False:
+            time.sleep(count * settings.token_ms / 1000)
+            self._send_json(200, final("".join(tokens)))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        drop_at = None
+        if settings.roll(settings.drop_rate):
+            with settings.lock:
+                drop_at = settings.random.randrange(max(count, 1))
+        for index, token in enumerate(tokens):
+            if index == drop_at:
+                with settings.lock:
+                    settings.drops += 1
+                # Abort without the terminating chunk, like a crashed server
+                self.close_connection = True
+                return
+            time.sleep(settings.token_ms / 1000)
+            self._write_chunk({"model": model, "message": {"role": "assistant", "content": token}, "done": False})
+        self._write_chunk(final(""))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, body):
+        line = json.dumps(body).encode("utf-8") + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode("ascii") + line + b"\r\n")
+        self.wfile.flush()
+
+
+class FakeOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients hanging up on pooled or aborted connections are expected here
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeOllama:
+    """Fake Ollama server on a background thread; use as a context manager"""
+
+    def __init__(self, settings=None, host="127.0.0.1", port=0):
+        self.settings = settings or FakeOllamaSettings()
+        self.server = FakeOllamaServer((host, port), FakeOllamaHandler)
+        self.server.settings = self.settings
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_settings_arguments(parser):
+    parser.add_argument("--prefill-ms", type=float, default=100.0)
+    parser.add_argument("--prefill-ms-per-1k", type=float, default=0.0, help="extra prefill per 1000 prompt tokens")
+    parser.add_argument("--token-ms", type=float, default=10.0)
+    parser.add_argument("--reply-tokens", type=int, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with HTTP 500")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="fraction of streams cut off mid-reply")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def settings_from_args(args):
+    return FakeOllamaSettings(
+        prefill_ms=args.prefill_ms,
+        prefill_ms_per_1k=args.prefill_ms_per_1k,
+        token_ms=args.token_ms,
+        reply_tokens=args.reply_tokens,
+        error_rate=args.error_rate,
+        drop_rate=args.drop_rate,
+        seed=args.seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Ollama /api/chat")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    add_settings_arguments(parser)
+    args = parser.parse_args()
+
+    fake = FakeOllama(settings_from_args(args), args.host, args.port)
+    print(f"Fake Ollama listening on {fake.base_url}")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fake.server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Stand-ins for Vosk and Piper so voice_server runs without real models
+
+    python -m benchmarks.fakes --port 8765 --decode-rtf 0.1 --tts-ms-per-char 2
+
+serves the real voice_server protocol and scheduling code with these backends.
+Decoding burns CPU in proportion to the audio it is fed, and synthesis waits in
+proportion to the text, so capacity numbers stay meaningful without models.
+"""
+import argparse
+import asyncio
+import functools
+import hashlib
+import json
+import threading
+import time
+
+from piper_pool import pcm_to_wav
+
+WORDS = ("hello", "this", "is", "a", "simulated", "voice", "turn", "for", "load", "testing")
+
+# Seconds of audio per recognized word
+WORD_SECONDS = 0.4
+
+_BURN_BLOCK = bytes(64 * 1024)
+
+
+def burn(seconds):
+    """Keep a core busy for ``seconds``
+
+    hashlib releases the GIL on large buffers, as Kaldi does while decoding,
+    so decode threads scale across cores the same way.
+    """
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        hashlib.sha256(_BURN_BLOCK).digest()
+
+
+class FakeModel:
+    def __init__(self, path):
+        self.path = path
+
+
+class FakeRecognizer:
+    """KaldiRecognizer look-alike that costs ``decode_rtf`` CPU seconds per audio second"""
+
+    def __init__(self, model, sample_rate, decode_rtf=0.1):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.decode_rtf = decode_rtf
+        self.audio_seconds = 0.0
+
+    def AcceptWaveform(self, data):
+        seconds = len(data) / (2 * self.sample_rate)
+        burn(seconds * self.decode_rtf)
+        self.audio_seconds += seconds
+        return False
+
+    def _text(self):
+        count = int(self.audio_seconds / WORD_SECONDS)
+        return " ".join(WORDS[i % len(WORDS)] for i in range(count))
+
+    def PartialResult(self):
+        return json.dumps({"partial": self._text()})
+
+    def FinalResult(self):
+        return json.dumps({"text": self._text()})
+
+    def Reset(self):
+        self.audio_seconds = 0.0
+
+
+class FakeTTS:
+    """PiperPool look-alike: ``workers`` concurrent syntheses returning silent WAVs
+
+    Piper runs out of process, so a sleep is a fair model of the server-side cost.
+    """
+
+    def __init__(self, workers=2, ms_per_char=2.0, sample_rate=22050):
+        self.ms_per_char = ms_per_char
+        self.sample_rate = sample_rate
+        self.slots = threading.Semaphore(workers)
+
+    def synthesize(self, text):
+        with self.slots:
+            time.sleep(len(text) * self.ms_per_char / 1000)
+        # Roughly speaking pace: 15 characters per second of audio
+        samples = int(len(text) / 15 * self.sample_rate)
+        return pcm_to_wav(bytes(2 * samples), self.sample_rate)
+
+    def close(self):
+        pass
+
+
+def fake_config(host, port, sample_rates=(16000, 8000)):
+    return {
+        "host": host,
+        "port": port,
+        "models": {"fake": {"path": "fake", "sampleRates": list(sample_rates)}},
+        "defaultModel": "fake",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run voice_server with fake Vosk and Piper backends")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--decode-rtf", type=float, default=0.1, help="CPU seconds per second of audio")
+    parser.add_argument("--decode-threads", type=int, default=None)
+    parser.add_argument("--tts-ms-per-char", type=float, default=2.0)
+    parser.add_argument("--piper-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    # Imported here so the fakes stay importable by the load generator alone
+    from model_registry import ModelRegistry
+    from voice_server import serve
+
+    config = fake_config(args.host, args.port)
+    if args.decode_threads:
+        config["decodeThreads"] = args.decode_threads
+    registry = ModelRegistry(
+        config,
+        model_factory=FakeModel,
+        recognizer_factory=functools.partial(FakeRecognizer, decode_rtf=args.decode_rtf),
+    )
+    tts_pool = FakeTTS(workers=args.piper_workers, ms_per_char=args.tts_ms_per_char)
+    asyncio.run(serve(config, registry, tts_pool))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+import json
+import os
+import platform
+import time
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def summarize(samples, scale=1000.0):
+    """Count, mean and p50/p95/p99 of ``samples``; seconds become ms with the default scale"""
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+    summary = {"count": len(ordered), "mean": sum(ordered) / len(ordered) * scale}
+    for q in QUANTILES:
+        summary[f"p{int(q * 100)}"] = ordered[min(len(ordered) - 1, int(q * len(ordered)))] * scale
+    summary["max"] = ordered[-1] * scale
+    return summary
+
+
+def process_cpu_seconds(pid=None):
+    """User + system CPU time of a process, read from /proc on Linux; None if unavailable"""
+    if pid is None or pid == os.getpid():
+        times = os.times()
+        return times.user + times.system
+    try:
+        with open(f"/proc/{pid}/stat", "r", encoding="ascii") as handle:
+            # Fields after the parenthesised command name; utime and stime are 14th and 15th overall
+            fields = handle.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+class CpuMeter:
+    """CPU used by a set of processes between construction and ``result``"""
+
+    def __init__(self, pids):
+        self.pids = list(pids)
+        self.started = time.perf_counter()
+        self.baseline = {pid: process_cpu_seconds(pid) for pid in self.pids}
+
+    def result(self):
+        wall = time.perf_counter() - self.started
+        usage = {}
+        for pid in self.pids:
+            now = process_cpu_seconds(pid)
+            if now is None or self.baseline[pid] is None:
+                usage[str(pid)] = None
+                continue
+            seconds = now - self.baseline[pid]
+            usage[str(pid)] = {"cpuSeconds": seconds, "cores": seconds / wall if wall else 0.0}
+        return usage
+
+
+def write_report(path, report):
+    """Write ``report`` as JSON with the machine it ran on; ``-`` prints to stdout"""
+    report = dict(report, machine={
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    })
+    text = json.dumps(report, indent=2)
+    if path == "-":
+        print(text)
+        return
+    with open(path, "w", encoding="utf-8") as handle:
+        handle.write(text + "\n")
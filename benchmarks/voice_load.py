@@ -0,0 +1,285 @@
+"""Load test and capacity benchmark for voice_server
+
+    python -m benchmarks.voice_load --fake --clients 20 --utterances 5
+    python -m benchmarks.voice_load --url ws://host:8765 --wav hello.wav --server-pid 1234
+
+Each simulated client replays a 16-bit mono WAV (or a generated tone) as
+start / binary frames / end, paced at ``--speed`` times real time (0 sends as
+fast as the server accepts), then requests TTS. The JSON report covers first
+partial and final latency, partial spacing, TTS time to first byte, frames sent
+late because the server pushed back, frames dropped on closed connections,
+and CPU used by the load generator and the server processes.
+"""
+import argparse
+import asyncio
+import json
+import math
+import socket
+import struct
+import subprocess
+import sys
+import time
+import wave
+
+import websockets
+
+from benchmarks.report import CpuMeter, summarize, write_report
+
+DEFAULT_TTS_TEXT = "Thanks for calling. Your order has shipped. It should arrive on Tuesday."
+
+
+def load_wav(path):
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2 or wav.getnchannels() != 1:
+            raise ValueError(f"{path}: expected 16-bit mono PCM")
+        return wav.readframes(wav.getnframes()), wav.getframerate()
+
+
+def tone(seconds, sample_rate, frequency=220.0):
+    count = int(seconds * sample_rate)
+    samples = (int(8000 * math.sin(2 * math.pi * frequency * i / sample_rate)) for i in range(count))
+    return struct.pack(f"<{count}h", *samples), sample_rate
+
+
+def split_frames(pcm, sample_rate, frame_ms):
+    size = int(sample_rate * frame_ms / 1000) * 2
+    return [pcm[offset:offset + size] for offset in range(0, len(pcm), size)]
+
+
+class Results:
+    def __init__(self):
+        self.first_partial = []
+        self.partial_gaps = []
+        self.final = []
+        self.tts_ttfb = []
+        self.tts_total = []
+        self.frames_sent = 0
+        self.frames_late = 0
+        self.frames_dropped = 0
+        self.utterances = 0
+        self.errors = []
+
+    def report(self):
+        return {
+            "utterances": self.utterances,
+            "firstPartialMs": summarize(self.first_partial),
+            "partialGapMs": summarize(self.partial_gaps),
+            "finalMs": summarize(self.final),
+            "ttsFirstByteMs": summarize(self.tts_ttfb),
+            "ttsTotalMs": summarize(self.tts_total),
+            "frames": {"sent": self.frames_sent, "late": self.frames_late, "dropped": self.frames_dropped},
+            "errors": len(self.errors),
+            "errorSamples": self.errors[:10],
+        }
+
+
+class Client:
+    """One websocket connection; a reader task timestamps every server message"""
+
+    def __init__(self, websocket, results):
+        self.websocket = websocket
+        self.results = results
+        self.inbox = asyncio.Queue()
+        self.first_frame_at = None
+        self.last_partial_at = None
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        try:
+            async for message in self.websocket:
+                now = time.perf_counter()
+                if isinstance(message, (bytes, bytearray)):
+                    await self.inbox.put(("audio", now, message))
+                    continue
+                data = json.loads(message)
+                if data.get("type") == "partial":
+                    if self.last_partial_at is None:
+                        if self.first_frame_at is not None:
+                            self.results.first_partial.append(now - self.first_frame_at)
+                    else:
+                        self.results.partial_gaps.append(now - self.last_partial_at)
+                    self.last_partial_at = now
+                    continue
+                await self.inbox.put((data.get("type"), now, data))
+        finally:
+            await self.inbox.put(("closed", time.perf_counter(), None))
+
+    async def expect(self, *types, timeout=30.0):
+        while True:
+            kind, at, payload = await asyncio.wait_for(self.inbox.get(), timeout)
+            if kind in types:
+                return kind, at, payload
+            if kind == "error":
+                raise RuntimeError(payload.get("message"))
+            if kind == "closed":
+                raise ConnectionError("server closed the connection")
+
+    async def utterance(self, frames, sample_rate, frame_ms, speed):
+        await self.websocket.send(json.dumps({"type": "start", "sampleRate": sample_rate}))
+        await self.expect("ready")
+        self.first_frame_at = None
+        self.last_partial_at = None
+
+        period = frame_ms / 1000 / speed if speed > 0 else 0.0
+        started = time.perf_counter()
+        for index, frame in enumerate(frames):
+            if period:
+                delay = started + index * period - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif -delay > period:
+                    # Sending blocked behind server backpressure for more than a frame
+                    self.results.frames_late += 1
+            try:
+                await self.websocket.send(frame)
+            except websockets.ConnectionClosed:
+                self.results.frames_dropped += len(frames) - index
+                raise
+            if self.first_frame_at is None:
+                self.first_frame_at = time.perf_counter()
+            self.results.frames_sent += 1
+
+        ended = time.perf_counter()
+        await self.websocket.send(json.dumps({"type": "end"}))
+        _, at, _ = await self.expect("final")
+        self.results.final.append(at - ended)
+        self.results.utterances += 1
+
+    async def tts(self, text, stream, stream_id):
+        message = {"type": "tts", "text": text}
+        if stream:
+            message.update(stream=True, id=stream_id)
+        sent = time.perf_counter()
+        await self.websocket.send(json.dumps(message))
+        _, first, _ = await self.expect("audio")
+        self.results.tts_ttfb.append(first - sent)
+        done = first
+        if stream:
+            _, done, _ = await self.expect("tts_end")
+        self.results.tts_total.append(done - sent)
+
+    async def close(self):
+        await self.websocket.close()
+        self.reader.cancel()
+
+
+async def run_client(index, args, frames, sample_rate, results):
+    try:
+        async with websockets.connect(args.url, max_size=None) as websocket:
+            client = Client(websocket, results)
+            try:
+                for turn in range(args.utterances):
+                    await client.utterance(frames, sample_rate, args.frame_ms, args.speed)
+                    if args.tts:
+                        await client.tts(args.tts_text, args.tts_stream, f"load-{index}-{turn}")
+            finally:
+                await client.close()
+    except Exception as exc:
+        results.errors.append(f"client {index}: {type(exc).__name__}: {exc}")
+
+
+async def run_load(args, frames, sample_rate):
+    results = Results()
+    started = time.perf_counter()
+    clients = []
+    for index in range(args.clients):
+        clients.append(asyncio.create_task(run_client(index, args, frames, sample_rate, results)))
+        if args.ramp:
+            await asyncio.sleep(args.ramp / args.clients)
+    await asyncio.gather(*clients)
+    report = results.report()
+    report["wallSeconds"] = time.perf_counter() - started
+    return report
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_fake_server(args):
+    port = free_port()
+    command = [
+        sys.executable, "-m", "benchmarks.fakes",
+        "--port", str(port),
+        "--decode-rtf", str(args.decode_rtf),
+        "--tts-ms-per-char", str(args.tts_ms_per_char),
+        "--piper-workers", str(args.piper_workers),
+    ]
+    if args.decode_threads:
+        command += ["--decode-threads", str(args.decode_threads)]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.monotonic() + 15
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("fake voice server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return process, f"ws://127.0.0.1:{port}"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("fake voice server did not start listening")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test voice_server with simulated clients")
+    parser.add_argument("--url", default="ws://localhost:8765")
+    parser.add_argument("--fake", action="store_true", help="start a voice server with fake Vosk/Piper backends")
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--utterances", type=int, default=3, help="utterances per client")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which clients connect")
+    parser.add_argument("--wav", help="16-bit mono WAV to replay; a 3 s tone is used otherwise")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="rate of the generated tone (resampled by the server if the model lacks it)")
+    parser.add_argument("--frame-ms", type=int, default=20)
+    parser.add_argument("--speed", type=float, default=1.0, help="multiple of real time; 0 = unpaced")
+    parser.add_argument("--no-tts", dest="tts", action="store_false")
+    parser.add_argument("--tts-text", default=DEFAULT_TTS_TEXT)
+    parser.add_argument("--tts-stream", action="store_true", help="use streaming TTS messages")
+    parser.add_argument("--server-pid", type=int, action="append", default=[], help="server process to meter")
+    parser.add_argument("--output", default="-", help="JSON report path; - prints it")
+    fake = parser.add_argument_group("fake server (--fake)")
+    fake.add_argument("--decode-rtf", type=float, default=0.1)
+    fake.add_argument("--decode-threads", type=int, default=None)
+    fake.add_argument("--tts-ms-per-char", type=float, default=2.0)
+    fake.add_argument("--piper-workers", type=int, default=2)
+    args = parser.parse_args()
+
+    pcm, sample_rate = load_wav(args.wav) if args.wav else tone(3.0, args.sample_rate)
+    frames = split_frames(pcm, sample_rate, args.frame_ms)
+
+    server = None
+    if args.fake:
+        server, args.url = start_fake_server(args)
+        args.server_pid.append(server.pid)
+
+    cpu = CpuMeter([None] + args.server_pid)
+    try:
+        report = asyncio.run(run_load(args, frames, sample_rate))
+        usage = cpu.result()
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    client_usage = usage.pop("None")
+    report.update(
+        config={
+            "url": args.url,
+            "fake": args.fake,
+            "clients": args.clients,
+            "utterances": args.utterances,
+            "audioSeconds": len(pcm) / (2 * sample_rate),
+            "frameMs": args.frame_ms,
+            "speed": args.speed,
+            "tts": args.tts,
+            "ttsStream": args.tts_stream,
+        },
+        cpu={"loadGenerator": client_usage, "server": usage},
+    )
+    write_report(args.output, report)
+
+
+if __name__ == "__main__":
+    main()
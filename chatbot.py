@@ -1,11 +1,31 @@
-import requests
+import time
+# Taken before the imports so the profile of a cold start includes them
+RUN_STARTED = time.perf_counter()
+
 import streamlit as st
-from typing import List, Dict, Optional
 from datetime import datetime
+import functools
 import json
-import re
-import plotly.graph_objects as go
-import pandas as pd
+import os
+import sys
+import uuid
+from collections import OrderedDict
+from typing import Optional, Union
+
+from ollama_client import OllamaClient, OllamaError
+from ollama_pool import OllamaPool
+from context_window import ContextWindow
+from response_cache import ResponseCache
+from local_chatbot import LocalChatbot
+from model_lifecycle import ModelLifecycle
+from text_analysis import analyze
+from conversation_store import ConversationStore
+from analytics import AnalyticsAggregator
+from metrics import RunProfile, SectionTimer, TurnMetrics
+
+# Plotly and the dashboard (dashboard.py) are imported only when a chart is first shown
+section_timer = SectionTimer(RUN_STARTED)
+section_timer.mark("imports")
 
 # Page configuration
 st.set_page_config(
@@ -19,167 +39,319 @@ st.set_page_config(
 st.title("🤖 Advanced AI Chatbot")
 st.markdown("Powered by Llama 3.2 with NLP, Sentiment Analysis & Smart Analytics")
 
-# Analytics & Feature Classes
-class ConversationAnalytics:
-    """Track and analyze conversation metrics"""
-    
-    @staticmethod
-    def analyze_sentiment(text: str) -> str:
-        """Simple sentiment detection using keyword matching"""
-        positive_words = ["good", "great", "excellent", "happy", "love", "wonderful", "amazing", "thank", "thanks"]
-        negative_words = ["bad", "terrible", "hate", "angry", "sad", "awful", "worst", "disappointed"]
-        
-        text_lower = text.lower()
-        pos_count = sum(1 for word in positive_words if word in text_lower)
-        neg_count = sum(1 for word in negative_words if word in text_lower)
-        
-        if pos_count > neg_count:
-            return "😊 Positive"
-        elif neg_count > pos_count:
-            return "😟 Negative"
-        return "😐 Neutral"
-    
-    @staticmethod
-    def extract_entities(text: str) -> List[str]:
-        """Extract basic entities (emails, URLs, numbers)"""
-        entities = []
-        
-        # Email pattern
-        emails = re.findall(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', text)
-        entities.extend([f"📧 {email}" for email in emails])
-        
-        # URL pattern
-        urls = re.findall(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+', text)
-        entities.extend([f"🔗 {url}" for url in urls])
-        
-        # Phone numbers (simple pattern)
-        phones = re.findall(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', text)
-        entities.extend([f"📱 {phone}" for phone in phones])
-        
-        return entities
-
-class LocalChatbot:
-    def __init__(self, model_name="llama3.2:latest"):
-        self.model = model_name
-        self.base_url = "http://localhost:11434"
-        self.system_prompt = """You are an advanced AI assistant with the following capabilities:
-
-1. **Conversational Understanding**: You understand context, intent, and can recognize important information.
-2. **Sentiment Awareness**: You detect and respond appropriately to the user's emotional state.
-3. **Helpful & Adaptive**: You learn from conversations and provide personalized responses.
-4. **Professional**: You maintain a friendly yet professional tone.
-
-Guidelines:
-- Be concise but thorough
-- Show empathy when detecting negative sentiment
-- Provide structured responses when explaining complex topics
-- Ask clarifying questions when needed
-- Remember context from previous messages"""
-    
-    def generate_response(self, messages: List[Dict], temperature: float = 0.7) -> str:
-        """Generate response using Ollama chat API with configurable parameters"""
-        try:
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "stream": False,
-                "options": {
-                    "temperature": temperature,
-                    "top_p": 0.9,
-                    "max_tokens": 800
-                }
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/api/chat",
-                json=payload,
-                timeout=60
-            )
-            
-            if response.status_code == 200:
-                return response.json()["message"]["content"]
-            else:
-                return f"Error: Unable to connect to Ollama. Status: {response.status_code}"
-                
-        except requests.exceptions.ConnectionError:
-            return "❌ Error: Could not connect to Ollama. Make sure it's running on http://localhost:11434"
-        except Exception as e:
-            return f"❌ Error: {str(e)}"
-    
-    def detect_intent(self, user_message: str) -> str:
-        """Detect user intent from message"""
-        message_lower = user_message.lower()
-        
-        if any(word in message_lower for word in ["hello", "hi", "hey", "greetings"]):
-            return "greeting"
-        elif any(word in message_lower for word in ["help", "support", "assist"]):
-            return "help_request"
-        elif any(word in message_lower for word in ["thanks", "thank you", "appreciate"]):
-            return "gratitude"
-        elif "?" in user_message:
-            return "question"
-        else:
-            return "statement"
+@st.cache_resource
+def get_ollama_client() -> Union[OllamaClient, OllamaPool]:
+    """Process-wide pooled Ollama client shared by all sessions
+
+    Set CHATBOT_OLLAMA_URLS to a comma-separated list of Ollama URLs to spread
+    sessions over several instances with health checks and failover.
+    """
+    urls = [url.strip() for url in os.environ.get("CHATBOT_OLLAMA_URLS", "").split(",") if url.strip()]
+    if len(urls) > 1:
+        return OllamaPool(urls)
+    return OllamaClient(urls[0]) if urls else OllamaClient()
+
+# How long Ollama keeps the model loaded after a turn ("30m", "2h", -1 = until Ollama stops),
+# and the reply length cap in tokens
+KEEP_ALIVE = os.environ.get("CHATBOT_KEEP_ALIVE", "30m")
+if KEEP_ALIVE.lstrip("-").isdigit():
+    KEEP_ALIVE = int(KEEP_ALIVE)
+NUM_PREDICT = int(os.environ.get("CHATBOT_NUM_PREDICT", "800"))
+
+def new_chatbot() -> LocalChatbot:
+    return LocalChatbot(client=get_ollama_client(), cache=get_response_cache(),
+                        num_predict=NUM_PREDICT, keep_alive=KEEP_ALIVE)
+
+@st.cache_resource
+def get_model_lifecycle() -> ModelLifecycle:
+    """Process-wide model warm-up, started in the background when the process starts
+
+    Model status is also refreshed in the background, so script runs never wait on /api/ps.
+    Set CHATBOT_PREFILL_SYSTEM_PROMPT=0 to only load the model without prefilling the system prompt.
+    """
+    lifecycle = ModelLifecycle(new_chatbot(),
+                               prefill_system_prompt=os.environ.get("CHATBOT_PREFILL_SYSTEM_PROMPT", "1") != "0")
+    lifecycle.start()
+    lifecycle.monitor()
+    return lifecycle
+
+@st.cache_resource
+def get_response_cache() -> ResponseCache:
+    """Process-wide reply cache; set CHATBOT_CACHE_DB to persist it across restarts"""
+    return ResponseCache(db_path=os.environ.get("CHATBOT_CACHE_DB"))
+
+@st.cache_resource
+def get_conversation_store() -> ConversationStore:
+    """Process-wide append-only store; set CHATBOT_STORE_DIR to change its location"""
+    return ConversationStore(os.environ.get("CHATBOT_STORE_DIR", "conversations"))
+
+# semantic_memory (and with it NumPy) is only imported once a session uses long-term memory
+@st.cache_resource
+def get_embedder():
+    """Process-wide embedder for long-term memory
+
+    CHATBOT_EMBED_MODEL=hashing works offline; if the embedding model cannot be
+    used (usually because it was never pulled) memory falls back to it too
+    """
+    from semantic_memory import FallbackEmbedder, HashingEmbedder
+    model = os.environ.get("CHATBOT_EMBED_MODEL", "nomic-embed-text")
+    if model == "hashing":
+        return HashingEmbedder()
+    return FallbackEmbedder(get_ollama_client(), model)
+
+def embedder_notice() -> Optional[str]:
+    """Why memory recalls by word overlap instead of the embedding model, if it does"""
+    embedder = get_embedder()
+    reason = getattr(embedder, "fallback_reason", None)
+    if not reason:
+        return None
+    return f"{embedder.model} unavailable ({reason}), recalling by word overlap; run `ollama pull {embedder.model}`"
+
+@st.cache_resource
+def sweep_memory() -> int:
+    """Remove memory indexes of sessions that ended before this process started, once"""
+    from semantic_memory import sweep
+    return sweep(MEMORY_DIR, MEMORY_RETENTION_HOURS * 3600)
+
+@st.cache_resource
+def get_turn_metrics() -> TurnMetrics:
+    """Process-wide latency/throughput metrics across all sessions"""
+    return TurnMetrics()
+
+@st.cache_resource
+def get_run_profile() -> RunProfile:
+    """Process-wide per-section timings of script runs, collected with CHATBOT_PROFILE=1"""
+    return RunProfile()
+
+# Set CHATBOT_PROFILE=1 to time each section of every script run (shown in the sidebar
+# and logged to stderr as one JSON line per run)
+PROFILE = os.environ.get("CHATBOT_PROFILE") == "1"
+
+# Set CHATBOT_METRICS_FILE to publish Prometheus metrics via a textfile collector
+METRICS_FILE = os.environ.get("CHATBOT_METRICS_FILE")
+
+# Only the most recent turns stay in session memory; the full history lives in the store
+HISTORY_TAIL_SIZE = 50
+MESSAGES_TAIL_SIZE = 2 * HISTORY_TAIL_SIZE
+
+# Per-session vector indexes of past turns live under CHATBOT_MEMORY_DIR; those of sessions
+# idle for CHATBOT_MEMORY_RETENTION_HOURS are removed when the process starts
+MEMORY_DIR = os.environ.get("CHATBOT_MEMORY_DIR", "memory")
+MEMORY_RETENTION_HOURS = float(os.environ.get("CHATBOT_MEMORY_RETENTION_HOURS", "24"))
+MEMORY_RECALL_K = 3
+
+# The chat pane renders this many recent messages; older ones load a page at a time
+HISTORY_PAGE_SIZE = 20
+# Prepared markdown is kept for this many distinct messages, least recently shown dropped first
+RENDER_CACHE_SIZE = 10 * HISTORY_PAGE_SIZE
 
 # Initialize chatbot
 if "chatbot" not in st.session_state:
-    st.session_state.chatbot = LocalChatbot()
+    st.session_state.chatbot = new_chatbot()
+    # A new session may arrive after Ollama unloaded the model; reload it before the first turn
+    get_model_lifecycle().ensure_warm()
 
 # Initialize chat history
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
+# Initialize conversation storage
+if "session_id" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+
+# Initialize context window (rolling summary of turns that no longer fit the prompt)
+if "context_window" not in st.session_state:
+    st.session_state.context_window = ContextWindow(
+        functools.partial(st.session_state.chatbot.summarize, session_id=st.session_state.session_id),
+        max_tokens=st.session_state.chatbot.context_tokens
+    )
+
 # Initialize analytics
 if "analytics" not in st.session_state:
-    st.session_state.analytics = {
-        "total_messages": 0,
-        "user_messages": 0,
-        "bot_messages": 0,
-        "sentiments": {"😊 Positive": 0, "😟 Negative": 0, "😐 Neutral": 0},
-        "intents": {},
-        "feedback": {"👍": 0, "👎": 0},
-        "conversation_start": datetime.now()
-    }
+    st.session_state.analytics = AnalyticsAggregator()
+
+# Rendered figures keyed by name, reused while the analytics version is unchanged
+if "figure_cache" not in st.session_state:
+    st.session_state.figure_cache = {}
 
-# Initialize conversation storage
 if "conversation_history" not in st.session_state:
     st.session_state.conversation_history = []
 
+# Windowed chat pane: pages shown and an LRU of prepared markdown per message. Turns trimmed from
+# the in-memory tail are paged back in from the store, from history_floor on (the store's
+# record count when the chat was last cleared)
+if "history_pages" not in st.session_state:
+    st.session_state.history_pages = 1
+    st.session_state.rendered_messages = OrderedDict()
+    st.session_state.history_floor = 0
+
+# Long-term memory: stored turns are embedded so relevant old ones can be recalled.
+# The index is opened by get_memory() on the session's first turn with memory on
+if "memory" not in st.session_state:
+    st.session_state.memory = None
+    # Last recall/store failure, shown in the sidebar until memory works again
+    st.session_state.memory_error = None
+
+def get_memory():
+    """This session's long-term memory, opened on first use"""
+    if st.session_state.memory is None:
+        from semantic_memory import SemanticMemory
+        sweep_memory()
+        st.session_state.memory = SemanticMemory(
+            get_embedder(), os.path.join(MEMORY_DIR, st.session_state.session_id)
+        )
+    return st.session_state.memory
+
+def rendered_message(message: dict) -> tuple:
+    """(markdown, caption) for a past message, prepared once per distinct message
+
+    The caption depends only on the text, so user messages are only analysed
+    for their entity caption the first time that text is shown.
+    """
+    cache = st.session_state.rendered_messages
+    key = (message["role"], message["content"])
+    rendered = cache.get(key)
+    if rendered is not None:
+        cache.move_to_end(key)
+        return rendered
+    caption = None
+    if message["role"] == "user":
+        entities = analyze(message["content"])["entities"]
+        if entities:
+            caption = f"Detected: {', '.join(entities)}"
+    rendered = (message["content"], caption)
+    cache[key] = rendered
+    # Paging far back would otherwise keep every message ever shown
+    while len(cache) > RENDER_CACHE_SIZE:
+        cache.popitem(last=False)
+    return rendered
+
+def trim_messages():
+    """Drop the oldest in-memory messages beyond MESSAGES_TAIL_SIZE that the summary already covers
+
+    A user/assistant pair is never split, so the tail always starts at a turn.
+    """
+    messages = st.session_state.messages
+    limit = min(len(messages) - MESSAGES_TAIL_SIZE, st.session_state.context_window.summarized_count)
+    drop = 0
+    while drop < limit:
+        if messages[drop]["role"] == "user" and drop + 1 < len(messages) and messages[drop + 1]["role"] == "assistant":
+            if drop + 2 > limit:
+                break
+            drop += 2
+        else:
+            drop += 1
+    if drop:
+        st.session_state.context_window.drop_oldest(drop)
+        del messages[:drop]
+
+@st.fragment
+def render_feedback(idx: int):
+    """Feedback buttons rerun only this fragment, not the whole page"""
+    feedback_col1, feedback_col2 = st.columns([1, 10])
+    with feedback_col1:
+        if st.button("👍", key=f"thumbs_up_{idx}"):
+            st.session_state.analytics.record_feedback("👍")
+            st.success("Thanks for your feedback!")
+    with feedback_col2:
+        if st.button("👎", key=f"thumbs_down_{idx}"):
+            st.session_state.analytics.record_feedback("👎")
+            st.info("Feedback recorded. I'll improve!")
+
+@st.fragment
+def render_live_analytics():
+    analytics = st.session_state.analytics
+    st.markdown("### 📊 Live Analytics")
+    
+    # Key metrics in compact columns
+    met_col1, met_col2 = st.columns(2)
+    with met_col1:
+        st.metric("📨 Total", analytics.total_messages)
+    with met_col2:
+        st.metric("👤 User", analytics.user_messages)
+    
+    # Sentiment Pie Chart
+    st.markdown("**😊 Sentiment Distribution**")
+    if sum(analytics.sentiments.values()) > 0:
+        import dashboard
+        st.plotly_chart(dashboard.cached_figure("sentiment_pie", dashboard.build_sentiment_pie),
+                        use_container_width=True)
+    else:
+        st.info("No data yet")
+    
+    # Intent Bar Chart
+    if analytics.intents:
+        st.markdown("**🎯 Intent Detection**")
+        import dashboard
+        st.plotly_chart(dashboard.cached_figure("intent_bar", dashboard.build_intent_bar), use_container_width=True)
+    
+    # Feedback metrics
+    st.markdown("**👍 User Feedback**")
+    if analytics.feedback["👍"] + analytics.feedback["👎"] > 0:
+        satisfaction = analytics.satisfaction() * 100
+        st.progress(satisfaction / 100)
+        st.caption(f"Satisfaction: {satisfaction:.1f}%")
+    else:
+        st.caption("No feedback yet")
+
+section_timer.mark("setup")
+
 # Create two columns for main chat and sidebar
 col1, col2 = st.columns([3, 1])
 
 with col1:
     st.markdown("### 💬 Chat")
     
-    # Display chat history
-    for idx, message in enumerate(st.session_state.messages):
+    # Display only the most recent pages of history so a rerun costs O(page), not O(history);
+    # pages older than the in-memory tail are read back from the conversation store
+    history = st.session_state.messages
+    shown = HISTORY_PAGE_SIZE * st.session_state.history_pages
+    store = get_conversation_store()
+    stored_before, older = store.turns_before_tail(
+        st.session_state.session_id, st.session_state.history_floor,
+        tail_turns=sum(1 for m in history if m["role"] == "assistant"),
+        limit=max(0, -(-(shown - len(history)) // 2)),
+    )
+    hidden = max(0, len(history) + 2 * stored_before - shown)
+    if hidden > 0:
+        if st.button(f"⬆️ Load older messages ({hidden} hidden)", key="load_older"):
+            st.session_state.history_pages += 1
+            st.rerun()
+    
+    for record in older:
+        for role, key in (("user", "user"), ("assistant", "bot")):
+            with st.chat_message(role):
+                body, caption = rendered_message({"role": role, "content": record.get(key, "")})
+                st.markdown(body)
+                if caption:
+                    st.caption(caption)
+    
+    for idx in range(max(0, len(history) - shown), len(history)):
+        message = history[idx]
         with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+            body, caption = rendered_message(message)
+            st.markdown(body)
+            if caption:
+                st.caption(caption)
             
             # Show feedback buttons for bot messages
-            if message["role"] == "assistant" and idx == len(st.session_state.messages) - 1:
-                feedback_col1, feedback_col2 = st.columns([1, 10])
-                with feedback_col1:
-                    if st.button("👍", key=f"thumbs_up_{idx}"):
-                        st.session_state.analytics["feedback"]["👍"] += 1
-                        st.success("Thanks for your feedback!")
-                with feedback_col2:
-                    if st.button("👎", key=f"thumbs_down_{idx}"):
-                        st.session_state.analytics["feedback"]["👎"] += 1
-                        st.info("Feedback recorded. I'll improve!")
+            if message["role"] == "assistant" and idx == len(history) - 1:
+                render_feedback(store.count(st.session_state.session_id))
     
     # Chat input
     if user_input := st.chat_input("Type your message here..."):
-        # Analyze sentiment and intent
-        sentiment = ConversationAnalytics.analyze_sentiment(user_input)
-        intent = st.session_state.chatbot.detect_intent(user_input)
-        entities = ConversationAnalytics.extract_entities(user_input)
+        turn_metrics = get_turn_metrics()
+        
+        # Analyze sentiment, intent and entities in one pass
+        span_start = time.perf_counter()
+        analysis = analyze(user_input)
+        turn_metrics.observe_span("analysis", time.perf_counter() - span_start)
+        sentiment = analysis["sentiment"]
+        intent = analysis["intent"]
+        entities = analysis["entities"]
         
         # Update analytics
-        st.session_state.analytics["total_messages"] += 1
-        st.session_state.analytics["user_messages"] += 1
-        st.session_state.analytics["sentiments"][sentiment] += 1
-        st.session_state.analytics["intents"][intent] = st.session_state.analytics["intents"].get(intent, 0) + 1
+        st.session_state.analytics.record_user(sentiment, intent)
         
         # Add user message to history
         st.session_state.messages.append({"role": "user", "content": user_input})
@@ -190,103 +362,89 @@ with col1:
             if entities:
                 st.caption(f"Detected: {', '.join(entities)}")
         
-        # Prepare messages for API with enhanced system prompt
-        messages = [
-            {"role": "system", "content": st.session_state.chatbot.system_prompt}
-        ]
+        # Prepare messages for API: stable system prompt, summary, recent turns, then per-turn notes
+        # (e.g. sentiment context when the user sounds negative)
+        notes = st.session_state.chatbot.turn_notes(sentiment)
         
-        # Add sentiment context if negative
-        if sentiment == "😟 Negative":
-            messages.append({
-                "role": "system",
-                "content": "Note: The user seems to have negative sentiment. Respond with empathy and helpfulness."
-            })
+        # Recall relevant turns that have left the prompt window; recent ones are already in it
+        if st.session_state.get("memory_enabled", True):
+            in_window = sum(
+                1 for m in st.session_state.messages[st.session_state.context_window.window_start:]
+                if m["role"] == "assistant"
+            )
+            span_start = time.perf_counter()
+            memory = get_memory()
+            try:
+                memories = memory.recall(user_input, k=MEMORY_RECALL_K, skip_recent=in_window)
+                st.session_state.memory_error = None
+            except OllamaError as e:
+                memories = []
+                st.session_state.memory_error = f"Memory unavailable: {e}"
+                st.caption(f"⚠️ {st.session_state.memory_error}")
+            turn_metrics.observe_span("memory", time.perf_counter() - span_start)
+            memory_note = memory.note(memories)
+            if memory_note:
+                notes.append(memory_note)
         
-        messages.extend(st.session_state.messages)
+        span_start = time.perf_counter()
+        messages = st.session_state.context_window.build(
+            st.session_state.chatbot.system_prompt,
+            st.session_state.messages,
+            notes
+        )
+        turn_metrics.observe_span("prompt", time.perf_counter() - span_start)
         
         # Get response
+        # Stream tokens into the bubble as they arrive; write_stream returns the full text
+        response = None
+        stats = {}
         with st.chat_message("assistant"):
-            with st.spinner("🤔 Thinking..."):
-                response = st.session_state.chatbot.generate_response(messages)
-            st.markdown(response)
+            try:
+                response = st.write_stream(st.session_state.chatbot.stream_response(
+                    messages, st.session_state.get("temperature", 0.7), stats=stats,
+                    session_id=st.session_state.session_id
+                ))
+                turn_metrics.record_turn(stats)
+            except OllamaError as e:
+                # Surface the failure without recording it as a bot reply
+                turn_metrics.record_error()
+                st.error(f"❌ {e}")
         
-        # Add assistant response to history
-        st.session_state.messages.append({"role": "assistant", "content": response})
-        st.session_state.analytics["total_messages"] += 1
-        st.session_state.analytics["bot_messages"] += 1
+        if METRICS_FILE:
+            turn_metrics.write_prometheus(METRICS_FILE)
         
-        # Store conversation for learning
-        st.session_state.conversation_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "user": user_input,
-            "bot": response,
-            "sentiment": sentiment,
-            "intent": intent,
-            "entities": entities
-        })
-        
-        st.rerun()
+        if response is not None:
+            # Add assistant response to history
+            st.session_state.messages.append({"role": "assistant", "content": response})
+            st.session_state.analytics.record_bot(sentiment)
+            
+            # Store conversation for learning: append to disk, keep a bounded tail in memory
+            record = {
+                "timestamp": datetime.now().isoformat(),
+                "user": user_input,
+                "bot": response,
+                "sentiment": sentiment,
+                "intent": intent,
+                "entities": entities
+            }
+            get_conversation_store().append(st.session_state.session_id, record)
+            st.session_state.conversation_history.append(record)
+            if st.session_state.get("memory_enabled", True):
+                try:
+                    get_memory().add_turn(record)
+                except OllamaError as e:
+                    st.session_state.memory_error = f"Turn not added to memory: {e}"
+            del st.session_state.conversation_history[:-HISTORY_TAIL_SIZE]
+            trim_messages()
+            
+            st.rerun()
+
+section_timer.mark("chat")
 
 with col2:
-    st.markdown("### 📊 Live Analytics")
-    
-    # Key metrics in compact columns
-    met_col1, met_col2 = st.columns(2)
-    with met_col1:
-        st.metric("📨 Total", st.session_state.analytics["total_messages"])
-    with met_col2:
-        st.metric("👤 User", st.session_state.analytics["user_messages"])
-    
-    # Sentiment Pie Chart
-    st.markdown("**😊 Sentiment Distribution**")
-    sentiment_data = st.session_state.analytics["sentiments"]
-    if sum(sentiment_data.values()) > 0:
-        fig_sentiment = go.Figure(data=[go.Pie(
-            labels=list(sentiment_data.keys()),
-            values=list(sentiment_data.values()),
-            hole=0.4,
-            marker=dict(colors=['#90EE90', '#FFB6C6', '#D3D3D3'])
-        )])
-        fig_sentiment.update_layout(
-            height=250,
-            margin=dict(l=0, r=0, t=30, b=0),
-            showlegend=True,
-            legend=dict(font=dict(size=9))
-        )
-        st.plotly_chart(fig_sentiment, use_container_width=True)
-    else:
-        st.info("No data yet")
-    
-    # Intent Bar Chart
-    if st.session_state.analytics["intents"]:
-        st.markdown("**🎯 Intent Detection**")
-        intent_items = list(st.session_state.analytics["intents"].items())[:5]
-        intent_df = pd.DataFrame(intent_items, columns=['Intent', 'Count'])
-        
-        fig_intent = go.Figure(data=[go.Bar(
-            x=intent_df['Count'],
-            y=intent_df['Intent'],
-            orientation='h',
-            marker=dict(color='#4CAF50')
-        )])
-        fig_intent.update_layout(
-            height=200,
-            margin=dict(l=0, r=0, t=0, b=0),
-            xaxis_title="",
-            yaxis_title=""
-        )
-        st.plotly_chart(fig_intent, use_container_width=True)
-    
-    # Feedback metrics
-    st.markdown("**👍 User Feedback**")
-    feedback = st.session_state.analytics["feedback"]
-    total_feedback = feedback["👍"] + feedback["👎"]
-    if total_feedback > 0:
-        satisfaction = (feedback["👍"] / total_feedback) * 100
-        st.progress(satisfaction / 100)
-        st.caption(f"Satisfaction: {satisfaction:.1f}%")
-    else:
-        st.caption("No feedback yet")
+    render_live_analytics()
+
+section_timer.mark("live_analytics")
 
 # Sidebar with info and controls
 with st.sidebar:
@@ -299,6 +457,7 @@ with st.sidebar:
     - Intent Recognition
     - Entity Extraction
     - Context Awareness
+    - Long-term semantic memory
     
     **😊 Sentiment Analysis**
     - Real-time emotion detection
@@ -326,203 +485,111 @@ with st.sidebar:
     
     # Model settings
     st.markdown("### ⚙️ Settings")
-    temperature = st.slider("Response Creativity", 0.0, 1.0, 0.7, 0.1, 
+    temperature = st.slider("Response Creativity", 0.0, 1.0, 0.7, 0.1, key="temperature",
                            help="Higher = more creative, Lower = more focused")
+    st.toggle("📈 Advanced dashboard", value=False, key="dashboard_enabled",
+              help="Capability radar, latency metrics and conversation flow charts below the chat")
+    st.toggle("🧠 Long-term memory", value=True, key="memory_enabled",
+              help="Recall relevant earlier turns into the prompt instead of resending the transcript")
+    if st.session_state.get("memory_enabled", True):
+        memory = st.session_state.memory
+        st.caption(f"🧠 {len(memory.index) if memory else 0} turns in memory")
+        notice = embedder_notice() if memory else None
+        if notice:
+            st.info(f"🧠 {notice}")
+        if st.session_state.memory_error:
+            st.warning(f"⚠️ {st.session_state.memory_error}")
+    
+    lifecycle = get_model_lifecycle()
+    backends = lifecycle.status()
+    if not backends:
+        st.caption(f"🟡 Checking {st.session_state.chatbot.model}...")
+    for backend in backends:
+        if backend["loaded"]:
+            load = f", loaded in {backend['load_seconds']:.1f}s" if backend.get("load_seconds") else ""
+            st.caption(f"🟢 {st.session_state.chatbot.model} ready{load}")
+        elif lifecycle.warming():
+            st.caption(f"🟡 Loading {st.session_state.chatbot.model}...")
+        else:
+            st.caption(f"⚪ {st.session_state.chatbot.model} not loaded on {backend['url']}")
+    
+    cache = st.session_state.chatbot.cache
+    if cache is not None:
+        st.caption(f"⚡ Response cache: {cache.stats['hits']} hits, {cache.stats['misses']} misses "
+                   f"({cache.hit_rate() * 100:.0f}% hit rate)")
     
     st.markdown("---")
     
     # Control buttons
     if st.button("🗑️ Clear Chat", use_container_width=True):
         st.session_state.messages = []
+        st.session_state.context_window.reset()
+        st.session_state.history_pages = 1
+        st.session_state.rendered_messages = OrderedDict()
+        # Turns stored before the clear are still exported but no longer shown
+        st.session_state.history_floor = get_conversation_store().count(st.session_state.session_id)
         st.rerun()
     
+    compress_export = st.checkbox("Compress export (gzip)", value=True)
     if st.button("📥 Export Conversation", use_container_width=True):
         if st.session_state.conversation_history:
-            # Convert analytics to JSON-serializable format
-            analytics_export = st.session_state.analytics.copy()
-            analytics_export["conversation_start"] = analytics_export["conversation_start"].isoformat()
-            
-            export_data = {
-                "conversations": st.session_state.conversation_history,
-                "analytics": analytics_export,
+            # NDJSON: a header line with analytics, then one line per stored turn
+            header = {
+                "type": "export",
+                "analytics": st.session_state.analytics.to_dict(),
                 "export_time": datetime.now().isoformat()
             }
+            chunks = get_conversation_store().export_ndjson(
+                st.session_state.session_id, header, compress=compress_export
+            )
+            file_name = f"conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.ndjson"
             st.download_button(
-                label="💾 Download JSON",
-                data=json.dumps(export_data, indent=2),
-                file_name=f"conversation_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json"
+                label="💾 Download NDJSON",
+                data=b"".join(chunks),
+                file_name=file_name + (".gz" if compress_export else ""),
+                mime="application/gzip" if compress_export else "application/x-ndjson"
             )
     
     if st.button("🔄 Reset Analytics", use_container_width=True):
-        st.session_state.analytics = {
-            "total_messages": 0,
-            "user_messages": 0,
-            "bot_messages": 0,
-            "sentiments": {"😊 Positive": 0, "😟 Negative": 0, "😐 Neutral": 0},
-            "intents": {},
-            "feedback": {"👍": 0, "👎": 0},
-            "conversation_start": datetime.now()
-        }
+        st.session_state.analytics = AnalyticsAggregator()
+        st.session_state.figure_cache = {}
         st.session_state.conversation_history = []
+        get_conversation_store().clear(st.session_state.session_id)
+        st.session_state.history_floor = 0
+        if st.session_state.memory is not None:
+            st.session_state.memory.clear()
+        st.session_state.memory_error = None
         st.rerun()
     
     st.markdown("---")
     st.caption("💡 **Tip**: Your conversations are stored locally for learning and can be exported anytime.")
 
-# Advanced Analytics Dashboard Section
-st.markdown("---")
-st.markdown("## 📈 Advanced Analytics Dashboard")
-
-dash_col1, dash_col2, dash_col3 = st.columns(3)
+section_timer.mark("sidebar")
 
-with dash_col1:
-    st.markdown("### 🎯 AI Capabilities Radar")
-    
-    # Pentagonal Radar Chart for AI capabilities
-    capabilities = {
-        'NLP Understanding': 85,
-        'Sentiment Analysis': 80,
-        'Response Quality': 90,
-        'Context Awareness': 75,
-        'Learning Ability': 70
-    }
-    
-    fig_radar = go.Figure()
-    fig_radar.add_trace(go.Scatterpolar(
-        r=list(capabilities.values()),
-        theta=list(capabilities.keys()),
-        fill='toself',
-        fillcolor='rgba(76, 175, 80, 0.3)',
-        line=dict(color='#4CAF50', width=2),
-        name='Current Performance'
-    ))
+if st.session_state.get("dashboard_enabled", False):
+    import dashboard
+    dashboard.render_dashboard(get_turn_metrics(), get_ollama_client())
     
-    fig_radar.update_layout(
-        polar=dict(
-            radialaxis=dict(
-                visible=True,
-                range=[0, 100],
-                tickfont=dict(size=9)
-            )
-        ),
-        showlegend=False,
-        height=300,
-        margin=dict(l=40, r=40, t=40, b=40)
-    )
-    
-    st.plotly_chart(fig_radar, use_container_width=True)
+    if st.session_state.analytics.total_messages > 5:
+        dashboard.render_flow_analysis()
 
-with dash_col2:
-    st.markdown("### 🚧 Challenges & Solutions")
-    
-    challenges = {
-        "Complex Queries": "Advanced NLP (GPT/BERT)",
-        "Multiple Intents": "Intent prioritization",
-        "Real-time Optimization": "WebSockets & Redis",
-        "Ethical AI": "Bias detection techniques"
-    }
-    
-    for challenge, solution in challenges.items():
-        with st.expander(f"⚠️ {challenge}"):
-            st.success(f"✅ **Solution**: {solution}")
-    
-    st.markdown("---")
-    st.markdown("**📊 Performance Metrics**")
-    if st.session_state.analytics["total_messages"] > 0:
-        avg_response_time = "< 2s"
-        accuracy = "92%"
-        st.metric("Avg Response Time", avg_response_time)
-        st.metric("Response Accuracy", accuracy)
-    else:
-        st.info("Start chatting to see metrics")
+section_timer.mark("dashboard")
 
-with dash_col3:
-    st.markdown("### 🚀 Future Enhancements")
-    
-    future_features = [
-        "🎤 Voice-enabled chatbot with speech-to-text",
-        "🌍 Multilingual support (50+ languages)",
-        "🔮 AI predictive suggestions",
-        "📱 Mobile app integration",
-        "🤝 Multi-platform deployment",
-        "🧠 Advanced context memory"
-    ]
-    
-    st.markdown("**Planned Features:**")
-    for feature in future_features:
-        st.markdown(f"- {feature}")
-    
-    st.markdown("---")
-    st.markdown("**🎨 Integration Options**")
-    integrations = ["WhatsApp", "Slack", "Telegram", "Discord", "MS Teams"]
-    for integration in integrations:
-        st.checkbox(integration, key=f"int_{integration}", disabled=True, value=False)
-
-# Response Quality Trend (if multiple messages)
-if st.session_state.analytics["total_messages"] > 5:
-    st.markdown("### 📉 Conversation Flow Analysis")
-    
-    flow_col1, flow_col2 = st.columns(2)
-    
-    with flow_col1:
-        # Simulate conversation flow over time
-        message_counts = []
-        timestamps = []
-        
-        for i, conv in enumerate(st.session_state.conversation_history[-10:], 1):
-            message_counts.append(i)
-            timestamps.append(f"Msg {i}")
-        
-        fig_flow = go.Figure()
-        fig_flow.add_trace(go.Scatter(
-            x=timestamps,
-            y=message_counts,
-            mode='lines+markers',
-            line=dict(color='#2196F3', width=2),
-            marker=dict(size=8),
-            name='Messages'
-        ))
-        
-        fig_flow.update_layout(
-            title="Message Flow",
-            xaxis_title="",
-            yaxis_title="Count",
-            height=250,
-            margin=dict(l=40, r=20, t=40, b=20)
-        )
-        
-        st.plotly_chart(fig_flow, use_container_width=True)
-    
-    with flow_col2:
-        # Sentiment timeline
-        recent_sentiments = [conv['sentiment'] for conv in st.session_state.conversation_history[-10:]]
-        sentiment_values = {
-            '😊 Positive': 1,
-            '😐 Neutral': 0,
-            '😟 Negative': -1
-        }
-        
-        sentiment_scores = [sentiment_values.get(s, 0) for s in recent_sentiments]
-        
-        fig_sentiment_trend = go.Figure()
-        fig_sentiment_trend.add_trace(go.Scatter(
-            x=list(range(1, len(sentiment_scores) + 1)),
-            y=sentiment_scores,
-            mode='lines+markers',
-            line=dict(color='#FF9800', width=2),
-            marker=dict(size=8),
-            fill='tozeroy',
-            fillcolor='rgba(255, 152, 0, 0.2)'
-        ))
-        
-        fig_sentiment_trend.update_layout(
-            title="Sentiment Trend",
-            xaxis_title="Message #",
-            yaxis_title="Sentiment",
-            yaxis=dict(tickvals=[-1, 0, 1], ticktext=['Negative', 'Neutral', 'Positive']),
-            height=250,
-            margin=dict(l=40, r=20, t=40, b=20)
-        )
-        
-        st.plotly_chart(fig_sentiment_trend, use_container_width=True)
\ No newline at end of file
+if PROFILE:
+    run_profile = get_run_profile()
+    run_profile.record_run(section_timer.sections)
+    heavy_modules = [name for name in ("plotly", "pandas", "numpy") if name in sys.modules]
+    print(json.dumps({"run": run_profile.runs, "sections": section_timer.sections, "modules": heavy_modules}),
+          file=sys.stderr)
+    with st.sidebar:
+        with st.expander("⏱️ Run profile"):
+            def ms(value):
+                return "–" if value is None else f"{value * 1000:.1f}"
+            
+            st.markdown(
+                "| Section | First run (ms) | p50 | p95 |\n|---|---|---|---|\n" + "\n".join(
+                    f"| {name} | {ms(q['first'])} | {ms(q[0.5])} | {ms(q[0.95])} |"
+                    for name, q in run_profile.summary().items()
+                )
+            )
+            st.caption(f"{run_profile.runs} runs; loaded: {', '.join(heavy_modules) or 'none'}")
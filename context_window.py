@@ -0,0 +1,141 @@
+import math
+from typing import Callable, Dict, List, Optional
+
+from ollama_client import OllamaError
+
+# Rough per-message overhead for role headers and separators in the chat template
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Prompt budget of a turn; LocalChatbot sizes Ollama's num_ctx from the same number
+DEFAULT_MAX_TOKENS = 3072
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return math.ceil(len(text) / 4)
+
+
+def message_tokens(message: Dict) -> int:
+    return estimate_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+
+class ContextWindow:
+    """Token-budgeted prompt builder that folds old turns into a rolling summary
+
+    The prompt is laid out as [system prompt, summary, recent turns, per-turn notes]
+    so the system prompt prefix stays byte-identical between turns and Ollama can
+    reuse its KV cache. The summary only changes when older turns are folded in,
+    which happens in batches (down to ``keep_ratio`` of the budget) rather than on
+    every turn. Each summarize request carries at most ``fold_tokens`` of turns,
+    so a long backlog is folded in several bounded requests, and the window only
+    moves past turns that actually made it into the summary: while summarizing
+    fails, unsummarized turns stay in the prompt.
+    """
+
+    def __init__(
+        self,
+        summarize: Callable[[str, List[Dict]], str],
+        max_tokens: int = DEFAULT_MAX_TOKENS,
+        keep_ratio: float = 0.6,
+        min_recent: int = 2,
+        fold_tokens: Optional[int] = None,
+    ):
+        self.summarize = summarize
+        self.max_tokens = max_tokens
+        self.keep_ratio = keep_ratio
+        self.min_recent = min_recent
+        self.fold_tokens = fold_tokens or max_tokens // 2
+        self.reset()
+
+    def reset(self):
+        """Forget the cached summary (e.g. after the chat is cleared)"""
+        self.summary = ""
+        self.summarized_count = 0
+        self.window_start = 0
+
+    def drop_oldest(self, count: int) -> int:
+        """Account for messages removed from the front of the history
+
+        Only messages already folded into the summary can go; returns how many
+        of ``count`` that allows, which the caller must then remove.
+        """
+        count = min(count, self.summarized_count)
+        self.summarized_count -= count
+        self.window_start -= count
+        return count
+
+    def _summary_message(self) -> Optional[Dict]:
+        if not self.summary:
+            return None
+        return {"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}
+
+    def _split_point(self, history: List[Dict], budget: int) -> int:
+        """Index of the oldest message that still fits in ``budget`` tokens"""
+        used = 0
+        start = len(history)
+        while start > 0:
+            cost = message_tokens(history[start - 1])
+            if used + cost > budget and len(history) - start >= self.min_recent:
+                break
+            used += cost
+            start -= 1
+        return start
+
+    def _fold(self, history: List[Dict], until: int):
+        """Fold history[summarized_count:until] into the summary, ``fold_tokens`` at a time
+
+        Stops at the first failed request; the turns not yet folded are
+        retried when the window next overflows.
+        """
+        max_chars = self.fold_tokens * 4
+        while self.summarized_count < until:
+            batch = []
+            used = 0
+            for message in history[self.summarized_count:until]:
+                cost = message_tokens(message)
+                if batch and used + cost > self.fold_tokens:
+                    break
+                if len(message.get("content", "")) > max_chars:
+                    # A single huge message is cut rather than sent whole
+                    message = dict(message, content=message["content"][:max_chars])
+                batch.append(message)
+                used += cost
+            try:
+                self.summary = self.summarize(self.summary, batch).strip()
+            except OllamaError:
+                # Keep the old summary; the pending turns stay in the prompt until folded
+                return
+            self.summarized_count += len(batch)
+
+    def build(
+        self,
+        system_prompt: str,
+        history: List[Dict],
+        notes: Optional[List[str]] = None,
+    ) -> List[Dict]:
+        """Assemble the prompt messages for the next turn"""
+        if self.window_start > len(history):
+            self.reset()
+
+        prefix = [{"role": "system", "content": system_prompt}]
+        suffix = [{"role": "system", "content": note} for note in (notes or [])]
+        fixed = sum(message_tokens(m) for m in prefix + suffix)
+
+        summary = self._summary_message()
+        budget = self.max_tokens - fixed - (message_tokens(summary) if summary else 0)
+
+        # Only re-cut the window when the current one no longer fits, then cut deep
+        # enough that the next several turns can be appended without another fold
+        window = history[self.window_start:]
+        if sum(message_tokens(m) for m in window) > budget:
+            self._fold(history, self._split_point(history, int(budget * self.keep_ratio)))
+            # Never drop turns the summary does not cover
+            self.window_start = self.summarized_count
+            summary = self._summary_message()
+
+        messages = list(prefix)
+        if summary:
+            messages.append(summary)
+        messages.extend(history[self.window_start:])
+        messages.extend(suffix)
+        return messages
@@ -0,0 +1,185 @@
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Flush compressed export output in chunks of roughly this size
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+class ConversationStore:
+    """Append-only JSONL segment store for conversation turns
+
+    Each session gets its own directory of numbered segments. Turns are appended
+    as single JSON lines as they happen; the active segment is rotated once it
+    exceeds ``max_segment_bytes`` or ``max_segment_age`` seconds. Every append
+    opens and closes its segment, so idle sessions hold no file handles; only
+    the record count of each segment is remembered, for the ``max_sessions``
+    most recently used sessions. Exports stream the segments back as NDJSON
+    (optionally gzip-compressed) without loading the whole history into memory.
+    """
+
+    def __init__(self, root: str = "conversations", max_segment_bytes: int = 5 * 1024 * 1024,
+                 max_segment_age: float = 24 * 3600, max_sessions: int = 1024):
+        self.root = root
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_age = max_segment_age
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        os.makedirs(root, exist_ok=True)
+
+    def _session_dir(self, session_id: str) -> str:
+        # Session ids come from uuid4().hex, but never let one escape the root
+        return os.path.join(self.root, os.path.basename(session_id))
+
+    def segments(self, session_id: str) -> List[str]:
+        """Segment paths of a session, oldest first"""
+        path = self._session_dir(session_id)
+        if not os.path.isdir(path):
+            return []
+        return [os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(".jsonl")]
+
+    @staticmethod
+    def _count_records(path: str) -> int:
+        with open(path, "r", encoding="utf-8") as handle:
+            return sum(1 for line in handle if line.strip())
+
+    def _session(self, session_id: str) -> Dict:
+        """Segment paths and record counts of a session, scanned on first use (lock held)"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+            return session
+        segments = [[path, self._count_records(path)] for path in self.segments(session_id)]
+        session = {"segments": segments, "opened": 0.0, "size": 0}
+        self._sessions[session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return session
+
+    def _next_segment(self, session_id: str, session: Dict):
+        """Start a fresh segment after the highest existing one (lock held)"""
+        existing = session["segments"]
+        seq = int(os.path.basename(existing[-1][0]).split("-")[1].split(".")[0]) + 1 if existing else 0
+        existing.append([os.path.join(self._session_dir(session_id), f"segment-{seq:06d}.jsonl"), 0])
+        session["opened"] = time.time()
+        session["size"] = 0
+
+    def append(self, session_id: str, record: Dict):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            session = self._session(session_id)
+            # A process starts its own segment for a session, as does a rotation
+            if (not session["opened"] or session["size"] >= self.max_segment_bytes
+                    or time.time() - session["opened"] >= self.max_segment_age):
+                self._next_segment(session_id, session)
+            segment = session["segments"][-1]
+            os.makedirs(self._session_dir(session_id), exist_ok=True)
+            with open(segment[0], "a", encoding="utf-8") as handle:
+                handle.write(line)
+            session["size"] += len(line.encode("utf-8"))
+            segment[1] += 1
+
+    def count(self, session_id: str) -> int:
+        """Number of stored records of a session"""
+        with self._lock:
+            return sum(records for _, records in self._session(session_id)["segments"])
+
+    def iter_records(self, session_id: str) -> Iterator[Dict]:
+        for path in self.segments(session_id):
+            with open(path, "r", encoding="utf-8") as handle:
+                for line in handle:
+                    if line.strip():
+                        yield json.loads(line)
+
+    def read_turns(self, session_id: str, start: int, stop: int) -> List[Dict]:
+        """Records ``start`` to ``stop`` (exclusive) of a session, oldest first
+
+        Segments wholly before ``start`` are skipped by their record counts, so
+        paging older history back in only reads the segments it needs.
+        """
+        with self._lock:
+            segments = [list(segment) for segment in self._session(session_id)["segments"]]
+        turns = []
+        first = 0
+        for path, records in segments:
+            if first >= stop:
+                break
+            if first + records > start and os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as handle:
+                    index = first
+                    for line in handle:
+                        if not line.strip():
+                            continue
+                        if index >= stop:
+                            break
+                        if index >= start:
+                            turns.append(json.loads(line))
+                        index += 1
+            first += records
+        return turns
+
+    def turns_before_tail(self, session_id: str, floor: int, tail_turns: int,
+                          limit: int) -> Tuple[int, List[Dict]]:
+        """Stored turns older than an in-memory tail, for paging a chat view back
+
+        The view starts at record ``floor`` and its newest ``tail_turns`` turns
+        are still in memory (a tail can hold more turns than are stored, after
+        the records were cleared). Returns how many stored turns precede the
+        tail and the last ``limit`` of them.
+        """
+        stop = max(floor, self.count(session_id) - tail_turns)
+        start = max(floor, stop - limit)
+        return stop - floor, self.read_turns(session_id, start, stop) if start < stop else []
+
+    def export_ndjson(self, session_id: str, header: Optional[Dict] = None,
+                      compress: bool = False) -> Iterator[bytes]:
+        """Stream the session as NDJSON bytes, one optional header line then one line per turn"""
+        def lines() -> Iterator[bytes]:
+            if header is not None:
+                yield (json.dumps(header, ensure_ascii=False) + "\n").encode("utf-8")
+            for path in self.segments(session_id):
+                with open(path, "rb") as handle:
+                    for line in handle:
+                        yield line
+
+        if not compress:
+            yield from lines()
+            return
+
+        # wbits=31 selects the gzip container so the output is a valid .gz stream
+        compressor = zlib.compressobj(wbits=31)
+        pending = []
+        size = 0
+        for line in lines():
+            pending.append(line)
+            size += len(line)
+            if size >= EXPORT_CHUNK_BYTES:
+                yield compressor.compress(b"".join(pending))
+                pending, size = [], 0
+        yield compressor.compress(b"".join(pending)) + compressor.flush()
+
+    def clear(self, session_id: str):
+        """Delete every stored segment of a session"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            shutil.rmtree(self._session_dir(session_id), ignore_errors=True)
+
+    def close(self):
+        """Forget the cached segment counts (no file handles are kept open)"""
+        with self._lock:
+            self._sessions.clear()
+
+if __name__ == "__main__":
+    # Usage: python conversation_store.py <session_id> [--gzip] > export.ndjson[.gz]
+    if len(sys.argv) < 2:
+        sys.exit("usage: conversation_store.py <session_id> [--gzip]")
+    store = ConversationStore(os.environ.get("CHATBOT_STORE_DIR", "conversations"))
+    for chunk in store.export_ndjson(sys.argv[1], compress="--gzip" in sys.argv[2:]):
+        sys.stdout.buffer.write(chunk)
@@ -0,0 +1,235 @@
+import streamlit as st
+from typing import Union
+import plotly.graph_objects as go
+
+from ollama_client import OllamaClient
+from ollama_pool import OllamaPool
+from analytics import AnalyticsAggregator
+from metrics import TurnMetrics
+
+# Charts and the analytics dashboard, imported by chatbot.py only once something here
+# is shown so plotly stays out of cold start and plain chat reruns
+
+def cached_figure(name: str, build):
+    """Return the cached figure for ``name`` unless analytics changed since it was built
+
+    The aggregator itself is part of the check: a reset replaces it with a new
+    one whose version starts again from 0.
+    """
+    analytics = st.session_state.analytics
+    cached = st.session_state.figure_cache.get(name)
+    if cached is None or cached[0] is not analytics or cached[1] != analytics.version:
+        cached = (analytics, analytics.version, build(analytics))
+        st.session_state.figure_cache[name] = cached
+    return cached[2]
+
+def build_sentiment_pie(analytics: AnalyticsAggregator) -> go.Figure:
+    sentiment_data = analytics.sentiments
+    fig_sentiment = go.Figure(data=[go.Pie(
+        labels=list(sentiment_data.keys()),
+        values=list(sentiment_data.values()),
+        hole=0.4,
+        marker=dict(colors=['#90EE90', '#FFB6C6', '#D3D3D3'])
+    )])
+    fig_sentiment.update_layout(
+        height=250,
+        margin=dict(l=0, r=0, t=30, b=0),
+        showlegend=True,
+        legend=dict(font=dict(size=9))
+    )
+    return fig_sentiment
+
+def build_intent_bar(analytics: AnalyticsAggregator) -> go.Figure:
+    intent_items = analytics.top_intents(5)
+    fig_intent = go.Figure(data=[go.Bar(
+        x=[count for _, count in intent_items],
+        y=[intent for intent, _ in intent_items],
+        orientation='h',
+        marker=dict(color='#4CAF50')
+    )])
+    fig_intent.update_layout(
+        height=200,
+        margin=dict(l=0, r=0, t=0, b=0),
+        xaxis_title="",
+        yaxis_title=""
+    )
+    return fig_intent
+
+@st.cache_resource
+def build_capabilities_radar() -> go.Figure:
+    """Static chart, built once per process"""
+    # Pentagonal Radar Chart for AI capabilities
+    capabilities = {
+        'NLP Understanding': 85,
+        'Sentiment Analysis': 80,
+        'Response Quality': 90,
+        'Context Awareness': 75,
+        'Learning Ability': 70
+    }
+    
+    fig_radar = go.Figure()
+    fig_radar.add_trace(go.Scatterpolar(
+        r=list(capabilities.values()),
+        theta=list(capabilities.keys()),
+        fill='toself',
+        fillcolor='rgba(76, 175, 80, 0.3)',
+        line=dict(color='#4CAF50', width=2),
+        name='Current Performance'
+    ))
+    
+    fig_radar.update_layout(
+        polar=dict(
+            radialaxis=dict(
+                visible=True,
+                range=[0, 100],
+                tickfont=dict(size=9)
+            )
+        ),
+        showlegend=False,
+        height=300,
+        margin=dict(l=40, r=40, t=40, b=40)
+    )
+    return fig_radar
+
+def build_message_flow(analytics: AnalyticsAggregator) -> go.Figure:
+    # Simulate conversation flow over the recent window
+    message_counts = list(range(1, len(analytics.recent_sentiments) + 1))
+    timestamps = [f"Msg {i}" for i in message_counts]
+    
+    fig_flow = go.Figure()
+    fig_flow.add_trace(go.Scatter(
+        x=timestamps,
+        y=message_counts,
+        mode='lines+markers',
+        line=dict(color='#2196F3', width=2),
+        marker=dict(size=8),
+        name='Messages'
+    ))
+    
+    fig_flow.update_layout(
+        title="Message Flow",
+        xaxis_title="",
+        yaxis_title="Count",
+        height=250,
+        margin=dict(l=40, r=20, t=40, b=20)
+    )
+    return fig_flow
+
+def build_sentiment_trend(analytics: AnalyticsAggregator) -> go.Figure:
+    sentiment_scores = analytics.sentiment_trend()
+    
+    fig_sentiment_trend = go.Figure()
+    fig_sentiment_trend.add_trace(go.Scatter(
+        x=list(range(1, len(sentiment_scores) + 1)),
+        y=sentiment_scores,
+        mode='lines+markers',
+        line=dict(color='#FF9800', width=2),
+        marker=dict(size=8),
+        fill='tozeroy',
+        fillcolor='rgba(255, 152, 0, 0.2)'
+    ))
+    
+    fig_sentiment_trend.update_layout(
+        title="Sentiment Trend",
+        xaxis_title="Message #",
+        yaxis_title="Sentiment",
+        yaxis=dict(tickvals=[-1, 0, 1], ticktext=['Negative', 'Neutral', 'Positive']),
+        height=250,
+        margin=dict(l=40, r=20, t=40, b=20)
+    )
+    return fig_sentiment_trend
+
+# Advanced Analytics Dashboard Section
+@st.fragment
+def render_dashboard(turn_metrics: TurnMetrics, client: Union[OllamaClient, OllamaPool]):
+    st.markdown("---")
+    st.markdown("## 📈 Advanced Analytics Dashboard")
+    
+    dash_col1, dash_col2, dash_col3 = st.columns(3)
+    
+    with dash_col1:
+        st.markdown("### 🎯 AI Capabilities Radar")
+        st.plotly_chart(build_capabilities_radar(), use_container_width=True)
+    
+    with dash_col2:
+        st.markdown("### 🚧 Challenges & Solutions")
+        
+        challenges = {
+            "Complex Queries": "Advanced NLP (GPT/BERT)",
+            "Multiple Intents": "Intent prioritization",
+            "Real-time Optimization": "WebSockets & Redis",
+            "Ethical AI": "Bias detection techniques"
+        }
+        
+        for challenge, solution in challenges.items():
+            with st.expander(f"⚠️ {challenge}"):
+                st.success(f"✅ **Solution**: {solution}")
+        
+        st.markdown("---")
+        st.markdown("**📊 Performance Metrics**")
+        summary = turn_metrics.summary()
+        if "total" in summary:
+            def fmt(value, unit="s"):
+                return "–" if value is None else f"{value:.2f}{unit}"
+            
+            st.metric("Time to First Token (p50)", fmt(summary["ttft"][0.5]) if "ttft" in summary else "–")
+            st.metric("Decode Speed (p50)", fmt(summary["decode_tps"][0.5], " tok/s"))
+            st.markdown(
+                "| Span | p50 | p95 | p99 |\n|---|---|---|---|\n" + "\n".join(
+                    f"| {name} | {fmt(q[0.5])} | {fmt(q[0.95])} | {fmt(q[0.99])} |"
+                    for name, q in summary.items() if not name.endswith("_tps")
+                )
+            )
+            if turn_metrics.cache_hits:
+                st.caption(f"{turn_metrics.cache_hits} cached replies are left out of the spans")
+            st.download_button(
+                label="📤 Prometheus metrics",
+                data=turn_metrics.to_prometheus(),
+                file_name="chatbot_metrics.prom",
+                mime="text/plain"
+            )
+        else:
+            st.info("Start chatting to see metrics")
+        
+        if isinstance(client, OllamaPool):
+            st.markdown("**🖧 Ollama Backends**")
+            st.markdown(
+                "| Backend | Up | Outstanding | Requests | Failures |\n|---|---|---|---|---|\n" + "\n".join(
+                    f"| {url} | {'✅' if b['available'] else '❌'} | {b['outstanding']} | {b['requests']} | {b['failures']} |"
+                    for url, b in client.stats().items()
+                )
+            )
+    
+    with dash_col3:
+        st.markdown("### 🚀 Future Enhancements")
+        
+        future_features = [
+            "🎤 Voice-enabled chatbot with speech-to-text",
+            "🌍 Multilingual support (50+ languages)",
+            "🔮 AI predictive suggestions",
+            "📱 Mobile app integration",
+            "🤝 Multi-platform deployment"
+        ]
+        
+        st.markdown("**Planned Features:**")
+        for feature in future_features:
+            st.markdown(f"- {feature}")
+        
+        st.markdown("---")
+        st.markdown("**🎨 Integration Options**")
+        integrations = ["WhatsApp", "Slack", "Telegram", "Discord", "MS Teams"]
+        for integration in integrations:
+            st.checkbox(integration, key=f"int_{integration}", disabled=True, value=False)
+
+# Response Quality Trend (if multiple messages)
+@st.fragment
+def render_flow_analysis():
+    st.markdown("### 📉 Conversation Flow Analysis")
+    
+    flow_col1, flow_col2 = st.columns(2)
+    
+    with flow_col1:
+        st.plotly_chart(cached_figure("message_flow", build_message_flow), use_container_width=True)
+    
+    with flow_col2:
+        st.plotly_chart(cached_figure("sentiment_trend", build_sentiment_trend), use_container_width=True)
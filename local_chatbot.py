@@ -0,0 +1,155 @@
+import time
+from typing import Dict, Iterator, List, Optional, Union
+
+from context_window import DEFAULT_MAX_TOKENS
+from ollama_client import OllamaClient
+from ollama_pool import OllamaPool
+from response_cache import ResponseCache
+from text_analysis import NEGATIVE, analyze
+
+# Counters and nanosecond durations Ollama reports on the final chunk
+OLLAMA_STAT_FIELDS = (
+    "load_duration",
+    "prompt_eval_count",
+    "prompt_eval_duration",
+    "eval_count",
+    "eval_duration",
+    "total_duration",
+)
+
+
+class LocalChatbot:
+    def __init__(self, model_name="llama3.2:latest", client: Optional[Union[OllamaClient, OllamaPool]] = None,
+                 cache: Optional[ResponseCache] = None, num_predict: int = 800,
+                 keep_alive: Optional[Union[str, int]] = None, context_tokens: int = DEFAULT_MAX_TOKENS):
+        self.model = model_name
+        self.client = client or OllamaClient()
+        self.cache = cache
+        # Ollama caps generation with num_predict; keep_alive (e.g. "30m", -1 = forever) keeps
+        # the model loaded between turns instead of Ollama's 5 minute default
+        self.num_predict = num_predict
+        self.keep_alive = keep_alive
+        # Prompt budget for ContextWindow. Ollama silently truncates prompts longer than num_ctx
+        # (2048 by default), so the context is sized for the budget plus the reply, rounded up
+        self.context_tokens = context_tokens
+        self.num_ctx = -(-(context_tokens + num_predict) // 1024) * 1024
+        self.base_url = self.client.base_url
+        self.system_prompt = """You are an advanced AI assistant with the following capabilities:
+
+1. **Conversational Understanding**: You understand context, intent, and can recognize important information.
+2. **Sentiment Awareness**: You detect and respond appropriately to the user's emotional state.
+3. **Helpful & Adaptive**: You learn from conversations and provide personalized responses.
+4. **Professional**: You maintain a friendly yet professional tone.
+
+Guidelines:
+- Be concise but thorough
+- Show empathy when detecting negative sentiment
+- Provide structured responses when explaining complex topics
+- Ask clarifying questions when needed
+- Remember context from previous messages"""
+    
+    def turn_notes(self, sentiment: str) -> List[str]:
+        """Per-turn system notes appended after the history (kept out of the cached prefix)"""
+        notes = []
+        if sentiment == NEGATIVE:
+            notes.append("Note: The user seems to have negative sentiment. Respond with empathy and helpfulness.")
+        return notes
+    
+    def build_payload(self, messages: List[Dict], temperature: float = 0.7) -> Dict:
+        """Build the Ollama chat payload shared by the blocking and streaming calls"""
+        return self.with_load_options({
+            "model": self.model,
+            "messages": messages,
+            "options": {
+                "temperature": temperature,
+                "top_p": 0.9,
+                "num_predict": self.num_predict
+            }
+        })
+    
+    def with_load_options(self, payload: Dict) -> Dict:
+        """Add the settings every request must share: a different num_ctx makes Ollama reload the model"""
+        payload.setdefault("options", {})["num_ctx"] = self.num_ctx
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        return payload
+    
+    def _cache_key(self, payload: Dict) -> Optional[str]:
+        """Cache key for a payload, or None when caching is off or bypassed"""
+        if self.cache is None or not self.cache.cacheable(payload["options"]):
+            return None
+        return ResponseCache.make_key(self.model, payload["messages"], payload["options"])
+    
+    def generate_response(self, messages: List[Dict], temperature: float = 0.7,
+                          session_id: Optional[str] = None) -> str:
+        """Generate response using Ollama chat API; raises OllamaError on failure
+
+        ``session_id`` keeps a conversation on one backend when the client is an OllamaPool.
+        """
+        payload = self.build_payload(messages, temperature)
+        key = self._cache_key(payload)
+        if key and (cached := self.cache.get(key)) is not None:
+            return cached
+        
+        content = self.client.chat(payload, session_id=session_id)["message"]["content"]
+        if key:
+            self.cache.put(key, content)
+        return content
+    
+    def stream_response(self, messages: List[Dict], temperature: float = 0.7,
+                        stats: Optional[Dict] = None, session_id: Optional[str] = None) -> Iterator[str]:
+        """Stream response tokens from Ollama's NDJSON chat API as they are generated
+
+        When ``stats`` is given it is filled with connect/ttft/total seconds and
+        Ollama's prompt_eval/eval counts and durations from the final chunk.
+        """
+        stats = {} if stats is None else stats
+        started = time.perf_counter()
+        payload = self.build_payload(messages, temperature)
+        key = self._cache_key(payload)
+        if key and (cached := self.cache.get(key)) is not None:
+            stats["cached"] = True
+            stats["ttft"] = stats["total"] = time.perf_counter() - started
+            yield cached
+            return
+        
+        tokens = []
+        for chunk in self.client.chat_stream(payload, timings=stats, session_id=session_id):
+            token = chunk.get("message", {}).get("content", "")
+            if token:
+                if not tokens:
+                    stats["ttft"] = time.perf_counter() - started
+                tokens.append(token)
+                yield token
+            if chunk.get("done"):
+                for field in OLLAMA_STAT_FIELDS:
+                    if field in chunk:
+                        stats[field] = chunk[field]
+        stats["total"] = time.perf_counter() - started
+        
+        # Only complete replies are cached; an interrupted stream raises before this point
+        if key:
+            self.cache.put(key, "".join(tokens))
+    
+    def summarize(self, previous_summary: str, messages: List[Dict],
+                  session_id: Optional[str] = None) -> str:
+        """Fold older turns into a running conversation summary
+
+        ``session_id`` sends the request to the conversation's own backend when the client is an OllamaPool.
+        """
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        if previous_summary:
+            transcript = f"Summary so far:\n{previous_summary}\n\nNew messages:\n{transcript}"
+        payload = {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "Summarize the conversation briefly. Keep names, facts, decisions and open questions."},
+                {"role": "user", "content": transcript}
+            ],
+            "options": {"temperature": 0.3, "num_predict": 200}
+        }
+        return self.client.chat(self.with_load_options(payload), session_id=session_id)["message"]["content"]
+    
+    def detect_intent(self, user_message: str) -> str:
+        """Detect user intent from message"""
+        return analyze(user_message)["intent"]
@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Per-turn spans, in the order they happen. "queue" is the wait for an AsyncChatEngine
+# slot, so only the voice server and batch runner report it; the Streamlit app calls
+# Ollama directly
+SPANS = ("analysis", "memory", "prompt", "queue", "connect", "ttft", "total")
+
+
+class Histogram:
+    """Sliding-window sample store with exact quantiles plus lifetime sum/count"""
+
+    def __init__(self, window: int = 2048):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TurnMetrics:
+    """Process-wide latency and throughput metrics for chat turns
+
+    Span timings are in seconds. Ollama's own counters from the final stream
+    chunk (``prompt_eval_count``, ``eval_count`` and their durations in ns)
+    are turned into prefill and decode tokens/sec so a slow turn can be
+    attributed to prefill, decode or the network.
+    """
+
+    def __init__(self, window: int = 2048):
+        self._lock = threading.Lock()
+        self.spans: Dict[str, Histogram] = {name: Histogram(window) for name in SPANS}
+        self.prefill_tps = Histogram(window)
+        self.decode_tps = Histogram(window)
+        self.tokens = {"prompt": 0, "completion": 0}
+        self.turns = 0
+        self.errors = 0
+        self.cache_hits = 0
+
+    def observe_span(self, name: str, seconds: float):
+        with self._lock:
+            self.spans.setdefault(name, Histogram()).observe(seconds)
+
+    def record_turn(self, stats: Dict):
+        """Record the stats dict filled in by LocalChatbot.stream_response
+
+        A reply served from the response cache is only counted: its near-zero
+        timings would drag down the latency quantiles of real generations.
+        """
+        with self._lock:
+            self.turns += 1
+            if stats.get("cached"):
+                self.cache_hits += 1
+                return
+            for name in ("connect", "ttft", "total"):
+                if name in stats:
+                    self.spans[name].observe(stats[name])
+
+            prompt_tokens = stats.get("prompt_eval_count", 0)
+            completion_tokens = stats.get("eval_count", 0)
+            self.tokens["prompt"] += prompt_tokens
+            self.tokens["completion"] += completion_tokens
+            if prompt_tokens and stats.get("prompt_eval_duration"):
+                self.prefill_tps.observe(prompt_tokens / (stats["prompt_eval_duration"] / 1e9))
+            if completion_tokens and stats.get("eval_duration"):
+                self.decode_tps.observe(completion_tokens / (stats["eval_duration"] / 1e9))
+
+    def record_error(self):
+        with self._lock:
+            self.errors += 1
+
+    def summary(self) -> Dict:
+        """Quantiles per span plus token throughput, for display"""
+        with self._lock:
+            result = {
+                name: {q: hist.quantile(q) for q in QUANTILES}
+                for name, hist in self.spans.items() if hist.count
+            }
+            result["decode_tps"] = {q: self.decode_tps.quantile(q) for q in QUANTILES}
+            result["prefill_tps"] = {q: self.prefill_tps.quantile(q) for q in QUANTILES}
+            return result
+
+    def to_prometheus(self, prefix: str = "chatbot") -> str:
+        """Render all metrics in the Prometheus text exposition format"""
+        lines: List[str] = []
+
+        def summary(name: str, help_text: str, series: Dict[str, Histogram], label: str):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} summary")
+            for key, hist in series.items():
+                if not hist.count:
+                    continue
+                base = f'{label}="{key}",' if label else ""
+                for q in QUANTILES:
+                    lines.append(f'{prefix}_{name}{{{base}quantile="{q}"}} {hist.quantile(q):.6f}')
+                labels = f'{{{label}="{key}"}}' if label else ""
+                lines.append(f"{prefix}_{name}_sum{labels} {hist.sum:.6f}")
+                lines.append(f"{prefix}_{name}_count{labels} {hist.count}")
+
+        with self._lock:
+            summary("turn_span_seconds", "Per-turn latency by span.", self.spans, "span")
+            summary("prefill_tokens_per_second", "Prompt evaluation throughput reported by Ollama.",
+                    {"": self.prefill_tps}, "")
+            summary("decode_tokens_per_second", "Generation throughput reported by Ollama.",
+                    {"": self.decode_tps}, "")
+
+            lines.append(f"# HELP {prefix}_tokens_total Tokens processed by Ollama.")
+            lines.append(f"# TYPE {prefix}_tokens_total counter")
+            for kind, value in self.tokens.items():
+                lines.append(f'{prefix}_tokens_total{{kind="{kind}"}} {value}')
+            for name, value, help_text in (
+                ("turns_total", self.turns, "Completed chat turns."),
+                ("turn_errors_total", self.errors, "Chat turns that failed."),
+                ("cache_hits_total", self.cache_hits, "Turns answered from the response cache (not in the spans)."),
+            ):
+                lines.append(f"# HELP {prefix}_{name} {help_text}")
+                lines.append(f"# TYPE {prefix}_{name} counter")
+                lines.append(f"{prefix}_{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path: str):
+        """Write the exposition atomically, e.g. for node_exporter's textfile collector"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as handle:
+            handle.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+
+class SectionTimer:
+    """Splits one script run into consecutive sections
+
+    ``mark(name)`` closes the section that ends at that point, so timing a run
+    needs one call after each section rather than wrapping them.
+    """
+
+    def __init__(self, started: Optional[float] = None):
+        self.last = time.perf_counter() if started is None else started
+        self.sections: Dict[str, float] = {}
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.sections[name] = self.sections.get(name, 0.0) + now - self.last
+        self.last = now
+
+
+class RunProfile:
+    """Process-wide per-section wall time of Streamlit script runs
+
+    The first run in a process is kept apart from the rest: it pays for cold
+    imports and building cached resources, while later reruns show the steady
+    per-interaction cost.
+    """
+
+    def __init__(self, window: int = 512):
+        self._lock = threading.Lock()
+        self.window = window
+        self.first_run: Dict[str, float] = {}
+        self.sections: Dict[str, Histogram] = {}
+        self.runs = 0
+
+    def record_run(self, sections: Dict[str, float]):
+        with self._lock:
+            if self.runs == 0:
+                self.first_run = dict(sections)
+            else:
+                for name, seconds in sections.items():
+                    self.sections.setdefault(name, Histogram(self.window)).observe(seconds)
+            self.runs += 1
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per section: first-run seconds and rerun quantiles"""
+        with self._lock:
+            names = list(self.first_run) + [name for name in self.sections if name not in self.first_run]
+            return {
+                name: {
+                    "first": self.first_run.get(name),
+                    **{q: self.sections[name].quantile(q) if name in self.sections else None for q in QUANTILES},
+                }
+                for name in names
+            }
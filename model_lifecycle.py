@@ -0,0 +1,148 @@
+import threading
+import time
+from typing import Dict, List, Optional
+
+from local_chatbot import LocalChatbot
+from ollama_client import OllamaClient, OllamaError
+from ollama_pool import OllamaPool
+
+
+class ModelLifecycle:
+    """Loads the chat model on every Ollama backend before the first turn and keeps it resident
+
+    Ollama loads a model on its first request and unloads it after
+    ``keep_alive`` (5 minutes by default), so the first turn after startup or
+    a quiet spell pays the full load time. ``warm_up`` sends a one-token
+    request carrying the chatbot's ``keep_alive`` to each backend; with
+    ``prefill_system_prompt`` that request is the system prompt, so its KV
+    cache is also filled and reused as the shared prefix of the next turn.
+    ``status`` reports, per backend, whether the model is loaded (from
+    /api/ps) and how long the last warm-up took to load it. After
+    ``monitor``, a background thread keeps that report fresh and ``status``
+    and ``ensure_warm`` only read it, so a UI thread never waits on Ollama.
+    """
+
+    def __init__(self, chatbot: LocalChatbot, prefill_system_prompt: bool = True, status_ttl: float = 5.0):
+        self.chatbot = chatbot
+        self.prefill_system_prompt = prefill_system_prompt
+        self.status_ttl = status_ttl
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._monitor: Optional[threading.Thread] = None
+        self._refresh = threading.Event()
+        self._warmups: Dict[str, Dict] = {}
+        self._status: Optional[List[Dict]] = None
+        self._status_at = 0.0
+
+    def _clients(self) -> List[OllamaClient]:
+        client = self.chatbot.client
+        if isinstance(client, OllamaPool):
+            return [backend.client for backend in client.backends]
+        return [client]
+
+    def warm_payload(self) -> Dict:
+        messages = []
+        if self.prefill_system_prompt:
+            messages = [{"role": "system", "content": self.chatbot.system_prompt}]
+        payload = {"model": self.chatbot.model, "messages": messages, "options": {"num_predict": 1}}
+        return self.chatbot.with_load_options(payload)
+
+    def warm_up(self) -> List[Dict]:
+        """Load the model on every backend now; returns one result per backend"""
+        results = []
+        for client in self._clients():
+            started = time.perf_counter()
+            result = {"url": client.base_url, "warmed_at": time.time()}
+            try:
+                body = client.chat(self.warm_payload())
+            except OllamaError as e:
+                result["error"] = str(e)
+            else:
+                result["load_seconds"] = body.get("load_duration", 0) / 1e9
+            result["seconds"] = time.perf_counter() - started
+            results.append(result)
+            with self._lock:
+                self._warmups[client.base_url] = result
+                self._status_at = 0.0
+            self._refresh.set()
+        return results
+
+    def start(self) -> bool:
+        """Warm up in a background thread unless one is already running"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self.warm_up, name="model-warmup", daemon=True)
+            self._thread.start()
+        return True
+
+    def warming(self) -> bool:
+        with self._lock:
+            return self._thread is not None and self._thread.is_alive()
+
+    def ensure_warm(self) -> bool:
+        """Start a warm-up if the model is not loaded on some backend, e.g. when a new session opens"""
+        if self.warming():
+            return False
+        if all(entry["loaded"] for entry in self.status()):
+            return False
+        return self.start()
+
+    def monitor(self) -> bool:
+        """Refresh ``status`` in a background thread every ``status_ttl`` seconds (and after each warm-up)"""
+        with self._lock:
+            if self._monitor is not None:
+                return False
+            self._monitor = threading.Thread(target=self._monitor_loop, name="model-status", daemon=True)
+            self._monitor.start()
+        return True
+
+    def _monitor_loop(self):
+        while True:
+            self._refresh.clear()
+            self.refresh_status()
+            self._refresh.wait(self.status_ttl)
+
+    def status(self) -> List[Dict]:
+        """Per backend: whether the model is loaded, when Ollama will unload it, and the last warm-up
+
+        While monitored this is the background thread's latest report (empty
+        until its first one); otherwise /api/ps is queried at most once every
+        ``status_ttl`` seconds.
+        """
+        with self._lock:
+            if self._monitor is not None:
+                return self._status or []
+            if self._status is not None and time.monotonic() - self._status_at < self.status_ttl:
+                return self._status
+        return self.refresh_status()
+
+    def refresh_status(self) -> List[Dict]:
+        """Query /api/ps on every backend now"""
+        entries = []
+        for client in self._clients():
+            entry = {"url": client.base_url, "loaded": False}
+            try:
+                models = client.ps().get("models", [])
+            except OllamaError as e:
+                entry["error"] = str(e)
+            else:
+                for model in models:
+                    if self.chatbot.model in (model.get("name"), model.get("model")):
+                        entry["loaded"] = True
+                        entry["expires_at"] = model.get("expires_at")
+                        entry["size_vram"] = model.get("size_vram")
+                        break
+            with self._lock:
+                warmup = self._warmups.get(client.base_url)
+            if warmup is not None:
+                entry["load_seconds"] = warmup.get("load_seconds")
+                entry["warmed_at"] = warmup["warmed_at"]
+                if "error" in warmup:
+                    entry["warmup_error"] = warmup["error"]
+            entries.append(entry)
+
+        with self._lock:
+            self._status = entries
+            self._status_at = time.monotonic()
+        return entries
@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+
+from vosk import Model, KaldiRecognizer
+
+
+class RecognizerPool:
+    """Reusable KaldiRecognizers for one (model, sample rate) pair
+
+    Recognizers are reset and kept after each utterance instead of being
+    rebuilt. When none is idle a new one is built rather than waiting, so the
+    pool never adds queueing delay; ``size`` only caps how many are kept idle.
+    """
+
+    def __init__(self, model, sample_rate, size=4, recognizer_factory=KaldiRecognizer):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.recognizer_factory = recognizer_factory
+        self.size = size
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self.in_use = 0
+        self.hits = 0
+        self.misses = 0
+        self.acquire_seconds = 0.0
+        for _ in range(size):
+            self._idle.append(recognizer_factory(model, sample_rate))
+
+    def acquire(self):
+        started = time.perf_counter()
+        with self._lock:
+            recognizer = self._idle.popleft() if self._idle else None
+            self.in_use += 1
+            if recognizer is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if recognizer is None:
+            recognizer = self.recognizer_factory(self.model, self.sample_rate)
+        with self._lock:
+            self.acquire_seconds += time.perf_counter() - started
+        return recognizer
+
+    def release(self, recognizer):
+        """Reset a recognizer after its final result and keep it for the next utterance"""
+        recognizer.Reset()
+        with self._lock:
+            self.in_use -= 1
+            if len(self._idle) < self.size:
+                self._idle.append(recognizer)
+
+    def discard(self, recognizer):
+        """Drop a recognizer that may still be decoding (e.g. a cancelled stream)"""
+        with self._lock:
+            self.in_use -= 1
+
+    def stats(self):
+        with self._lock:
+            acquires = self.hits + self.misses
+            return {
+                "sampleRate": self.sample_rate,
+                "idle": len(self._idle),
+                "inUse": self.in_use,
+                "hits": self.hits,
+                "misses": self.misses,
+                "avgAcquireMs": (self.acquire_seconds / acquires * 1000) if acquires else 0.0,
+            }
+
+
+class ModelRegistry:
+    """Vosk models loaded once at startup, with a recognizer pool per sample rate
+
+    Configured through ``models`` in voice_config.json::
+
+        "models": {
+            "en-16k": {"path": "...", "sampleRates": [16000]},
+            "en-8k": {"path": "...", "sampleRates": [8000]}
+        },
+        "defaultModel": "en-16k"
+
+    Older configs with only ``voskModelPath``/``sampleRate`` register a single
+    model named ``default``. The factories can be swapped for stand-ins (see
+    benchmarks/fakes.py) to run the server without real models.
+    """
+
+    def __init__(self, config, model_factory=Model, recognizer_factory=KaldiRecognizer):
+        models = config.get("models")
+        if not models:
+            model_path = config.get("voskModelPath")
+            if not model_path:
+                raise RuntimeError("voskModelPath missing in voice_config.json")
+            models = {"default": {"path": model_path, "sampleRates": [config.get("sampleRate", 16000)]}}
+
+        pool_size = int(config.get("recognizerPoolSize", 4))
+        self.default_name = config.get("defaultModel") or next(iter(models))
+        self.pools = {}
+        self.default_rates = {}
+        for name, entry in models.items():
+            model = model_factory(entry["path"])
+            rates = [int(rate) for rate in entry.get("sampleRates", [config.get("sampleRate", 16000)])]
+            self.default_rates[name] = rates[0]
+            for rate in rates:
+                self.pools[(name, rate)] = RecognizerPool(model, rate, size=pool_size, recognizer_factory=recognizer_factory)
+
+    def pool(self, name=None, sample_rate=None):
+        name = name or self.default_name
+        if name not in self.default_rates:
+            raise KeyError(f"Unknown model '{name}'")
+        sample_rate = int(sample_rate or self.default_rates[name])
+        pool = self.pools.get((name, sample_rate))
+        if pool is None:
+            raise KeyError(f"Model '{name}' is not configured for {sample_rate} Hz")
+        return pool
+
+    def pool_for_input(self, name=None, sample_rate=None):
+        """Pool for audio arriving at ``sample_rate``: the model's own pool at that rate if
+        configured, else its default rate, which the audio is then resampled to"""
+        name = name or self.default_name
+        if name not in self.default_rates:
+            raise KeyError(f"Unknown model '{name}'")
+        pool = self.pools.get((name, int(sample_rate or 0)))
+        return pool or self.pools[(name, self.default_rates[name])]
+
+    def describe(self):
+        return {name: sorted(rate for (model, rate) in self.pools if model == name) for name in self.default_rates}
+
+    def stats(self):
+        return {f"{name}@{rate}": pool.stats() for (name, rate), pool in self.pools.items()}
@@ -0,0 +1,186 @@
+import json
+import random
+import time
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+
+DEFAULT_BASE_URL = "http://localhost:11434"
+
+# Status codes worth retrying: the server is up but temporarily unable to answer
+RETRYABLE_STATUS_CODES = {500, 502, 503, 504}
+
+
+class OllamaError(Exception):
+    """Base class for all Ollama client failures"""
+
+
+class OllamaConnectionError(OllamaError):
+    """Ollama could not be reached (refused, reset or connect timeout)"""
+
+
+class OllamaTimeoutError(OllamaError):
+    """Ollama accepted the connection but did not answer within the read timeout"""
+
+
+class OllamaHTTPError(OllamaError):
+    """Ollama answered with a non-200 status or an in-band error"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def is_read_timeout(error: requests.exceptions.RequestException) -> bool:
+    """True for a read timeout, including one requests re-raised as ConnectionError
+
+    While a body is being read (``iter_lines``, ``iter_content`` or a
+    non-streaming response), requests wraps urllib3's ReadTimeoutError in a
+    plain ConnectionError instead of raising ReadTimeout.
+    """
+    if isinstance(error, requests.exceptions.Timeout):
+        return not isinstance(error, requests.exceptions.ConnectTimeout)
+    return any(isinstance(arg, ReadTimeoutError) for arg in error.args)
+
+
+class OllamaClient:
+    """Keep-alive, pooled client for the Ollama HTTP API with bounded retries"""
+
+    def __init__(
+        self,
+        base_url: str = DEFAULT_BASE_URL,
+        connect_timeout: float = 3.05,
+        read_timeout: float = 60.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.25,
+        backoff_max: float = 4.0,
+        pool_size: int = 10,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        # One session per client so TCP connections are reused across turns
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def _backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for the given retry attempt"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _post(self, path: str, payload: Dict, stream: bool = False) -> requests.Response:
+        """POST with retries on connection errors and 5xx responses"""
+        url = f"{self.base_url}{path}"
+        attempt = 0
+
+        while True:
+            try:
+                response = self.session.post(url, json=payload, stream=stream, timeout=self.timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout) as e:
+                if is_read_timeout(e):
+                    # Generation may already be running server-side; retrying would double the cost
+                    raise OllamaTimeoutError(f"Ollama did not respond within {self.timeout[1]}s") from e
+                if attempt >= self.max_retries:
+                    raise OllamaConnectionError(
+                        f"Could not connect to Ollama. Make sure it's running on {self.base_url}"
+                    ) from e
+            else:
+                if response.status_code == 200:
+                    return response
+                if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    message = self._error_message(response)
+                    response.close()
+                    raise OllamaHTTPError(message, status_code=response.status_code)
+                response.close()
+
+            time.sleep(self._backoff(attempt))
+            attempt += 1
+
+    @staticmethod
+    def _error_message(response: requests.Response) -> str:
+        """Extract Ollama's error text from a failed response"""
+        try:
+            detail = response.json().get("error", "")
+        except ValueError:
+            detail = ""
+        message = f"Ollama returned status {response.status_code}"
+        return f"{message}: {detail}" if detail else message
+
+    def ps(self, timeout: float = 2.0) -> Dict:
+        """Models currently loaded in memory (/api/ps), without retries"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/ps", timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            raise OllamaConnectionError(f"Could not query loaded models on {self.base_url}") from e
+        with response:
+            if response.status_code != 200:
+                raise OllamaHTTPError(self._error_message(response), status_code=response.status_code)
+            return response.json()
+
+    def healthy(self, timeout: float = 2.0) -> bool:
+        """Cheap liveness probe against /api/version, without retries"""
+        try:
+            response = self.session.get(f"{self.base_url}/api/version", timeout=timeout)
+        except requests.exceptions.RequestException:
+            return False
+        response.close()
+        return response.status_code == 200
+
+    def _post_json(self, path: str, payload: Dict) -> Dict:
+        response = self._post(path, payload)
+        try:
+            return response.json()
+        except ValueError as e:
+            raise OllamaHTTPError("Ollama returned an invalid JSON body", status_code=200) from e
+
+    def chat(self, payload: Dict, session_id: Optional[str] = None) -> Dict:
+        """Send a non-streaming /api/chat request and return the decoded body
+
+        ``session_id`` is accepted so a single client and an OllamaPool are
+        interchangeable; only the pool uses it.
+        """
+        return self._post_json("/api/chat", dict(payload, stream=False))
+
+    def embed(self, payload: Dict, session_id: Optional[str] = None) -> Dict:
+        """Send an /api/embed request (``{"model", "input": [texts]}``) and return the decoded body"""
+        return self._post_json("/api/embed", payload)
+
+    def chat_stream(self, payload: Dict, timings: Optional[Dict] = None,
+                    session_id: Optional[str] = None) -> Iterator[Dict]:
+        """Send a streaming /api/chat request and yield each NDJSON chunk
+
+        If ``timings`` is given, the seconds until response headers arrived
+        (connection plus retries) are stored under ``"connect"``.
+        """
+        started = time.perf_counter()
+        response = self._post("/api/chat", dict(payload, stream=True), stream=True)
+        if timings is not None:
+            timings["connect"] = time.perf_counter() - started
+        with response:
+            try:
+                for line in response.iter_lines():
+                    if not line:
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except ValueError as e:
+                        raise OllamaHTTPError("Ollama sent an invalid stream line", status_code=response.status_code) from e
+                    if "error" in chunk:
+                        raise OllamaHTTPError(chunk["error"], status_code=response.status_code)
+                    yield chunk
+                    if chunk.get("done"):
+                        return
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout) as e:
+                if is_read_timeout(e):
+                    raise OllamaTimeoutError(f"Ollama stalled for more than {self.timeout[1]}s") from e
+                raise OllamaConnectionError("Connection to Ollama was lost mid-response") from e
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,208 @@
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional
+
+from ollama_client import (
+    OllamaClient,
+    OllamaConnectionError,
+    OllamaError,
+    OllamaHTTPError,
+    OllamaTimeoutError,
+    RETRYABLE_STATUS_CODES,
+)
+
+
+class OllamaBackend:
+    """One Ollama instance in a pool, with its load and health state"""
+
+    def __init__(self, client: OllamaClient):
+        self.client = client
+        self.url = client.base_url
+        self.outstanding = 0
+        self.healthy = True
+        self.down_until = 0.0
+        self.requests = 0
+        self.failures = 0
+        self.last_error = ""
+
+    def available(self, now: float) -> bool:
+        return self.healthy and now >= self.down_until
+
+
+class OllamaPool:
+    """Drop-in replacement for OllamaClient that spreads chats over several Ollama instances
+
+    Each request goes to the available backend with the fewest outstanding
+    requests, except that a session sticks to the backend it last used while
+    that backend stays healthy, so its KV/prefix cache stays warm. A backend
+    that refuses a connection, times out or answers 5xx is taken out for
+    ``down_seconds`` and the request fails over to the next backend. Streams
+    only fail over before their first chunk; after that the error is raised.
+    A background thread probes every backend each ``health_interval`` seconds
+    and brings recovered ones back.
+    """
+
+    def __init__(
+        self,
+        base_urls: List[str],
+        health_interval: float = 10.0,
+        down_seconds: float = 30.0,
+        max_sessions: int = 10000,
+        **client_options,
+    ):
+        if not base_urls:
+            raise ValueError("OllamaPool needs at least one base URL")
+        # Fail over to another backend instead of retrying the same one
+        client_options.setdefault("max_retries", 0)
+        self.backends = [OllamaBackend(OllamaClient(url, **client_options)) for url in base_urls]
+        self.base_url = ", ".join(backend.url for backend in self.backends)
+        self.down_seconds = down_seconds
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, OllamaBackend]" = OrderedDict()
+        self._stop = threading.Event()
+        self._health_thread = None
+        if health_interval > 0:
+            self._health_thread = threading.Thread(
+                target=self._health_loop, args=(health_interval,), name="ollama-health", daemon=True
+            )
+            self._health_thread.start()
+
+    # ---- routing ----
+
+    def _acquire(self, session_id: Optional[str], tried: List[OllamaBackend]) -> OllamaBackend:
+        """Pick a backend, count the request against it and remember it for the session"""
+        now = time.monotonic()
+        with self._lock:
+            candidates = [b for b in self.backends if b not in tried and b.available(now)]
+            if not candidates:
+                # Everything looks down: still try the rest rather than fail without asking
+                candidates = [b for b in self.backends if b not in tried]
+            if not candidates:
+                raise OllamaConnectionError("No Ollama backend is available")
+
+            backend = self._sessions.get(session_id) if session_id else None
+            if backend not in candidates:
+                least = min(b.outstanding for b in candidates)
+                backend = random.choice([b for b in candidates if b.outstanding == least])
+            if session_id:
+                self._sessions[session_id] = backend
+                self._sessions.move_to_end(session_id)
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+
+            backend.outstanding += 1
+            backend.requests += 1
+            return backend
+
+    def _release(self, backend: OllamaBackend, error: Optional[OllamaError] = None):
+        with self._lock:
+            backend.outstanding -= 1
+            if error is None:
+                backend.healthy = True
+                return
+            backend.failures += 1
+            backend.last_error = str(error)
+            backend.down_until = time.monotonic() + self.down_seconds
+
+    @staticmethod
+    def _should_fail_over(error: OllamaError) -> bool:
+        if isinstance(error, (OllamaConnectionError, OllamaTimeoutError)):
+            return True
+        return isinstance(error, OllamaHTTPError) and error.status_code in RETRYABLE_STATUS_CODES
+
+    # ---- client API ----
+
+    def _call(self, method: str, payload: Dict, session_id: Optional[str]) -> Dict:
+        """Run a blocking client method on the chosen backend, failing over on backend errors"""
+        tried: List[OllamaBackend] = []
+        while True:
+            backend = self._acquire(session_id, tried)
+            tried.append(backend)
+            try:
+                result = getattr(backend.client, method)(payload)
+            except OllamaError as e:
+                if not self._should_fail_over(e):
+                    self._release(backend)
+                    raise
+                self._release(backend, e)
+                if len(tried) == len(self.backends):
+                    raise
+                continue
+            self._release(backend)
+            return result
+
+    def chat(self, payload: Dict, session_id: Optional[str] = None) -> Dict:
+        """Non-streaming /api/chat on the chosen backend"""
+        return self._call("chat", payload, session_id)
+
+    def embed(self, payload: Dict, session_id: Optional[str] = None) -> Dict:
+        """/api/embed on the least loaded backend (or the session's, when given)"""
+        return self._call("embed", payload, session_id)
+
+    def chat_stream(self, payload: Dict, timings: Optional[Dict] = None,
+                    session_id: Optional[str] = None) -> Iterator[Dict]:
+        """Streaming /api/chat; fails over until the first chunk arrives
+
+        ``timings["backend"]`` is set to the URL that served the stream.
+        """
+        tried: List[OllamaBackend] = []
+        while True:
+            backend = self._acquire(session_id, tried)
+            tried.append(backend)
+            started = False
+            error = None
+            stream = backend.client.chat_stream(payload, timings=timings)
+            try:
+                for chunk in stream:
+                    if not started:
+                        started = True
+                        if timings is not None:
+                            timings["backend"] = backend.url
+                    yield chunk
+                return
+            except OllamaError as e:
+                if self._should_fail_over(e):
+                    error = e
+                if started or error is None or len(tried) == len(self.backends):
+                    raise
+            finally:
+                stream.close()
+                self._release(backend, error)
+
+    def stats(self) -> Dict:
+        """Per-backend health and load, for dashboards"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                b.url: {
+                    "available": b.available(now),
+                    "outstanding": b.outstanding,
+                    "requests": b.requests,
+                    "failures": b.failures,
+                    "lastError": b.last_error,
+                }
+                for b in self.backends
+            }
+
+    # ---- health checks ----
+
+    def check_health(self):
+        """Probe every backend once and update its state"""
+        for backend in self.backends:
+            ok = backend.client.healthy()
+            with self._lock:
+                backend.healthy = ok
+                if ok:
+                    backend.down_until = 0.0
+
+    def _health_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            self.check_health()
+
+    def close(self):
+        self._stop.set()
+        for backend in self.backends:
+            backend.client.close()
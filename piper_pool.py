@@ -0,0 +1,203 @@
+import collections
+import contextlib
+import io
+import json
+import os
+import queue
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+
+# How long a request waits for a free worker before failing
+ACQUIRE_TIMEOUT_SECONDS = 60.0
+
+
+def load_sample_rate(config):
+    model_config = config.get("piperConfigPath")
+    if model_config:
+        with open(model_config, "r", encoding="utf-8") as handle:
+            return int(json.load(handle).get("audio", {}).get("sample_rate", 22050))
+    return 22050
+
+
+def pcm_to_wav(pcm, sample_rate):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class PiperWorker:
+    """One long-lived Piper process that keeps its voice model loaded
+
+    Each utterance goes in as one ``--json-input`` line naming its own WAV file
+    in the worker's scratch directory. Piper prints that path on stdout only
+    once the file is completely written, so the path is a deterministic end of
+    the utterance: no audio can spill into the next request, whatever order the
+    stdout and stderr pipes deliver in.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self.process = None
+        self.directory = None
+        self.lines = queue.Queue()
+        self.errors = collections.deque(maxlen=5)
+        self.stderr_reader = None
+        self.sequence = 0
+
+    def start(self):
+        piper_path = self.config.get("piperPath")
+        model_path = self.config.get("piperModelPath")
+        model_config = self.config.get("piperConfigPath")
+
+        if not piper_path or not model_path:
+            raise RuntimeError("Piper path or model path is missing in voice_config.json")
+
+        self.stop()
+        self.directory = tempfile.mkdtemp(prefix="piper-")
+        args = [piper_path, "-m", model_path, "--json-input", "--output_dir", self.directory]
+        if model_config:
+            args.extend(["-c", model_config])
+
+        self.lines = queue.Queue()
+        self.errors = collections.deque(maxlen=5)
+        self.process = subprocess.Popen(
+            args,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=0,
+        )
+        threading.Thread(target=self._read_stdout, args=(self.process, self.lines), daemon=True).start()
+        self.stderr_reader = threading.Thread(target=self._read_stderr, args=(self.process, self.errors), daemon=True)
+        self.stderr_reader.start()
+
+    @staticmethod
+    def _read_stdout(process, lines):
+        for line in process.stdout:
+            lines.put(line.decode("utf-8", "replace").strip())
+        lines.put(None)
+
+    @staticmethod
+    def _read_stderr(process, errors):
+        # Only kept to explain an exit; Piper's progress logging is not used for timing
+        for line in process.stderr:
+            errors.append(line.decode("utf-8", "replace").strip())
+
+    def alive(self):
+        return self.process is not None and self.process.poll() is None
+
+    def synthesize(self, text, timeout=30.0):
+        """Raw 16-bit mono PCM for one utterance"""
+        self.sequence += 1
+        path = os.path.join(self.directory, f"utterance-{self.sequence}.wav")
+        request = json.dumps({"text": " ".join(text.split()), "output_file": path}) + "\n"
+        self.process.stdin.write(request.encode("utf-8"))
+        self.process.stdin.flush()
+
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                try:
+                    line = self.lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    self.stop()
+                    raise RuntimeError("Piper did not finish synthesis in time") from None
+                if line is None:
+                    # Let the exit's last error message arrive before reporting it
+                    self.stderr_reader.join(1.0)
+                    detail = f": {self.errors[-1]}" if self.errors else ""
+                    raise RuntimeError(f"Piper exited during synthesis{detail}")
+                if os.path.abspath(line) == path:
+                    break
+            with wave.open(path, "rb") as wav:
+                return wav.readframes(wav.getnframes())
+        finally:
+            with contextlib.suppress(OSError):
+                os.remove(path)
+
+    def stop(self):
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            self.process.wait()
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+
+
+class PiperPool:
+    """Fixed-size pool of Piper workers, started on first checkout; crashed workers are restarted then too
+
+    Nothing is launched in the constructor, so a server without Piper
+    configured still serves speech recognition and each TTS request gets its
+    own error instead.
+    """
+
+    def __init__(self, config, size=2):
+        self.config = config
+        self.size = size
+        self._sample_rate = None
+        self.idle = queue.Queue()
+        self.restarts = 0
+        for _ in range(size):
+            self.idle.put(PiperWorker(config))
+
+    @property
+    def sample_rate(self):
+        if self._sample_rate is None:
+            self._sample_rate = load_sample_rate(self.config)
+        return self._sample_rate
+
+    def start(self):
+        """Launch every idle worker now instead of on its first request"""
+        workers = []
+        try:
+            while not self.idle.empty():
+                workers.append(self.idle.get_nowait())
+            for worker in workers:
+                if not worker.alive():
+                    worker.start()
+        finally:
+            for worker in workers:
+                self.idle.put(worker)
+
+    def acquire(self, timeout=ACQUIRE_TIMEOUT_SECONDS):
+        try:
+            worker = self.idle.get(timeout=timeout)
+        except queue.Empty:
+            raise RuntimeError("No Piper worker became free in time") from None
+        if not worker.alive():
+            if worker.process is not None:
+                self.restarts += 1
+            try:
+                worker.start()
+            except Exception:
+                # Keep the slot so later requests can retry instead of waiting forever
+                self.idle.put(worker)
+                raise
+        return worker
+
+    def release(self, worker):
+        self.idle.put(worker)
+
+    def synthesize_pcm(self, text):
+        worker = self.acquire()
+        try:
+            return worker.synthesize(text)
+        finally:
+            self.release(worker)
+
+    def synthesize(self, text):
+        """Synthesize ``text`` and return a complete in-memory WAV file"""
+        return pcm_to_wav(self.synthesize_pcm(text), self.sample_rate)
+
+    def close(self):
+        while not self.idle.empty():
+            self.idle.get_nowait().stop()
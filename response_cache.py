@@ -0,0 +1,126 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+
+def normalize_messages(messages: List[Dict]) -> List[Dict]:
+    """Keep only role/content and collapse whitespace so trivial edits share a key"""
+    return [
+        {"role": m.get("role", ""), "content": " ".join(m.get("content", "").split())}
+        for m in messages
+    ]
+
+
+class ResponseCache:
+    """LRU + TTL cache of full LLM replies with an optional SQLite tier
+
+    Entries are keyed on a hash of model, normalized messages and sampling
+    options. Requests whose temperature is above ``max_temperature`` bypass the
+    cache since the caller is asking for varied output.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: float = 3600.0,
+        db_path: Optional[str] = None,
+        max_disk_entries: int = 10000,
+        max_temperature: float = 0.7,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self.max_temperature = max_temperature
+        self.stats = {"hits": 0, "misses": 0, "bypasses": 0}
+
+        # Shared across Streamlit sessions, so every access goes through one lock
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._db = None
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model: str, messages: List[Dict], options: Dict) -> str:
+        raw = json.dumps(
+            {"model": model, "messages": normalize_messages(messages), "options": options},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def cacheable(self, options: Dict) -> bool:
+        if options.get("temperature", 0.0) > self.max_temperature:
+            with self._lock:
+                self.stats["bypasses"] += 1
+            return False
+        return True
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, created = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return value
+                del self._memory[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and now - row[1] <= self.ttl:
+                    self._remember(key, row[0], row[1])
+                    self.stats["hits"] += 1
+                    return row[0]
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, value, created) VALUES (?, ?, ?)",
+                    (key, value, now),
+                )
+                # Drop expired rows and keep the newest max_disk_entries
+                self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+                self._db.execute(
+                    "DELETE FROM responses WHERE key NOT IN "
+                    "(SELECT key FROM responses ORDER BY created DESC LIMIT ?)",
+                    (self.max_disk_entries,),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, value: str, created: float):
+        """Insert into the memory tier, evicting least recently used entries (lock held)"""
+        self._memory[key] = (value, created)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
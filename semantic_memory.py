@@ -0,0 +1,329 @@
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import zlib
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from ollama_client import OllamaClient, OllamaError, OllamaHTTPError
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+# Characters of each side of a recalled turn that go into the prompt
+RECALL_CHARS = 400
+
+
+class HashingEmbedder:
+    """Local stand-in for an embedding model: signed feature hashing of words and word pairs
+
+    Needs no server, so it works offline and in tests, but it only captures
+    lexical overlap.
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            words = TOKEN_RE.findall(text.lower())
+            for feature in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+                digest = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, digest % self.dim] += -1.0 if digest & 0x80000000 else 1.0
+        return vectors
+
+
+class OllamaEmbedder:
+    """Embeddings from Ollama's /api/embed, requested in batches"""
+
+    def __init__(self, client: OllamaClient, model: str = "nomic-embed-text", batch_size: int = 32):
+        self.client = client
+        self.model = model
+        self.batch_size = batch_size
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            batch = list(texts[start:start + self.batch_size])
+            rows.extend(self.client.embed({"model": self.model, "input": batch})["embeddings"])
+        return np.asarray(rows, dtype=np.float32)
+
+
+class FallbackEmbedder:
+    """OllamaEmbedder that falls back to HashingEmbedder when its model cannot be used
+
+    Whether the model works (usually it fails because it was never pulled) is
+    checked with one embed request on a background thread, so creating the
+    embedder never waits on Ollama; ``embed`` calls made before the check has
+    finished wait for it. ``fallback_reason`` says why the fallback is in use.
+    """
+
+    def __init__(self, client: OllamaClient, model: str = "nomic-embed-text"):
+        self.model = model
+        self.embedder = OllamaEmbedder(client, model)
+        self.fallback_reason: Optional[str] = None
+        self._checked = threading.Event()
+        threading.Thread(target=self._check, name="embedder-check", daemon=True).start()
+
+    def _check(self):
+        try:
+            self.embedder.embed(["warm-up"])
+        except OllamaHTTPError as e:
+            self.embedder = HashingEmbedder()
+            self.fallback_reason = str(e)
+        except OllamaError:
+            # Ollama itself is unreachable; chat fails too, so keep the real model for when it is back
+            pass
+        finally:
+            self._checked.set()
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        self._checked.wait()
+        return self.embedder.embed(texts)
+
+
+class VectorIndex:
+    """Append-only on-disk matrix of unit vectors with batched cosine top-k search
+
+    ``vectors.bin`` holds the rows back to back (float16 by default, half the
+    size of float32 and plenty for ranking) and is memory-mapped for search, so
+    only the pages being scanned are resident. ``meta.jsonl`` holds one record
+    per row; only each record's byte offset is kept in memory and records are
+    read back on demand. Appends write both files; on open, a row without
+    metadata (or the reverse) left by a crash is trimmed. The directory is only
+    created by the first append and removed again by ``clear``.
+    """
+
+    def __init__(self, directory: str, dim: Optional[int] = None, dtype: str = "float16",
+                 block_rows: int = 65536):
+        self.directory = directory
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        self._matrix: Optional[np.memmap] = None
+
+        self.info_path = os.path.join(directory, "index.json")
+        self.vectors_path = os.path.join(directory, "vectors.bin")
+        self.meta_path = os.path.join(directory, "meta.jsonl")
+        if os.path.exists(self.info_path):
+            with open(self.info_path, "r", encoding="utf-8") as handle:
+                info = json.load(handle)
+            dim, dtype = info["dim"], info["dtype"]
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+
+        # Byte offset of each row's record in meta.jsonl, plus where the last one ends
+        self._offsets = array("q")
+        self._meta_size = 0
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "rb") as handle:
+                for line in handle:
+                    if not line.endswith(b"\n"):
+                        # Cut off mid-write
+                        break
+                    self._offsets.append(self._meta_size)
+                    self._meta_size += len(line)
+        rows = 0
+        if self.dim and os.path.exists(self.vectors_path):
+            rows = os.path.getsize(self.vectors_path) // (self.dim * self.dtype.itemsize)
+        self.count = min(rows, len(self._offsets))
+        if self.count < len(self._offsets) or self.count < rows or (
+            os.path.exists(self.meta_path) and os.path.getsize(self.meta_path) != self._meta_size
+        ):
+            self._trim()
+
+    def _trim(self):
+        """Cut both files back to ``count`` consistent rows"""
+        if self.count < len(self._offsets):
+            self._meta_size = self._offsets[self.count]
+            del self._offsets[self.count:]
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path, "r+b") as handle:
+                handle.truncate(self._meta_size)
+        if self.dim and os.path.exists(self.vectors_path):
+            with open(self.vectors_path, "r+b") as handle:
+                handle.truncate(self.count * self.dim * self.dtype.itemsize)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def add(self, vectors: np.ndarray, records: List[Dict]):
+        """Append unit-normalized ``vectors`` with one metadata record each"""
+        vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+        if len(vectors) != len(records):
+            raise ValueError("One metadata record is needed per vector")
+        with self._lock:
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+            if not os.path.exists(self.info_path):
+                os.makedirs(self.directory, exist_ok=True)
+                with open(self.info_path, "w", encoding="utf-8") as handle:
+                    json.dump({"dim": self.dim, "dtype": self.dtype.name}, handle)
+            if vectors.shape[1] != self.dim:
+                raise ValueError(f"Expected {self.dim}-dimensional vectors, got {vectors.shape[1]}")
+
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            with open(self.vectors_path, "ab") as handle:
+                handle.write((vectors / norms).astype(self.dtype).tobytes())
+            with open(self.meta_path, "ab") as handle:
+                for record in records:
+                    line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                    handle.write(line)
+                    self._offsets.append(self._meta_size)
+                    self._meta_size += len(line)
+            self.count += len(records)
+
+    def records(self, rows: Sequence[int]) -> List[Dict]:
+        """Metadata records of ``rows``, read from meta.jsonl"""
+        with self._lock:
+            offsets = [self._offsets[row] for row in rows]
+        if not offsets:
+            return []
+        with open(self.meta_path, "rb") as handle:
+            result = []
+            for offset in offsets:
+                handle.seek(offset)
+                result.append(json.loads(handle.readline()))
+        return result
+
+    def clear(self):
+        """Drop every row and the index's directory (the dimension and dtype are kept)"""
+        with self._lock:
+            self._matrix = None
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self._offsets = array("q")
+            self._meta_size = 0
+            self.count = 0
+
+    def _rows(self) -> Optional[np.memmap]:
+        """Memory map covering every row; remapped after appends"""
+        if self._matrix is None or len(self._matrix) != self.count:
+            self._matrix = np.memmap(self.vectors_path, dtype=self.dtype, mode="r", shape=(self.count, self.dim))
+        return self._matrix
+
+    def search(self, queries: np.ndarray, k: int = 5, limit: Optional[int] = None) -> List[List[Tuple[float, int]]]:
+        """Best ``k`` (score, row) pairs per query row, highest cosine similarity first
+
+        Rows are scored a block at a time (upcast to float32 for the matrix
+        product) and only the running top-k per query is kept, so memory stays
+        bounded however large the index grows. ``limit`` searches only the
+        first ``limit`` rows.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+
+        with self._lock:
+            rows = self.count if limit is None else max(0, min(limit, self.count))
+            if rows == 0 or k <= 0:
+                return [[] for _ in queries]
+            matrix = self._rows()
+
+        k = min(k, rows)
+        best_scores = np.empty((len(queries), 0), dtype=np.float32)
+        best_rows = np.empty((len(queries), 0), dtype=np.int64)
+        for start in range(0, rows, self.block_rows):
+            stop = min(start + self.block_rows, rows)
+            scores = queries @ np.asarray(matrix[start:stop], dtype=np.float32).T
+            candidates = np.concatenate([best_scores, scores], axis=1)
+            candidate_rows = np.concatenate(
+                [best_rows, np.broadcast_to(np.arange(start, stop), scores.shape)], axis=1
+            )
+            if candidates.shape[1] > k:
+                keep = np.argpartition(-candidates, k - 1, axis=1)[:, :k]
+                candidates = np.take_along_axis(candidates, keep, axis=1)
+                candidate_rows = np.take_along_axis(candidate_rows, keep, axis=1)
+            best_scores, best_rows = candidates, candidate_rows
+
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [
+            [(float(score), int(row)) for score, row in zip(scores, rows_)]
+            for scores, rows_ in zip(best_scores, best_rows)
+        ]
+
+
+def sweep(directory: str, max_age_seconds: float) -> int:
+    """Remove the indexes under ``directory`` that were not written to for ``max_age_seconds``
+
+    Returns how many were removed.
+    """
+    if not os.path.isdir(directory):
+        return 0
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    for entry in os.scandir(directory):
+        if not entry.is_dir():
+            continue
+        # Appends do not touch the directory's own mtime, so look at its files
+        last_write = max((child.stat().st_mtime for child in os.scandir(entry.path)),
+                         default=entry.stat().st_mtime)
+        if last_write < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def turn_text(record: Dict) -> str:
+    return f"User: {record.get('user', '')}\nAssistant: {record.get('bot', '')}"
+
+
+class SemanticMemory:
+    """Long-term memory of one conversation
+
+    Every stored turn is embedded and appended to a VectorIndex; before a new
+    turn the past turns most similar to the user's message are recalled, so
+    facts from hundreds of turns back reach the prompt without resending the
+    transcript.
+    """
+
+    def __init__(self, embedder, directory: str, dtype: str = "float16", min_score: float = 0.3):
+        self.embedder = embedder
+        self.index = VectorIndex(directory, dtype=dtype)
+        self.min_score = min_score
+
+    def add_turns(self, records: List[Dict]):
+        if not records:
+            return
+        vectors = self.embedder.embed([turn_text(record) for record in records])
+        self.index.add(vectors, [
+            {"user": record.get("user", ""), "bot": record.get("bot", ""), "timestamp": record.get("timestamp")}
+            for record in records
+        ])
+
+    def add_turn(self, record: Dict):
+        self.add_turns([record])
+
+    def clear(self):
+        self.index.clear()
+
+    def recall(self, query: str, k: int = 3, skip_recent: int = 0) -> List[Dict]:
+        """Up to ``k`` past turns relevant to ``query``, oldest first
+
+        The newest ``skip_recent`` turns are left out because they are still
+        in the prompt verbatim.
+        """
+        limit = len(self.index) - skip_recent
+        if limit <= 0:
+            return []
+        hits = self.index.search(self.embedder.embed([query]), k, limit=limit)[0]
+        hits = sorted((hit for hit in hits if hit[0] >= self.min_score), key=lambda hit: hit[1])
+        records = self.index.records([row for _, row in hits])
+        return [dict(record, score=score) for (score, _), record in zip(hits, records)]
+
+    @staticmethod
+    def note(memories: List[Dict]) -> Optional[str]:
+        """Format recalled turns as a system note for the prompt"""
+        if not memories:
+            return None
+        lines = ["Relevant earlier exchanges from this conversation (use them if they help):"]
+        for memory in memories:
+            lines.append(f"- User: {memory['user'][:RECALL_CHARS]}\n  Assistant: {memory['bot'][:RECALL_CHARS]}")
+        return "\n".join(lines)
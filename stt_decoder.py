@@ -0,0 +1,140 @@
+import asyncio
+import json
+import os
+
+
+class DecodeStream:
+    """Ordered, bounded decoding of one connection's audio off the event loop
+
+    Frames are queued per connection and decoded one at a time, in order, on a
+    shared executor, so Kaldi's CPU-bound work never blocks other clients. When
+    ``max_pending`` frames are waiting, ``feed`` blocks; the connection then
+    stops reading from its socket, which pushes back on the client through TCP
+    flow control instead of buffering without limit. An optional ``converter``
+    (audio_input.AudioConverter) turns each frame into the recognizer's format
+    on the same executor, just before it is decoded.
+    """
+
+    def __init__(self, recognizer, executor, on_partial, max_pending=32, converter=None):
+        self.recognizer = recognizer
+        self.converter = converter
+        self.executor = executor
+        self.on_partial = on_partial
+        self.queue = asyncio.Queue(maxsize=max_pending)
+        self.task = asyncio.create_task(self._run())
+
+    def _decode(self, frame):
+        if self.converter is not None:
+            frame = self.converter.convert(frame)
+        self.recognizer.AcceptWaveform(frame)
+        return json.loads(self.recognizer.PartialResult()).get("partial", "")
+
+    def _final(self):
+        return json.loads(self.recognizer.FinalResult()).get("text", "").strip()
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            frame = await self.queue.get()
+            if frame is None:
+                return
+            partial = await loop.run_in_executor(self.executor, self._decode, frame)
+            await self.on_partial(partial)
+
+    async def _put(self, item):
+        # Wait for queue space or for the decode task to end, whichever comes
+        # first: a task that died (decoder error, closed socket) never frees
+        # space again, so a plain put would block this connection forever
+        put = asyncio.ensure_future(self.queue.put(item))
+        try:
+            done, _ = await asyncio.wait({put, self.task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            if not put.done():
+                put.cancel()
+        if put not in done:
+            self.task.result()
+            raise RuntimeError("Decoding stopped")
+
+    async def feed(self, frame):
+        if self.task.done():
+            # Surface a decoder failure to the caller instead of queueing forever
+            self.task.result()
+        await self._put(frame)
+
+    async def finish(self):
+        """Decode everything still queued and return the final transcript"""
+        await self._put(None)
+        await self.task
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self._final)
+
+    def cancel(self):
+        self.task.cancel()
+
+
+class PartialEmitter:
+    """Deduplicated, rate-limited partial-result messages for one connection
+
+    A partial is only sent when the hypothesis changed, and at most once per
+    ``min_interval`` seconds; a newer hypothesis that arrives in between
+    replaces the pending one and goes out when the interval expires. In delta
+    mode only the changed tail is sent as ``{"keep": n, "append": "..."}``,
+    meaning: keep the first n characters of the previous partial and append.
+    Call ``flush`` before sending the final result so the last partial is
+    never lost.
+    """
+
+    def __init__(self, websocket, min_interval=0.1, delta=False):
+        self.websocket = websocket
+        self.min_interval = min_interval
+        self.delta = delta
+        self.last_text = ""
+        self.last_sent_at = 0.0
+        self.pending = None
+        self.timer = None
+
+    async def update(self, text):
+        if not text:
+            # Vosk reports an empty partial between words; keep any pending hypothesis
+            return
+        if text == self.last_text:
+            self.pending = None
+            return
+        loop = asyncio.get_running_loop()
+        wait = self.min_interval - (loop.time() - self.last_sent_at)
+        if wait <= 0:
+            await self._send(text)
+            return
+        self.pending = text
+        if self.timer is None:
+            self.timer = loop.call_later(wait, lambda: asyncio.ensure_future(self._send_pending()))
+
+    async def _send_pending(self):
+        self.timer = None
+        if self.pending:
+            try:
+                await self._send(self.pending)
+            except Exception:
+                # Timer-driven send on a connection that has gone away; nothing to report to
+                pass
+
+    async def _send(self, text):
+        self.pending = None
+        if self.delta:
+            keep = len(os.path.commonprefix([self.last_text, text]))
+            message = {"type": "partial", "keep": keep, "append": text[keep:]}
+        else:
+            message = {"type": "partial", "text": text}
+        self.last_text = text
+        self.last_sent_at = asyncio.get_running_loop().time()
+        await self.websocket.send(json.dumps(message))
+
+    async def flush(self):
+        self.close()
+        if self.pending and self.pending != self.last_text:
+            await self._send(self.pending)
+
+    def close(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
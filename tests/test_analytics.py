@@ -0,0 +1,76 @@
+from types import SimpleNamespace
+
+import pytest
+
+from analytics import AnalyticsAggregator
+from text_analysis import NEGATIVE, NEUTRAL, POSITIVE
+
+
+def test_counts_are_updated_incrementally():
+    analytics = AnalyticsAggregator(window=2)
+    analytics.record_user(POSITIVE, "greeting")
+    analytics.record_bot(POSITIVE)
+    analytics.record_user(NEGATIVE, "help_request")
+    analytics.record_bot(NEGATIVE)
+    analytics.record_user(NEUTRAL, "greeting")
+    analytics.record_bot(NEUTRAL)
+
+    assert (analytics.total_messages, analytics.user_messages, analytics.bot_messages) == (6, 3, 3)
+    assert analytics.sentiments == {POSITIVE: 1, NEGATIVE: 1, NEUTRAL: 1}
+    assert analytics.intents == {"greeting": 2, "help_request": 1}
+    # Only the last ``window`` replies are in the trend
+    assert analytics.sentiment_trend() == [-1, 0]
+    assert analytics.to_dict()["intents"] == {"greeting": 2, "help_request": 1}
+
+
+def test_version_tracks_chart_data_only():
+    analytics = AnalyticsAggregator()
+    analytics.record_user(POSITIVE, "greeting")
+    analytics.record_bot(POSITIVE)
+    assert analytics.version == 2
+
+    analytics.record_feedback("👍")
+    analytics.record_feedback("👎")
+    analytics.record_feedback("👍")
+    assert analytics.version == 2
+    assert analytics.satisfaction() == pytest.approx(2 / 3)
+    assert AnalyticsAggregator().satisfaction() == 0.0
+
+
+@pytest.fixture
+def dashboard(monkeypatch):
+    pytest.importorskip("streamlit")
+    pytest.importorskip("plotly")
+    import dashboard
+
+    state = SimpleNamespace(analytics=AnalyticsAggregator(), figure_cache={})
+    monkeypatch.setattr(dashboard, "st", SimpleNamespace(session_state=state))
+    return dashboard
+
+
+def test_figure_is_rebuilt_only_when_analytics_change(dashboard):
+    state = dashboard.st.session_state
+    builds = []
+
+    def build(analytics):
+        builds.append(analytics.version)
+        return object()
+
+    first = dashboard.cached_figure("pie", build)
+    assert dashboard.cached_figure("pie", build) is first
+    state.analytics.record_user(POSITIVE, "greeting")
+    assert dashboard.cached_figure("pie", build) is not first
+    assert builds == [0, 1]
+
+
+def test_reset_analytics_invalidates_cached_figures(dashboard):
+    state = dashboard.st.session_state
+    state.analytics.record_user(POSITIVE, "greeting")
+    before = dashboard.cached_figure("pie", lambda analytics: ("figure", analytics.sentiments[POSITIVE]))
+
+    # Reset Analytics swaps in a new aggregator; after one event its version matches the old one's
+    state.analytics = AnalyticsAggregator()
+    state.analytics.record_user(NEGATIVE, "greeting")
+    after = dashboard.cached_figure("pie", lambda analytics: ("figure", analytics.sentiments[POSITIVE]))
+    assert before == ("figure", 1)
+    assert after == ("figure", 0)
@@ -0,0 +1,144 @@
+import asyncio
+import threading
+
+import pytest
+
+from async_engine import AsyncChatEngine
+from ollama_client import OllamaHTTPError
+
+
+class FakeChatbot:
+    """Records the order requests start in; a request named in ``gates`` blocks until released"""
+
+    def __init__(self):
+        self.started = []
+        self.gates = {}
+        self.fail = set()
+
+    def stream_response(self, messages, temperature=0.7, stats=None, session_id=None):
+        name = messages[-1]["content"]
+        self.started.append(name)
+        yield f"{name}:first"
+        gate = self.gates.get(name)
+        if gate is not None:
+            gate.wait(5)
+        if name in self.fail:
+            raise OllamaHTTPError("boom", status_code=500)
+        yield f"{name}:last"
+
+
+def request(name):
+    return [{"role": "user", "content": name}]
+
+
+async def wait_until(condition, timeout=2.0):
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not condition():
+        assert loop.time() < deadline, "condition not reached"
+        await asyncio.sleep(0.01)
+
+
+def test_slots_are_shared_round_robin_across_sessions():
+    async def main():
+        chatbot = FakeChatbot()
+        engine = AsyncChatEngine(chatbot, max_concurrency=1)
+        chatbot.gates["a1"] = gate = threading.Event()
+        tasks = [asyncio.create_task(engine.generate("a", request("a1")))]
+        await wait_until(lambda: chatbot.started == ["a1"])
+        tasks += [asyncio.create_task(engine.generate("a", request(name))) for name in ("a2", "a3", "a4")]
+        tasks.append(asyncio.create_task(engine.generate("b", request("b1"))))
+        await asyncio.sleep(0.05)
+        gate.set()
+        await asyncio.gather(*tasks)
+        return chatbot.started, engine
+
+    started, engine = asyncio.run(main())
+    # b1 arrived last but only waits for one more "a" request, not all of them
+    assert started.index("b1") < started.index("a3")
+    assert engine.in_flight == 0
+    assert engine.metrics()["queue_depth"] == 0
+
+
+def test_cancel_while_queued_never_runs_and_frees_nothing():
+    async def main():
+        chatbot = FakeChatbot()
+        engine = AsyncChatEngine(chatbot, max_concurrency=1)
+        chatbot.gates["a1"] = gate = threading.Event()
+        first = asyncio.create_task(engine.generate("a", request("a1")))
+        await wait_until(lambda: chatbot.started == ["a1"])
+        queued = asyncio.create_task(engine.generate("b", request("b1")))
+        await asyncio.sleep(0.02)
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert engine.metrics()["queue_depth"] == 0
+        gate.set()
+        await first
+        await wait_until(lambda: engine.in_flight == 0)
+        return chatbot.started, engine
+
+    started, engine = asyncio.run(main())
+    assert started == ["a1"]
+    assert engine.cancelled == 1
+
+
+def test_cancel_mid_stream_holds_slot_until_worker_exits():
+    async def main():
+        chatbot = FakeChatbot()
+        engine = AsyncChatEngine(chatbot, max_concurrency=1)
+        chatbot.gates["a1"] = gate = threading.Event()
+        tokens = []
+
+        async def consume():
+            async for token in engine.stream("a", request("a1")):
+                tokens.append(token)
+
+        task = asyncio.create_task(consume())
+        await wait_until(lambda: tokens == ["a1:first"])
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The worker thread is still blocked inside the request, so its slot is still taken
+        assert engine.in_flight == 1
+        follow_up = asyncio.create_task(engine.generate("b", request("b1")))
+        await asyncio.sleep(0.05)
+        assert "b1" not in chatbot.started
+
+        gate.set()
+        assert await follow_up == "b1:firstb1:last"
+        await wait_until(lambda: engine.in_flight == 0)
+        return tokens
+
+    assert asyncio.run(main()) == ["a1:first"]
+
+
+def test_error_mid_stream_propagates_and_releases_slot():
+    async def main():
+        chatbot = FakeChatbot()
+        chatbot.fail.add("a1")
+        engine = AsyncChatEngine(chatbot, max_concurrency=1)
+        with pytest.raises(OllamaHTTPError):
+            await engine.generate("a", request("a1"))
+        await wait_until(lambda: engine.in_flight == 0)
+        assert await engine.generate("a", request("a2")) == "a2:firsta2:last"
+
+    asyncio.run(main())
+
+
+def test_cancel_session_cancels_queued_and_running():
+    async def main():
+        chatbot = FakeChatbot()
+        engine = AsyncChatEngine(chatbot, max_concurrency=1)
+        chatbot.gates["a1"] = gate = threading.Event()
+        tasks = [asyncio.create_task(engine.generate("a", request(name))) for name in ("a1", "a2")]
+        await wait_until(lambda: chatbot.started == ["a1"])
+        assert engine.cancel_session("a") == 2
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        gate.set()
+        await wait_until(lambda: engine.in_flight == 0)
+        return results, chatbot.started
+
+    results, started = asyncio.run(main())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert started == ["a1"]
@@ -0,0 +1,115 @@
+import numpy as np
+import pytest
+
+import audio_input
+from audio_input import AudioConverter, Resampler
+
+
+def tone(frequency, rate, seconds=1.0, amplitude=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    return (amplitude * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def peak_frequency(samples, rate):
+    spectrum = np.abs(np.fft.rfft(samples * np.hanning(len(samples))))
+    return np.fft.rfftfreq(len(samples), 1 / rate)[np.argmax(spectrum)]
+
+
+def resample_in_frames(resampler, samples, frame):
+    return np.concatenate([resampler.process(samples[i:i + frame]) for i in range(0, len(samples), frame)])
+
+
+@pytest.mark.parametrize("in_rate", [8000, 44100, 48000])
+def test_rate_and_pitch_are_preserved(in_rate):
+    output = resample_in_frames(Resampler(in_rate, 16000), tone(440, in_rate), frame=in_rate // 50)
+
+    assert abs(len(output) - 16000) <= 2
+    assert abs(peak_frequency(output, 16000) - 440) < 2
+
+
+def test_frame_boundaries_do_not_click():
+    samples = tone(440, 44100)
+    whole = Resampler(44100, 16000).process(samples)
+    framed = resample_in_frames(Resampler(44100, 16000), samples, frame=441)
+
+    assert len(framed) == len(whole)
+    np.testing.assert_allclose(framed, whole, atol=1e-5)
+    # Upsampling is interpolated across frames too
+    up_whole = Resampler(8000, 16000).process(tone(440, 8000))
+    up_framed = resample_in_frames(Resampler(8000, 16000), tone(440, 8000), frame=160)
+    np.testing.assert_allclose(up_framed[:len(up_whole)], up_whole[:len(up_framed)], atol=1e-5)
+
+
+def test_downsampling_filters_what_would_alias():
+    # 12 kHz is above the 8 kHz Nyquist rate of 16 kHz output and would fold to 4 kHz
+    output = Resampler(48000, 16000).process(tone(12000, 48000))
+    steady = output[100:]
+    assert np.sqrt(np.mean(steady ** 2)) < 0.01
+
+
+def test_empty_frame_is_harmless():
+    resampler = Resampler(48000, 16000)
+    assert len(resampler.process(np.zeros(0, dtype=np.float32))) == 0
+    assert len(resampler.process(tone(440, 48000, seconds=0.02))) > 0
+    # A frame holding only half a sample is carried over and produces nothing yet
+    assert AudioConverter(48000).convert(b"\x01") == b""
+
+
+def test_matching_pcm_passes_through_untouched():
+    converter = AudioConverter(16000)
+    frame = np.arange(160, dtype="<i2").tobytes()
+    assert converter.convert(frame) is frame
+
+
+def test_stereo_float_is_downmixed_and_resampled():
+    left = tone(440, 48000, seconds=0.1)
+    stereo = np.column_stack([left, left]).astype("<f4").tobytes()
+    converter = AudioConverter(48000, channels=2, encoding="pcm_f32le")
+
+    output = np.frombuffer(converter.convert(stereo), dtype="<i2")
+    assert abs(len(output) - 1600) <= 2
+    assert 0.45 * 32767 < np.abs(output[200:]).max() < 0.55 * 32767
+
+
+def test_samples_split_across_frames_are_carried_over():
+    data = np.arange(100, dtype="<i2").tobytes()
+    converter = AudioConverter(16000, channels=2)
+    output = converter.convert(data[:51]) + converter.convert(data[51:])
+
+    expected = np.arange(100, dtype=np.float32).reshape(-1, 2).mean(axis=1).astype("<i2")
+    np.testing.assert_array_equal(np.frombuffer(output, dtype="<i2"), expected)
+
+
+def test_invalid_settings_are_rejected():
+    with pytest.raises(ValueError, match="Unsupported encoding"):
+        AudioConverter(16000, encoding="mp3")
+    with pytest.raises(ValueError, match="channels"):
+        AudioConverter(16000, channels=0)
+    with pytest.raises(ValueError, match="sampleRate"):
+        AudioConverter(0)
+
+
+class FakeOpus:
+    """opuslib stand-in whose decoder rejects packets starting with 0xff"""
+
+    class OpusError(Exception):
+        pass
+
+    class Decoder:
+        def __init__(self, rate, channels):
+            self.rate = rate
+
+        def decode(self, packet, max_frame):
+            if packet.startswith(b"\xff"):
+                raise FakeOpus.OpusError("corrupted stream")
+            return np.full(self.rate // 50, 1000, dtype="<i2").tobytes()
+
+
+def test_corrupt_opus_packet_is_dropped_and_counted(monkeypatch):
+    monkeypatch.setattr(audio_input, "opuslib", FakeOpus)
+    converter = AudioConverter(48000, encoding="opus", target_rate=16000)
+    good = converter.convert(b"\x01packet")
+    assert converter.convert(b"\xffgarbage") == b""
+    assert converter.convert(b"\x01packet") == good
+    assert len(good) == 2 * 16000 // 50
+    assert converter.dropped_frames == 1
@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+import json
+import threading
+import time
+
+from batch_runner import BatchRunner, completed_ids, read_items
+
+
+class FakeChatbot:
+    """Answers instantly and records how many Ollama calls ran at once"""
+
+    system_prompt = "You are helpful."
+    context_tokens = 200
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.summarized = []
+
+    def _enter(self):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+
+    def _leave(self):
+        with self.lock:
+            self.active -= 1
+
+    def turn_notes(self, sentiment):
+        return []
+
+    def summarize(self, previous_summary, messages, session_id=None):
+        self._enter()
+        try:
+            time.sleep(0.01)
+            self.summarized.extend(message["content"] for message in messages)
+            return f"{previous_summary} +{len(messages)}"
+        finally:
+            self._leave()
+
+    def stream_response(self, messages, temperature=0.7, stats=None, session_id=None):
+        self._enter()
+        try:
+            time.sleep(0.01)
+            yield "ok"
+        finally:
+            self._leave()
+
+
+def write_export(path, turns):
+    with gzip.open(path, "wt", encoding="utf-8") as handle:
+        handle.write(json.dumps({"session_id": "s"}) + "\n")
+        for number in range(turns):
+            handle.write(json.dumps({"id": f"t{number}", "user": f"question {number} " + "x" * 80,
+                                     "bot": f"answer {number} " + "y" * 80}) + "\n")
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as handle:
+        return {result["id"]: result for result in map(json.loads, handle)}
+
+
+def test_bad_item_is_recorded_and_the_run_continues(tmp_path):
+    chatbot = FakeChatbot()
+    items = [{"id": "bad", "messages": []}, {"id": "good", "messages": [{"role": "user", "content": "hi"}]}]
+    output = tmp_path / "out.jsonl"
+    totals = asyncio.run(BatchRunner(chatbot, concurrency=2).run(iter(items), str(output)))
+
+    results = read_results(output)
+    assert totals["done"] == 1 and totals["errors"] == 1
+    assert results["bad"]["error"].startswith("IndexError")
+    assert results["good"]["response"] == "ok"
+
+
+def test_replay_folds_each_turn_into_the_summary_once(tmp_path):
+    chatbot = FakeChatbot()
+    export = tmp_path / "export.ndjson.gz"
+    write_export(export, 12)
+    output = tmp_path / "out.jsonl"
+    asyncio.run(BatchRunner(chatbot, concurrency=3).run(read_items(str(export), replay=True), str(output)))
+
+    assert len(read_results(output)) == 12
+    assert chatbot.summarized
+    assert len(chatbot.summarized) == len(set(chatbot.summarized))
+
+
+def test_summarizing_stays_within_the_concurrency_limit(tmp_path):
+    chatbot = FakeChatbot()
+    long_history = [{"role": "user" if n % 2 == 0 else "assistant", "content": "z" * 200} for n in range(9)]
+    items = [{"id": f"i{n}", "messages": long_history} for n in range(8)]
+    asyncio.run(BatchRunner(chatbot, concurrency=2).run(iter(items), str(tmp_path / "out.jsonl")))
+
+    assert chatbot.summarized
+    assert chatbot.peak <= 2
+
+
+def test_resume_retries_errors_and_keeps_one_line_per_id(tmp_path):
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        json.dumps({"id": "a", "response": "first"}) + "\n"
+        + json.dumps({"id": "b", "error": "Ollama returned HTTP 500"}) + "\n"
+        + '{"id": "c", "respo',
+        encoding="utf-8",
+    )
+    skip = completed_ids(str(output))
+    assert skip == {"a"}
+    # Only the finished result survives; the error and the cut-off line are gone
+    assert output.read_text(encoding="utf-8") == json.dumps({"id": "a", "response": "first"}) + "\n"
+
+    items = [{"id": name, "messages": [{"role": "user", "content": "hi"}]} for name in ("a", "b", "c")]
+    totals = asyncio.run(BatchRunner(FakeChatbot()).run(iter(items), str(output), skip))
+    assert totals == {"done": 2, "errors": 0, "skipped": 1}
+
+    lines = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert sorted(line["id"] for line in lines) == ["a", "b", "c"]
+    assert all("error" not in line for line in lines)
+    assert completed_ids(str(output)) == {"a", "b", "c"}
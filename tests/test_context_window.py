@@ -0,0 +1,87 @@
+from context_window import ContextWindow, message_tokens
+from local_chatbot import LocalChatbot
+from ollama_client import OllamaConnectionError
+
+
+class Summarizer:
+    def __init__(self):
+        self.failing = False
+        self.batches = []
+
+    def __call__(self, previous, messages):
+        if self.failing:
+            raise OllamaConnectionError("down")
+        self.batches.append(messages)
+        return previous + "".join(m["content"][:3] for m in messages)
+
+
+def converse(window, turns, history=None):
+    history = history if history is not None else []
+    prompts = []
+    for index in range(len(history) // 2, len(history) // 2 + turns):
+        history.append({"role": "user", "content": f"u{index:02d} " + "x" * 80})
+        prompts.append(window.build("sys", history))
+        history.append({"role": "assistant", "content": "y" * 80})
+    return history, prompts
+
+
+def covered(window, history, prompt):
+    """Every user turn is either in the summary or in the prompt"""
+    in_prompt = {m["content"][:3] for m in prompt if m["role"] == "user"}
+    return all(
+        m["content"][:3] in window.summary or m["content"][:3] in in_prompt
+        for m in history if m["role"] == "user"
+    )
+
+
+def test_failed_fold_keeps_turns_in_prompt():
+    summarize = Summarizer()
+    summarize.failing = True
+    window = ContextWindow(summarize, max_tokens=200)
+    history, prompts = converse(window, 12)
+    assert window.window_start == 0
+    assert covered(window, history, prompts[-1])
+
+
+def test_recovered_fold_uses_bounded_batches():
+    summarize = Summarizer()
+    summarize.failing = True
+    window = ContextWindow(summarize, max_tokens=200, fold_tokens=100)
+    history, _ = converse(window, 12)
+
+    summarize.failing = False
+    history, prompts = converse(window, 1, history)
+    assert window.summarized_count == window.window_start > 0
+    assert len(summarize.batches) > 1
+    assert all(sum(message_tokens(m) for m in batch) <= 100 or len(batch) == 1 for batch in summarize.batches)
+    assert covered(window, history, prompts[-1])
+
+
+def test_oversized_message_is_cut_for_folding():
+    summarize = Summarizer()
+    window = ContextWindow(summarize, max_tokens=200, fold_tokens=50)
+    history = [{"role": "user", "content": "u00 " + "x" * 5000}, {"role": "assistant", "content": "ok"}]
+    converse(window, 3, history)
+    assert summarize.batches
+    assert len(summarize.batches[0][0]["content"]) <= 200
+
+
+def test_payloads_share_num_ctx_sized_for_the_budget():
+    chatbot = LocalChatbot(context_tokens=3072, num_predict=800)
+    payload = chatbot.build_payload([{"role": "user", "content": "hi"}])
+    assert payload["options"]["num_ctx"] >= 3072 + 800
+    assert chatbot.with_load_options({"options": {}})["options"]["num_ctx"] == payload["options"]["num_ctx"]
+
+
+def test_drop_oldest_only_removes_summarized_messages():
+    summarize = Summarizer()
+    window = ContextWindow(summarize, max_tokens=200)
+    history, _ = converse(window, 12)
+    folded = window.summarized_count
+    assert folded > 2
+
+    assert window.drop_oldest(folded + 10) == folded
+    del history[:folded]
+    assert window.summarized_count == 0
+    history, prompts = converse(window, 1, history)
+    assert covered(window, history, prompts[-1])
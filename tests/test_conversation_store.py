@@ -0,0 +1,102 @@
+import gzip
+import json
+import os
+
+import pytest
+
+from conversation_store import ConversationStore
+
+
+def test_read_turns_pages_across_segments(tmp_path):
+    store = ConversationStore(str(tmp_path), max_segment_bytes=200)
+    for index in range(30):
+        store.append("s1", {"user": f"u{index}", "bot": f"b{index}"})
+    assert len(store.segments("s1")) > 1
+
+    assert [turn["user"] for turn in store.read_turns("s1", 10, 13)] == ["u10", "u11", "u12"]
+    assert [turn["user"] for turn in store.read_turns("s1", 28, 40)] == ["u28", "u29"]
+    assert store.read_turns("missing", 0, 5) == []
+    store.close()
+
+
+def test_export_is_valid_gzip_ndjson(tmp_path):
+    store = ConversationStore(str(tmp_path))
+    for index in range(3):
+        store.append("s1", {"user": f"u{index}", "bot": f"b{index}"})
+    data = b"".join(store.export_ndjson("s1", {"type": "export"}, compress=True))
+    lines = [json.loads(line) for line in gzip.decompress(data).splitlines()]
+    assert lines[0] == {"type": "export"}
+    assert [line["user"] for line in lines[1:]] == ["u0", "u1", "u2"]
+    store.close()
+
+
+def open_files():
+    return len(os.listdir("/proc/self/fd"))
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_appends_for_many_sessions_hold_no_file_handles(tmp_path):
+    store = ConversationStore(str(tmp_path), max_sessions=4)
+    before = open_files()
+    for index in range(50):
+        store.append(f"s{index}", {"user": "hi", "bot": "hello"})
+    assert open_files() == before
+    assert len(store._sessions) == 4
+
+    # An evicted session is rescanned from disk and keeps its records
+    store.append("s0", {"user": "again", "bot": "hello"})
+    assert store.count("s0") == 2
+    assert [turn["user"] for turn in store.read_turns("s0", 0, 2)] == ["hi", "again"]
+
+
+def test_count_follows_appends_rotation_and_clear(tmp_path):
+    store = ConversationStore(str(tmp_path), max_segment_bytes=100)
+    assert store.count("s1") == 0
+    for index in range(12):
+        store.append("s1", {"user": f"u{index}", "bot": f"b{index}"})
+    assert store.count("s1") == 12
+    assert len(store.segments("s1")) > 1
+
+    # A new store (e.g. after a restart) counts what is on disk
+    reopened = ConversationStore(str(tmp_path), max_segment_bytes=100)
+    assert reopened.count("s1") == 12
+    reopened.append("s1", {"user": "u12", "bot": "b12"})
+    assert [turn["user"] for turn in reopened.read_turns("s1", 11, 13)] == ["u11", "u12"]
+
+    reopened.clear("s1")
+    assert reopened.count("s1") == 0
+    assert reopened.segments("s1") == []
+
+
+def test_turns_before_tail_pages_back_from_the_in_memory_tail(tmp_path):
+    store = ConversationStore(str(tmp_path))
+    for index in range(10):
+        store.append("s1", {"user": f"u{index}", "bot": f"b{index}"})
+
+    # Turns 7-9 are still in memory; the page before them ends at turn 6
+    before, turns = store.turns_before_tail("s1", floor=0, tail_turns=3, limit=2)
+    assert before == 7
+    assert [turn["user"] for turn in turns] == ["u5", "u6"]
+    # Never reaches past the floor (turns before a Clear Chat)
+    before, turns = store.turns_before_tail("s1", floor=4, tail_turns=3, limit=10)
+    assert before == 3
+    assert [turn["user"] for turn in turns] == ["u4", "u5", "u6"]
+    assert store.turns_before_tail("s1", floor=0, tail_turns=3, limit=0) == (7, [])
+
+
+def test_turns_before_tail_after_the_records_were_cleared(tmp_path):
+    store = ConversationStore(str(tmp_path))
+    for index in range(5):
+        store.append("s1", {"user": f"old{index}", "bot": "b"})
+    store.clear("s1")
+    for index in range(2):
+        store.append("s1", {"user": f"new{index}", "bot": "b"})
+
+    # Five pre-reset turns and the two new ones are in memory; nothing is stored before them
+    assert store.turns_before_tail("s1", floor=0, tail_turns=7, limit=5) == (0, [])
+    # Once the tail has been trimmed to newer turns than are stored, the rest pages back in
+    for index in range(2, 6):
+        store.append("s1", {"user": f"new{index}", "bot": "b"})
+    before, turns = store.turns_before_tail("s1", floor=0, tail_turns=3, limit=5)
+    assert before == 3
+    assert [turn["user"] for turn in turns] == ["new0", "new1", "new2"]
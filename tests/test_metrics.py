@@ -0,0 +1,87 @@
+from metrics import Histogram, RunProfile, TurnMetrics
+
+
+def test_histogram_quantiles_over_a_sliding_window():
+    hist = Histogram(window=100)
+    assert hist.quantile(0.5) is None
+    for value in range(1, 201):
+        hist.observe(value / 100)
+
+    # Quantiles come from the last 100 samples, sum and count from all of them
+    assert hist.quantile(0.5) == 1.51
+    assert hist.quantile(0.95) == 1.96
+    assert hist.quantile(0.99) == 2.0
+    assert hist.count == 200
+    assert round(hist.sum, 6) == 201.0
+
+
+def turn(ttft, total, **extra):
+    return dict({"connect": 0.01, "ttft": ttft, "total": total, "prompt_eval_count": 100,
+                 "prompt_eval_duration": 0.5e9, "eval_count": 40, "eval_duration": 2e9}, **extra)
+
+
+def test_cache_hits_are_counted_but_not_timed():
+    metrics = TurnMetrics()
+    metrics.record_turn(turn(0.4, 2.0))
+    metrics.record_turn({"cached": True, "ttft": 0.0001, "total": 0.0002})
+    metrics.record_error()
+
+    summary = metrics.summary()
+    assert (metrics.turns, metrics.cache_hits, metrics.errors) == (2, 1, 1)
+    assert metrics.spans["ttft"].count == 1
+    assert summary["ttft"][0.5] == 0.4
+    assert summary["prefill_tps"][0.5] == 200.0
+    assert summary["decode_tps"][0.5] == 20.0
+    assert metrics.tokens == {"prompt": 100, "completion": 40}
+    # Spans without samples are left out
+    assert "queue" not in summary
+
+
+def test_prometheus_exposition():
+    metrics = TurnMetrics()
+    metrics.observe_span("queue", 0.25)
+    metrics.record_turn(turn(0.4, 2.0))
+    metrics.record_turn({"cached": True})
+    text = metrics.to_prometheus(prefix="bot")
+    lines = text.splitlines()
+
+    assert text.endswith("\n")
+    assert "# TYPE bot_turn_span_seconds summary" in lines
+    assert 'bot_turn_span_seconds{span="queue",quantile="0.5"} 0.250000' in lines
+    assert 'bot_turn_span_seconds_sum{span="ttft"} 0.400000' in lines
+    assert 'bot_turn_span_seconds_count{span="total"} 1' in lines
+    assert not any('span="memory"' in line for line in lines)
+    assert 'bot_decode_tokens_per_second{quantile="0.99"} 20.000000' in lines
+    assert "bot_decode_tokens_per_second_count 1" in lines
+    assert 'bot_tokens_total{kind="completion"} 40' in lines
+    assert "bot_turns_total 2" in lines
+    assert "bot_cache_hits_total 1" in lines
+    # Every sample line belongs to a declared metric
+    declared = {line.split()[2] for line in lines if line.startswith("# TYPE")}
+    for line in lines:
+        if not line.startswith("#"):
+            name = line.split("{")[0].split()[0]
+            assert any(name == base or name in (f"{base}_sum", f"{base}_count") for base in declared), line
+
+
+def test_write_prometheus_replaces_the_file(tmp_path):
+    path = tmp_path / "chatbot.prom"
+    path.write_text("stale")
+    metrics = TurnMetrics()
+    metrics.record_turn(turn(0.4, 2.0))
+    metrics.write_prometheus(str(path))
+    assert path.read_text() == metrics.to_prometheus()
+    assert [p.name for p in tmp_path.iterdir()] == ["chatbot.prom"]
+
+
+def test_run_profile_keeps_the_first_run_apart():
+    profile = RunProfile()
+    profile.record_run({"imports": 2.0, "chat": 0.5})
+    profile.record_run({"chat": 0.1})
+    profile.record_run({"chat": 0.3, "dashboard": 0.2})
+
+    summary = profile.summary()
+    assert summary["imports"] == {"first": 2.0, 0.5: None, 0.95: None, 0.99: None}
+    assert summary["chat"]["first"] == 0.5
+    assert summary["chat"][0.5] == 0.3
+    assert summary["dashboard"]["first"] is None
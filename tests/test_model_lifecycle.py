@@ -0,0 +1,76 @@
+import threading
+import time
+
+from model_lifecycle import ModelLifecycle
+
+
+class SlowClient:
+    """/api/ps answers only once ``release`` is set"""
+
+    base_url = "http://ollama"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.ps_calls = 0
+
+    def ps(self):
+        self.ps_calls += 1
+        self.release.wait(5)
+        return {"models": [{"name": "llama3.2:latest", "expires_at": "later"}]}
+
+    def chat(self, payload):
+        return {"load_duration": 2e9}
+
+
+class FakeChatbot:
+    model = "llama3.2:latest"
+    system_prompt = "You are helpful."
+
+    def __init__(self, client):
+        self.client = client
+
+    def with_load_options(self, payload):
+        return payload
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.01)
+
+
+def test_monitored_status_never_blocks_on_ollama():
+    client = SlowClient()
+    lifecycle = ModelLifecycle(FakeChatbot(client), status_ttl=0.05)
+    lifecycle.monitor()
+    wait_until(lambda: client.ps_calls == 1)
+
+    started = time.perf_counter()
+    assert lifecycle.status() == []
+    assert lifecycle.ensure_warm() is False
+    assert time.perf_counter() - started < 0.5
+
+    client.release.set()
+    wait_until(lambda: lifecycle.status() != [])
+    assert lifecycle.status()[0]["loaded"] is True
+
+
+def test_warm_up_result_reaches_the_monitored_status():
+    client = SlowClient()
+    client.release.set()
+    lifecycle = ModelLifecycle(FakeChatbot(client), status_ttl=60)
+    lifecycle.monitor()
+    wait_until(lambda: lifecycle.status() != [])
+
+    lifecycle.warm_up()
+    wait_until(lambda: lifecycle.status()[0].get("load_seconds") == 2.0)
+
+
+def test_unmonitored_status_is_cached_for_the_ttl():
+    client = SlowClient()
+    client.release.set()
+    lifecycle = ModelLifecycle(FakeChatbot(client), status_ttl=60)
+    lifecycle.status()
+    lifecycle.status()
+    assert client.ps_calls == 1
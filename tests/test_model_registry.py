@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip("vosk")
+
+from model_registry import ModelRegistry, RecognizerPool
+
+
+class FakeRecognizer:
+    def __init__(self, model, sample_rate):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.resets = 0
+
+    def Reset(self):
+        self.resets += 1
+
+
+def make_registry(**config):
+    config.setdefault("models", {
+        "en": {"path": "models/en", "sampleRates": [16000, 8000]},
+        "de": {"path": "models/de", "sampleRates": [16000]},
+    })
+    return ModelRegistry(config, model_factory=lambda path: path, recognizer_factory=FakeRecognizer)
+
+
+def test_pool_builds_a_recognizer_on_miss():
+    pool = RecognizerPool("model", 16000, size=1, recognizer_factory=FakeRecognizer)
+    first = pool.acquire()
+    second = pool.acquire()
+    assert first is not second
+    stats = pool.stats()
+    assert (stats["hits"], stats["misses"], stats["inUse"], stats["idle"]) == (1, 1, 2, 0)
+
+
+def test_release_resets_and_keeps_only_size_idle():
+    pool = RecognizerPool("model", 16000, size=1, recognizer_factory=FakeRecognizer)
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+    assert first.resets == 1 and second.resets == 1
+    assert pool.stats()["idle"] == 1
+    assert pool.stats()["inUse"] == 0
+    assert pool.acquire() is first
+
+
+def test_discard_drops_the_recognizer():
+    pool = RecognizerPool("model", 16000, size=1, recognizer_factory=FakeRecognizer)
+    recognizer = pool.acquire()
+    pool.discard(recognizer)
+    assert pool.stats()["inUse"] == 0
+    assert pool.stats()["idle"] == 0
+    assert pool.acquire() is not recognizer
+
+
+def test_pool_for_input_prefers_a_matching_rate():
+    registry = make_registry()
+    pool = registry.pool_for_input("en", 8000)
+    assert pool.sample_rate == 8000
+    assert pool.model == "models/en"
+
+
+def test_pool_for_input_falls_back_to_default_rate():
+    registry = make_registry()
+    assert registry.pool_for_input("en", 44100).sample_rate == 16000
+    assert registry.pool_for_input("de", 8000).sample_rate == 16000
+    assert registry.pool_for_input(None, None) is registry.pool("en")
+
+
+def test_unknown_model_and_rate_raise_key_error():
+    registry = make_registry()
+    with pytest.raises(KeyError):
+        registry.pool_for_input("fr", 16000)
+    with pytest.raises(KeyError):
+        registry.pool("de", 8000)
+
+
+def test_legacy_config_registers_default_model():
+    registry = ModelRegistry(
+        {"voskModelPath": "models/en", "sampleRate": 8000, "recognizerPoolSize": 2},
+        model_factory=lambda path: path,
+        recognizer_factory=FakeRecognizer,
+    )
+    assert registry.describe() == {"default": [8000]}
+    assert registry.pool().stats()["idle"] == 2
@@ -0,0 +1,78 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ollama_client import OllamaClient, OllamaConnectionError, OllamaHTTPError, OllamaTimeoutError
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """Streams one good chunk, then misbehaves as selected by the request path"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._chunk(json.dumps({"message": {"content": "Hi"}, "done": False}).encode() + b"\n")
+        mode = self.server.mode
+        if mode == "stall":
+            time.sleep(1.0)
+        elif mode == "malformed":
+            self._chunk(b"{not json\n")
+        elif mode == "drop":
+            self.close_connection = True
+            return
+        self._chunk(json.dumps({"message": {"content": ""}, "done": True}).encode() + b"\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), StreamHandler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def stream_all(server, mode, read_timeout=5.0):
+    server.mode = mode
+    client = OllamaClient(f"http://127.0.0.1:{server.server_port}", read_timeout=read_timeout, max_retries=0)
+    try:
+        return [chunk["message"]["content"] for chunk in client.chat_stream({"model": "m", "messages": []})]
+    finally:
+        client.close()
+
+
+def test_stream_completes(server):
+    assert stream_all(server, "ok") == ["Hi", ""]
+
+
+def test_stalled_stream_raises_timeout(server):
+    with pytest.raises(OllamaTimeoutError):
+        stream_all(server, "stall", read_timeout=0.2)
+
+
+def test_malformed_line_raises_http_error(server):
+    with pytest.raises(OllamaHTTPError):
+        stream_all(server, "malformed")
+
+
+def test_dropped_stream_raises_connection_error(server):
+    with pytest.raises(OllamaConnectionError):
+        stream_all(server, "drop")
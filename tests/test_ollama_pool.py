@@ -0,0 +1,191 @@
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import ollama_pool
+from local_chatbot import LocalChatbot
+from ollama_client import OllamaConnectionError, OllamaHTTPError
+from ollama_pool import OllamaPool
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """/api/chat that answers with the server's name, misbehaving as set by ``server.mode``"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        self.server.requests += 1
+        self.server.arrived.set()
+        self.server.gate.wait(5)
+        mode = self.server.mode
+        if mode == "error":
+            body = json.dumps({"error": "overloaded"}).encode()
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        if not payload.get("stream"):
+            body = json.dumps({"message": {"content": self.server.name}, "done": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self._chunk({"message": {"content": self.server.name}, "done": False})
+        if mode == "drop":
+            self.close_connection = True
+            return
+        self._chunk({"message": {"content": ""}, "done": True})
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _chunk(self, data):
+        line = json.dumps(data).encode() + b"\n"
+        self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+        self.wfile.flush()
+
+
+def start_server(name):
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ChatHandler)
+    httpd.daemon_threads = True
+    httpd.name = name
+    httpd.mode = "ok"
+    httpd.requests = 0
+    httpd.arrived = threading.Event()
+    httpd.gate = threading.Event()
+    httpd.gate.set()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd
+
+
+def closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def servers():
+    started = [start_server("a"), start_server("b")]
+    yield started
+    for httpd in started:
+        httpd.gate.set()
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def make_pool(ports, **options):
+    return OllamaPool(
+        [f"http://127.0.0.1:{port}" for port in ports],
+        health_interval=0,
+        connect_timeout=1.0,
+        read_timeout=5.0,
+        **options,
+    )
+
+
+def stream_text(pool, session_id=None, timings=None):
+    chunks = pool.chat_stream({"model": "m", "messages": []}, timings=timings, session_id=session_id)
+    return "".join(chunk["message"]["content"] for chunk in chunks)
+
+
+def test_busy_backend_is_skipped_for_the_least_outstanding(servers):
+    for httpd in servers:
+        httpd.gate.clear()
+    pool = make_pool([httpd.server_port for httpd in servers])
+    results = []
+    first = threading.Thread(target=lambda: results.append(pool.chat({"model": "m", "messages": []})))
+    first.start()
+    deadline = time.monotonic() + 5
+    while not any(httpd.requests for httpd in servers) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    busy = next(httpd for httpd in servers if httpd.requests)
+    second = threading.Thread(target=lambda: results.append(pool.chat({"model": "m", "messages": []})))
+    second.start()
+    idle = next(httpd for httpd in servers if httpd is not busy)
+    assert idle.arrived.wait(5)
+    for httpd in servers:
+        httpd.gate.set()
+    first.join(5)
+    second.join(5)
+    assert sorted(result["message"]["content"] for result in results) == ["a", "b"]
+    assert all(stats["outstanding"] == 0 for stats in pool.stats().values())
+    pool.close()
+
+
+def test_session_sticks_until_its_backend_goes_down(servers):
+    pool = make_pool([httpd.server_port for httpd in servers])
+    home = stream_text(pool, session_id="s1")
+    for _ in range(5):
+        assert stream_text(pool, session_id="s1") == home
+
+    home_server = next(httpd for httpd in servers if httpd.name == home)
+    home_server.mode = "error"
+    moved = stream_text(pool, session_id="s1")
+    assert moved != home
+    # The old backend is marked down, so the session stays on its new one
+    home_server.mode = "ok"
+    assert stream_text(pool, session_id="s1") == moved
+    pool.close()
+
+
+def test_stream_fails_over_before_the_first_chunk(servers, monkeypatch):
+    # Ties go to the first backend, which refuses connections
+    monkeypatch.setattr(ollama_pool.random, "choice", lambda backends: backends[0])
+    pool = make_pool([closed_port(), servers[0].server_port])
+    timings = {}
+    assert stream_text(pool, timings=timings) == "a"
+    assert timings["backend"].endswith(str(servers[0].server_port))
+    stats = list(pool.stats().values())
+    assert stats[0]["failures"] == 1 and not stats[0]["available"]
+    pool.close()
+
+
+def test_stream_does_not_fail_over_after_the_first_chunk(servers):
+    servers[0].mode = "drop"
+    servers[1].mode = "drop"
+    pool = make_pool([httpd.server_port for httpd in servers])
+    received = []
+    with pytest.raises(OllamaConnectionError):
+        for chunk in pool.chat_stream({"model": "m", "messages": []}):
+            received.append(chunk["message"]["content"])
+    # Only the backend that started the reply was asked
+    assert len(received) == 1
+    assert sum(httpd.requests for httpd in servers) == 1
+    pool.close()
+
+
+def test_all_backends_failing_raises_the_last_error(servers):
+    for httpd in servers:
+        httpd.mode = "error"
+    pool = make_pool([httpd.server_port for httpd in servers])
+    with pytest.raises(OllamaHTTPError):
+        pool.chat({"model": "m", "messages": []})
+    assert [httpd.requests for httpd in servers] == [1, 1]
+    pool.close()
+
+
+def test_summaries_go_to_the_session_backend(servers):
+    pool = make_pool([httpd.server_port for httpd in servers])
+    home = stream_text(pool, session_id="s1")
+    home_server = next(httpd for httpd in servers if httpd.name == home)
+    before = home_server.requests
+    chatbot = LocalChatbot("m", client=pool)
+    for _ in range(4):
+        chatbot.summarize("", [{"role": "user", "content": "hi"}], session_id="s1")
+    assert home_server.requests == before + 4
+    pool.close()
@@ -0,0 +1,97 @@
+import os
+import sys
+
+import pytest
+
+from piper_pool import PiperPool
+
+
+def test_pool_starts_nothing_until_first_request():
+    pool = PiperPool({}, size=2)
+    assert pool.idle.qsize() == 2
+    assert not any(worker.alive() for worker in list(pool.idle.queue))
+
+
+def test_failed_start_keeps_worker_available():
+    pool = PiperPool({}, size=1)
+    for _ in range(3):
+        with pytest.raises(RuntimeError, match="Piper path"):
+            pool.synthesize("hello")
+    assert pool.idle.qsize() == 1
+
+
+def test_acquire_times_out_when_all_workers_busy():
+    pool = PiperPool({}, size=1)
+    pool.idle.get_nowait()
+    with pytest.raises(RuntimeError, match="free in time"):
+        pool.acquire(timeout=0.01)
+
+
+FAKE_PIPER = r'''
+import json
+import sys
+import time
+import wave
+
+args = sys.argv[1:]
+delay = float(args[args.index("-m") + 1])
+assert "--json-input" in args and "--output_dir" in args
+for line in sys.stdin:
+    request = json.loads(line)
+    if request["text"] == "crash":
+        sys.stderr.write("voice model failed\n")
+        sys.exit(1)
+    # Log completion first, then finish the audio late, as a slow pipe flush would
+    sys.stderr.write("Real-time factor: 0.1\n")
+    sys.stderr.flush()
+    time.sleep(delay)
+    with wave.open(request["output_file"], "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(22050)
+        wav.writeframes(request["text"].encode("utf-8") * 2000)
+    print(request["output_file"], flush=True)
+'''
+
+
+@pytest.fixture
+def fake_piper(tmp_path):
+    script = tmp_path / "piper"
+    script.write_text(f"#!{sys.executable}\n{FAKE_PIPER}")
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_utterances_end_at_piper_reporting_the_file(fake_piper):
+    pool = PiperPool({"piperPath": fake_piper, "piperModelPath": "0.2"}, size=1)
+    try:
+        # Each request gets exactly its own audio even though stderr reported completion early
+        assert pool.synthesize_pcm("first") == b"first" * 2000
+        assert pool.synthesize_pcm("second  utterance") == b"second utterance" * 2000
+        worker = pool.acquire()
+        assert os.listdir(worker.directory) == []
+        pool.release(worker)
+    finally:
+        pool.close()
+
+
+def test_slow_utterance_times_out_and_the_worker_restarts(fake_piper):
+    pool = PiperPool({"piperPath": fake_piper, "piperModelPath": "0.5"}, size=1)
+    try:
+        worker = pool.acquire()
+        with pytest.raises(RuntimeError, match="in time"):
+            worker.synthesize("slow", timeout=0.1)
+        pool.release(worker)
+        assert pool.synthesize_pcm("next") == b"next" * 2000
+        assert pool.restarts == 1
+    finally:
+        pool.close()
+
+
+def test_piper_exit_is_reported_with_its_last_error(fake_piper):
+    pool = PiperPool({"piperPath": fake_piper, "piperModelPath": "0"}, size=1)
+    try:
+        with pytest.raises(RuntimeError, match="voice model failed"):
+            pool.synthesize_pcm("crash")
+    finally:
+        pool.close()
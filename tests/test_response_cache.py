@@ -0,0 +1,75 @@
+import response_cache
+from response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def key(text, temperature=0.2):
+    return ResponseCache.make_key("llama3.2", [{"role": "user", "content": text}], {"temperature": temperature})
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    cache = ResponseCache(ttl=60)
+    cache.put(key("hi"), "hello")
+
+    clock.now += 59
+    assert cache.get(key("hi")) == "hello"
+    clock.now += 2
+    assert cache.get(key("hi")) is None
+    assert cache.stats == {"hits": 1, "misses": 1, "bypasses": 0}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResponseCache(max_entries=2)
+    cache.put(key("a"), "A")
+    cache.put(key("b"), "B")
+    assert cache.get(key("a")) == "A"
+    cache.put(key("c"), "C")
+
+    assert cache.get(key("b")) is None
+    assert cache.get(key("a")) == "A"
+    assert cache.get(key("c")) == "C"
+
+
+def test_keys_ignore_whitespace_but_not_options():
+    assert key("hello   there") == key(" hello there ")
+    assert key("hello", temperature=0.2) != key("hello", temperature=0.3)
+
+
+def test_high_temperature_bypasses_the_cache():
+    cache = ResponseCache(max_temperature=0.7)
+    assert cache.cacheable({"temperature": 0.7})
+    assert not cache.cacheable({"temperature": 0.9})
+    assert cache.stats["bypasses"] == 1
+
+
+def test_sqlite_tier_survives_a_reopen(tmp_path):
+    db_path = str(tmp_path / "responses.db")
+    ResponseCache(db_path=db_path).put(key("hi"), "hello")
+
+    reopened = ResponseCache(db_path=db_path)
+    assert reopened.get(key("hi")) == "hello"
+    # Promoted into memory on the way out
+    assert key("hi") in reopened._memory
+
+
+def test_sqlite_tier_keeps_only_the_newest_rows(tmp_path, monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    db_path = str(tmp_path / "responses.db")
+    cache = ResponseCache(max_entries=1, db_path=db_path, max_disk_entries=2)
+    for text in ("a", "b", "c"):
+        clock.now += 1
+        cache.put(key(text), text.upper())
+
+    reopened = ResponseCache(db_path=db_path)
+    assert reopened.get(key("a")) is None
+    assert [reopened.get(key(text)) for text in ("b", "c")] == ["B", "C"]
@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from ollama_client import OllamaConnectionError, OllamaHTTPError
+from semantic_memory import FallbackEmbedder, HashingEmbedder, SemanticMemory, VectorIndex, sweep
+
+
+def unit_rows(count, dim, seed=0):
+    vectors = np.random.default_rng(seed).standard_normal((count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_search_matches_brute_force_across_blocks(tmp_path):
+    vectors = unit_rows(50, 8)
+    index = VectorIndex(str(tmp_path), dtype="float32", block_rows=7)
+    index.add(vectors, [{"row": row} for row in range(50)])
+    queries = unit_rows(3, 8, seed=1)
+
+    results = index.search(queries, k=5)
+
+    expected = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+    for hits, rows in zip(results, expected):
+        assert [row for _, row in hits] == list(rows)
+        scores = [score for score, _ in hits]
+        assert scores == sorted(scores, reverse=True)
+
+
+def test_search_limit_and_edge_cases(tmp_path):
+    vectors = np.eye(4, dtype=np.float32)
+    index = VectorIndex(str(tmp_path))
+    assert index.search(vectors[0], k=3) == [[]]
+    index.add(vectors, [{"row": row} for row in range(4)])
+
+    assert [row for _, row in index.search(vectors[3], k=10)[0]][0] == 3
+    assert len(index.search(vectors[3], k=10)[0]) == 4
+    assert all(row < 2 for _, row in index.search(vectors[3], k=10, limit=2)[0])
+    assert index.search(vectors[0], k=0) == [[]]
+    # A zero query scores every row 0 instead of dividing by zero
+    assert all(score == 0.0 for score, _ in index.search(np.zeros(4), k=2)[0])
+
+
+def test_records_are_read_back_after_reopening(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.add(np.eye(3, dtype=np.float32), [{"text": "één"}, {"text": "two"}, {"text": "three"}])
+
+    reopened = VectorIndex(str(tmp_path))
+    assert len(reopened) == 3
+    assert reopened.records([2, 0]) == [{"text": "three"}, {"text": "één"}]
+
+
+def test_torn_append_is_trimmed_on_open(tmp_path):
+    index = VectorIndex(str(tmp_path))
+    index.add(np.eye(3, dtype=np.float32)[:2], [{"text": "one"}, {"text": "two"}])
+    with open(index.meta_path, "ab") as handle:
+        handle.write(b'{"text": "thr')
+    with open(index.vectors_path, "ab") as handle:
+        handle.write(np.ones(3, dtype=np.float16).tobytes())
+
+    reopened = VectorIndex(str(tmp_path))
+    assert len(reopened) == 2
+    reopened.add(np.eye(3, dtype=np.float32)[2:], [{"text": "three"}])
+    assert reopened.records([0, 1, 2]) == [{"text": "one"}, {"text": "two"}, {"text": "three"}]
+
+
+def test_recall_returns_relevant_turns_oldest_first(tmp_path):
+    memory = SemanticMemory(HashingEmbedder(), str(tmp_path), min_score=0.15)
+    memory.add_turns([
+        {"user": "my cat is called Miso", "bot": "Miso is a lovely name for a cat"},
+        {"user": "what is the capital of France", "bot": "Paris"},
+        {"user": "recommend a cat toy", "bot": "a feather wand"},
+    ])
+
+    recalled = memory.recall("a toy for Miso the cat", k=3)
+    assert [turn["user"] for turn in recalled] == ["my cat is called Miso", "recommend a cat toy"]
+    assert memory.recall("a toy for Miso the cat", k=3, skip_recent=3) == []
+
+
+def test_index_directory_exists_only_while_it_has_rows(tmp_path):
+    directory = tmp_path / "session"
+    index = VectorIndex(str(directory))
+    assert not directory.exists()
+    index.add(np.eye(3, dtype=np.float32), [{"row": row} for row in range(3)])
+    assert directory.exists()
+
+    index.clear()
+    assert not directory.exists()
+    assert len(index) == 0
+    index.add(np.eye(3, dtype=np.float32)[:1], [{"row": 0}])
+    assert len(VectorIndex(str(directory))) == 1
+
+
+def test_sweep_removes_only_idle_indexes(tmp_path):
+    for name in ("old", "recent"):
+        VectorIndex(str(tmp_path / name)).add(np.eye(2, dtype=np.float32), [{"row": 0}, {"row": 1}])
+    stale = time.time() - 3 * 3600
+    for child in os.scandir(tmp_path / "old"):
+        os.utime(child.path, (stale, stale))
+
+    assert sweep(str(tmp_path), 3600) == 1
+    assert sorted(os.listdir(tmp_path)) == ["recent"]
+    assert sweep(str(tmp_path / "missing"), 3600) == 0
+
+
+class GatedEmbedClient:
+    """/api/embed stand-in that answers once released, or fails with ``error``"""
+
+    def __init__(self, error=None):
+        self.error = error
+        self.release = threading.Event()
+
+    def embed(self, payload):
+        self.release.wait(5)
+        if self.error:
+            raise self.error
+        return {"embeddings": [[1.0, 0.0, 0.0] for _ in payload["input"]]}
+
+
+def test_fallback_embedder_checks_the_model_in_the_background():
+    client = GatedEmbedClient()
+    embedder = FallbackEmbedder(client, "nomic-embed-text")
+    # Creating the embedder did not wait for the check
+    assert not embedder._checked.is_set()
+    client.release.set()
+    assert embedder.embed(["hello"]).shape == (1, 3)
+    assert embedder.fallback_reason is None
+
+
+def test_fallback_embedder_falls_back_when_the_model_is_missing():
+    client = GatedEmbedClient(OllamaHTTPError('model "nomic-embed-text" not found', 404))
+    client.release.set()
+    embedder = FallbackEmbedder(client, "nomic-embed-text")
+    assert embedder.embed(["hello"]).shape == (1, HashingEmbedder().dim)
+    assert "not found" in embedder.fallback_reason
+
+
+def test_fallback_embedder_keeps_the_model_while_ollama_is_down():
+    client = GatedEmbedClient(OllamaConnectionError("refused"))
+    client.release.set()
+    embedder = FallbackEmbedder(client, "nomic-embed-text")
+    embedder._checked.wait(5)
+    assert embedder.fallback_reason is None
+    client.error = None
+    assert embedder.embed(["hello"]).shape == (1, 3)
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from stt_decoder import DecodeStream, PartialEmitter
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(json.loads(message))
+
+
+class FakeRecognizer:
+    """Vosk-like recognizer; frames are bytes and the partial is their concatenation"""
+
+    def __init__(self, fail_on=None, gate=None):
+        self.text = b""
+        self.fail_on = fail_on
+        self.gate = gate
+
+    def AcceptWaveform(self, frame):
+        if self.gate is not None:
+            self.gate.wait()
+        if frame == self.fail_on:
+            raise RuntimeError("bad frame")
+        self.text += frame
+
+    def PartialResult(self):
+        return json.dumps({"partial": self.text.decode()})
+
+    def FinalResult(self):
+        return json.dumps({"text": self.text.decode()})
+
+
+class Disconnected(Exception):
+    pass
+
+
+def test_empty_partial_keeps_pending_hypothesis():
+    async def scenario():
+        socket = FakeSocket()
+        emitter = PartialEmitter(socket, min_interval=10.0)
+        await emitter.update("hello")
+        await emitter.update("hello there")
+        await emitter.update("")
+        await emitter.flush()
+        return socket.sent
+
+    sent = asyncio.run(scenario())
+    assert [message["text"] for message in sent] == ["hello", "hello there"]
+
+
+def test_reverting_to_last_sent_drops_pending():
+    async def scenario():
+        socket = FakeSocket()
+        emitter = PartialEmitter(socket, min_interval=10.0)
+        await emitter.update("hello")
+        await emitter.update("hello the")
+        await emitter.update("hello")
+        await emitter.flush()
+        return socket.sent
+
+    sent = asyncio.run(scenario())
+    assert [message["text"] for message in sent] == ["hello"]
+
+
+def test_decode_stream_returns_final_after_queued_frames():
+    async def scenario():
+        partials = []
+
+        async def on_partial(text):
+            partials.append(text)
+
+        with ThreadPoolExecutor(1) as executor:
+            stream = DecodeStream(FakeRecognizer(), executor, on_partial, max_pending=2)
+            for frame in (b"a", b"b", b"c"):
+                await stream.feed(frame)
+            final = await asyncio.wait_for(stream.finish(), 5)
+        return partials, final
+
+    partials, final = asyncio.run(scenario())
+    assert partials == ["a", "ab", "abc"]
+    assert final == "abc"
+
+
+def test_decoder_error_reaches_a_blocked_feed():
+    async def scenario():
+        async def on_partial(text):
+            pass
+
+        with ThreadPoolExecutor(1) as executor:
+            stream = DecodeStream(FakeRecognizer(fail_on=b"x"), executor, on_partial, max_pending=1)
+            with pytest.raises(RuntimeError, match="bad frame"):
+                # The queue is full long before the feeding stops; without the
+                # task check one of these puts would wait forever
+                for _ in range(10):
+                    await asyncio.wait_for(stream.feed(b"x"), 5)
+            with pytest.raises(RuntimeError, match="bad frame"):
+                await asyncio.wait_for(stream.finish(), 5)
+
+    asyncio.run(scenario())
+
+
+def test_client_disconnect_stops_feed_and_finish():
+    async def scenario():
+        async def on_partial(text):
+            raise Disconnected()
+
+        with ThreadPoolExecutor(1) as executor:
+            stream = DecodeStream(FakeRecognizer(), executor, on_partial, max_pending=1)
+            with pytest.raises(Disconnected):
+                for _ in range(10):
+                    await asyncio.wait_for(stream.feed(b"a"), 5)
+            with pytest.raises(Disconnected):
+                await asyncio.wait_for(stream.finish(), 5)
+
+    asyncio.run(scenario())
+
+
+def test_feed_blocks_while_the_queue_is_full():
+    async def scenario():
+        gate = threading.Event()
+
+        async def on_partial(text):
+            pass
+
+        with ThreadPoolExecutor(1) as executor:
+            stream = DecodeStream(FakeRecognizer(gate=gate), executor, on_partial, max_pending=2)
+            # One frame is taken by the decoder (parked on the gate), two fill the queue
+            await stream.feed(b"a")
+            await asyncio.sleep(0.1)
+            for frame in (b"b", b"c"):
+                await asyncio.wait_for(stream.feed(frame), 5)
+            blocked = asyncio.ensure_future(stream.feed(b"d"))
+            await asyncio.sleep(0.1)
+            was_blocked = not blocked.done()
+            gate.set()
+            await asyncio.wait_for(blocked, 5)
+            final = await asyncio.wait_for(stream.finish(), 5)
+        return was_blocked, final
+
+    was_blocked, final = asyncio.run(scenario())
+    assert was_blocked
+    assert final == "abcd"
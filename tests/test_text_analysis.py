@@ -0,0 +1,38 @@
+from text_analysis import NEGATIVE, NEUTRAL, POSITIVE, analyze, analyze_batch
+
+
+def test_keywords_match_whole_words_only():
+    # "crusade" contains "sad" and "this" contains "hi"
+    result = analyze("Tell me about this crusade")
+    assert result["sentiment"] == NEUTRAL
+    assert result["intent"] == "statement"
+    assert analyze("The goodness of the highway")["sentiment"] == NEUTRAL
+
+
+def test_whole_word_hits_are_counted():
+    assert analyze("hi, I am sad")["sentiment"] == NEGATIVE
+    assert analyze("hi, I am sad")["intent"] == "greeting"
+    assert analyze("This is GREAT!")["sentiment"] == POSITIVE
+
+
+def test_each_keyword_counts_once_and_phrases_win():
+    # Two "bad" against one "good" is still a tie, as in the original scan
+    assert analyze("bad bad good")["sentiment"] == NEUTRAL
+    result = analyze("thank you for the help")
+    assert result["sentiment"] == POSITIVE
+    assert result["intent"] == "help_request"
+
+
+def test_intent_falls_back_to_question_or_statement():
+    assert analyze("What time is it?")["intent"] == "question"
+    assert analyze("It is late")["intent"] == "statement"
+
+
+def test_entities_are_extracted_in_kind_order():
+    result = analyze("Call 555-123-4567 or mail me@example.com, see https://example.com/docs")
+    assert result["entities"] == ["📧 me@example.com", "🔗 https://example.com/docs", "📱 555-123-4567"]
+
+
+def test_batch_agrees_with_single_analysis():
+    texts = ["hi there", "this crusade is awful", "thanks!", "mail a@b.io?", ""]
+    assert analyze_batch(texts) == [analyze(text) for text in texts]
@@ -0,0 +1,72 @@
+import os
+
+from tts_cache import CachedTTS, TTSCache
+
+
+class CountingTTS:
+    def __init__(self):
+        self.calls = []
+
+    def synthesize(self, text):
+        self.calls.append(text)
+        return f"wav:{text}".encode("utf-8")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TTSCache(None, "voice", memory_entries=2)
+    cache.put("one", b"1")
+    cache.put("two", b"2")
+    assert cache.get("one") == b"1"
+    cache.put("three", b"3")
+    assert cache.get("two") is None
+    assert cache.get("one") == b"1"
+    assert cache.get("three") == b"3"
+    assert cache.summary()["diskEntries"] == 0
+
+
+def test_keys_ignore_whitespace_but_not_voice():
+    cache = TTSCache(None, "voice-a")
+    assert cache.key("hello  world") == cache.key(" hello world ")
+    assert cache.key("hello") != TTSCache(None, "voice-b").key("hello")
+
+
+def test_disk_tier_evicts_by_size(tmp_path):
+    cache = TTSCache(str(tmp_path), "voice", memory_entries=0, max_disk_bytes=10)
+    cache.put("one", b"1111")
+    cache.put("two", b"2222")
+    cache.put("three", b"3333")
+    summary = cache.summary()
+    assert (summary["diskEntries"], summary["diskBytes"], summary["evictions"]) == (2, 8, 1)
+    assert cache.get("one") is None
+    assert cache.get("three") == b"3333"
+    assert sorted(os.listdir(tmp_path)) == sorted(f"{cache.key(text)}.wav" for text in ("two", "three"))
+
+
+def test_disk_index_survives_reopen_in_lru_order(tmp_path):
+    cache = TTSCache(str(tmp_path), "voice", memory_entries=0, max_disk_bytes=100)
+    for age, text in enumerate(("old", "middle", "new")):
+        cache.put(text, text.encode("utf-8"))
+        os.utime(cache._path(cache.key(text)), (1000 + age, 1000 + age))
+    (tmp_path / "partial.tmp").write_bytes(b"x")
+
+    reopened = TTSCache(str(tmp_path), "voice", memory_entries=0, max_disk_bytes=12)
+    assert reopened.summary()["diskEntries"] == 3
+    assert not (tmp_path / "partial.tmp").exists()
+    assert reopened.get("middle") == b"middle"
+    reopened.put("newest", b"newest")
+    # "old" was least recently used; "middle" was touched by the hit above
+    assert reopened.get("old") is None
+    assert reopened.get("new") is None
+    assert reopened.get("middle") == b"middle"
+
+
+def test_read_only_wrapper_serves_but_does_not_store():
+    tts = CountingTTS()
+    cached = CachedTTS(tts, TTSCache(None, "voice"))
+    cached.synthesize("Hello.")
+    replies = cached.read_only()
+    assert replies.synthesize("Hello.") == b"wav:Hello."
+    replies.synthesize("A one-off reply.")
+    replies.synthesize("A one-off reply.")
+    assert tts.calls == ["Hello.", "A one-off reply.", "A one-off reply."]
+    assert not cached.cache.contains("A one-off reply.")
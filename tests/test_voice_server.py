@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("vosk")
+pytest.importorskip("websockets")
+
+import voice_server
+from context_window import ContextWindow
+from ollama_client import OllamaHTTPError
+
+
+class FakeSocket:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    def messages(self):
+        return [json.loads(message) for message in self.sent if isinstance(message, str)]
+
+
+class FakeChatbot:
+    system_prompt = "You are helpful."
+
+    def turn_notes(self, sentiment):
+        return []
+
+    def summarize(self, previous, messages, session_id=None):
+        return ""
+
+
+class FailingEngine:
+    chatbot = FakeChatbot()
+
+    async def stream(self, session_id, messages):
+        yield "Hello there. "
+        raise OllamaHTTPError("Ollama returned HTTP 500", 500)
+
+
+class FakeTTS:
+    def synthesize(self, text):
+        return b"RIFF"
+
+
+def test_converse_reports_ollama_failure_instead_of_hanging():
+    socket = FakeSocket()
+    history = []
+
+    async def scenario():
+        await asyncio.wait_for(
+            voice_server.run_converse(
+                socket, "hi", FailingEngine(), ContextWindow(lambda previous, messages: ""), "s1", history, FakeTTS()
+            ),
+            timeout=5,
+        )
+
+    asyncio.run(scenario())
+    messages = socket.messages()
+    assert messages[0] == {"type": "reply_delta", "text": "Hello there. "}
+    assert messages[1]["type"] == "tts_chunk" and messages[1]["text"] == "Hello there."
+    assert messages[-1] == {"type": "error", "message": "Ollama returned HTTP 500"}
+    assert not any(message["type"] in ("reply_end", "tts_end") for message in messages)
+
+
+def test_number_field_rejects_non_numbers():
+    data = {"sampleRate": "44100", "channels": {"n": 2}, "partialIntervalMs": 50.5, "flag": True}
+    assert voice_server.number_field(data, "sampleRate") == 44100
+    assert voice_server.number_field(data, "missing", 1) == 1
+    assert voice_server.number_field(data, "partialIntervalMs", kind=float) == 50.5
+    for name in ("channels", "flag"):
+        with pytest.raises(ValueError, match=name):
+            voice_server.number_field(data, name)
+    with pytest.raises(ValueError, match="sampleRate"):
+        voice_server.number_field({"sampleRate": "fast"}, "sampleRate")
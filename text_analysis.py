@@ -0,0 +1,98 @@
+import re
+from typing import Dict, Iterable, List
+
+POSITIVE = "😊 Positive"
+NEGATIVE = "😟 Negative"
+NEUTRAL = "😐 Neutral"
+
+SENTIMENT_KEYWORDS = {
+    "positive": ["good", "great", "excellent", "happy", "love", "wonderful", "amazing", "thank", "thanks"],
+    "negative": ["bad", "terrible", "hate", "angry", "sad", "awful", "worst", "disappointed"],
+}
+
+# Checked in this order; the first intent with a keyword hit wins
+INTENT_KEYWORDS = {
+    "greeting": ["hello", "hi", "hey", "greetings"],
+    "help_request": ["help", "support", "assist"],
+    "gratitude": ["thanks", "thank you", "appreciate"],
+}
+
+
+def _build_keyword_index():
+    """Map each keyword to the sentiment/intent tags it contributes"""
+    tags: Dict[str, List[str]] = {}
+    for polarity, words in SENTIMENT_KEYWORDS.items():
+        for word in words:
+            tags.setdefault(word, []).append(polarity)
+    for intent, words in INTENT_KEYWORDS.items():
+        for word in words:
+            tags.setdefault(word, []).append(intent)
+
+    # A phrase also carries the tags of its words ("thank you" is positive too)
+    for phrase in [word for word in tags if " " in word]:
+        for part in phrase.split():
+            tags[phrase].extend(tags.get(part, []))
+
+    # Longest first so "thank you" wins over "thank" at the same position
+    alternation = "|".join(re.escape(word) for word in sorted(tags, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b"), tags
+
+
+KEYWORD_RE, KEYWORD_TAGS = _build_keyword_index()
+
+ENTITY_RE = re.compile(
+    r"(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b)"
+    r"|(?P<url>http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\(\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+)"
+    r"|(?P<phone>\b\d{3}[-.]?\d{3}[-.]?\d{4}\b)"
+)
+ENTITY_PREFIXES = {"email": "📧", "url": "🔗", "phone": "📱"}
+
+
+def analyze(text: str) -> Dict:
+    """Sentiment, intent and entities from one keyword pass and one entity pass"""
+    hits = set()
+    for match in KEYWORD_RE.finditer(text.lower()):
+        hits.add(match.group())
+
+    # Each distinct keyword counts once, as in the original keyword scan
+    tags = [tag for word in hits for tag in KEYWORD_TAGS[word]]
+    pos_count = tags.count("positive")
+    neg_count = tags.count("negative")
+    if pos_count > neg_count:
+        sentiment = POSITIVE
+    elif neg_count > pos_count:
+        sentiment = NEGATIVE
+    else:
+        sentiment = NEUTRAL
+
+    intent = next((name for name in INTENT_KEYWORDS if name in tags), None)
+    if intent is None:
+        intent = "question" if "?" in text else "statement"
+
+    found = {kind: [] for kind in ENTITY_PREFIXES}
+    for match in ENTITY_RE.finditer(text):
+        found[match.lastgroup].append(match.group())
+    entities = [f"{ENTITY_PREFIXES[kind]} {value}" for kind, values in found.items() for value in values]
+
+    return {"sentiment": sentiment, "intent": intent, "entities": entities}
+
+
+def analyze_batch(texts: Iterable[str]) -> List[Dict]:
+    """Analyze many texts (e.g. an exported history) with the precompiled patterns"""
+    return [analyze(text) for text in texts]
+
+
+class ConversationAnalytics:
+    """Track and analyze conversation metrics"""
+
+    @staticmethod
+    def analyze_sentiment(text: str) -> str:
+        return analyze(text)["sentiment"]
+
+    @staticmethod
+    def detect_intent(text: str) -> str:
+        return analyze(text)["intent"]
+
+    @staticmethod
+    def extract_entities(text: str) -> List[str]:
+        return analyze(text)["entities"]
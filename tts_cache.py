@@ -0,0 +1,179 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    return " ".join(text.split())
+
+
+class TTSCache:
+    """Content-addressed WAV cache with a memory tier and an optional, size-capped disk tier
+
+    Keys hash the normalized text together with the voice model and config
+    paths, so switching voices never serves stale audio. Without a
+    ``directory`` only the memory tier is used. Disk entries are evicted least
+    recently used first, using file mtimes (touched on every hit) so the order
+    survives restarts.
+    """
+
+    def __init__(self, directory, voice_key, memory_entries=128, max_disk_bytes=256 * 1024 * 1024):
+        self.directory = directory or None
+        self.voice_key = voice_key
+        self.memory_entries = memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()
+        self.disk_bytes = 0
+        self.stats = {"memoryHits": 0, "diskHits": 0, "misses": 0, "evictions": 0}
+        if self.directory is None:
+            return
+
+        os.makedirs(directory, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".tmp"):
+                # Left behind by a write that never got renamed into place
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            elif name.endswith(".wav"):
+                stat = os.stat(path)
+                entries.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+        self.disk_bytes = sum(self._disk.values())
+
+    def key(self, text):
+        raw = f"{self.voice_key}\0{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.wav")
+
+    def contains(self, text):
+        key = self.key(text)
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def get(self, text):
+        key = self.key(text)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self.stats["memoryHits"] += 1
+                return audio
+
+            if key in self._disk:
+                try:
+                    with open(self._path(key), "rb") as handle:
+                        audio = handle.read()
+                    os.utime(self._path(key))
+                except OSError:
+                    self.disk_bytes -= self._disk.pop(key)
+                else:
+                    self._disk.move_to_end(key)
+                    self._remember(key, audio)
+                    self.stats["diskHits"] += 1
+                    return audio
+
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, text, audio):
+        key = self.key(text)
+        with self._lock:
+            self._remember(key, audio)
+            if self.directory is None or key in self._disk:
+                return
+
+        # Written outside the lock so lookups never wait on disk I/O; the rename
+        # publishes the file whole, so a reader never sees a partial WAV
+        handle, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as tmp:
+                tmp.write(audio)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            # Still served from memory; only the disk copy is lost
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if key in self._disk:
+                return
+            self._disk[key] = len(audio)
+            self.disk_bytes += len(audio)
+            while self.disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self.disk_bytes -= size
+                self.stats["evictions"] += 1
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+
+    def _remember(self, key, audio):
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def summary(self):
+        with self._lock:
+            lookups = self.stats["memoryHits"] + self.stats["diskHits"] + self.stats["misses"]
+            hits = lookups - self.stats["misses"]
+            return dict(
+                self.stats,
+                hitRate=hits / lookups if lookups else 0.0,
+                memoryEntries=len(self._memory),
+                diskEntries=len(self._disk),
+                diskBytes=self.disk_bytes,
+            )
+
+
+class CachedTTS:
+    """Drop-in wrapper around PiperPool that serves repeated phrases from TTSCache
+
+    With ``store=False`` cached phrases are still served but new audio is not
+    added, which keeps one-off text such as LLM replies from churning the cache.
+    """
+
+    def __init__(self, tts_pool, cache, store=True):
+        self.tts_pool = tts_pool
+        self.cache = cache
+        self.store = store
+
+    def read_only(self):
+        return CachedTTS(self.tts_pool, self.cache, store=False)
+
+    def synthesize(self, text):
+        audio = self.cache.get(text)
+        if audio is None:
+            audio = self.tts_pool.synthesize(text)
+            if self.store:
+                self.cache.put(text, audio)
+        return audio
+
+    def warm(self, path):
+        """Pre-synthesize one phrase per line of ``path`` that is not cached yet"""
+        warmed = 0
+        with open(path, "r", encoding="utf-8") as handle:
+            for line in handle:
+                phrase = line.strip()
+                if phrase and not self.cache.contains(phrase):
+                    self.cache.put(phrase, self.tts_pool.synthesize(phrase))
+                    warmed += 1
+        return warmed
+
+    def close(self):
+        self.tts_pool.close()
@@ -1,11 +1,28 @@
 import asyncio
+import contextlib
+import functools
 import json
+import multiprocessing
 import os
-import tempfile
-import subprocess
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
 
 import websockets
-from vosk import Model, KaldiRecognizer, SetLogLevel
+from vosk import SetLogLevel
+
+from async_engine import AsyncChatEngine
+from audio_input import AudioConverter
+from context_window import ContextWindow
+from local_chatbot import LocalChatbot
+from model_lifecycle import ModelLifecycle
+from model_registry import ModelRegistry
+from ollama_client import DEFAULT_BASE_URL, OllamaClient
+from ollama_pool import OllamaPool
+from piper_pool import PiperPool
+from stt_decoder import DecodeStream, PartialEmitter
+from text_analysis import analyze
+from tts_cache import CachedTTS, TTSCache
 
 SetLogLevel(-1)
 
@@ -17,105 +34,406 @@ def load_config():
         return json.load(handle)
 
 
-def build_recognizer(model, sample_rate):
-    return KaldiRecognizer(model, sample_rate)
+SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n\s*\n")
 
+# Sentences synthesized ahead of the one currently being sent
+TTS_LOOKAHEAD = 2
 
-def run_piper(text, config):
-    piper_path = config.get("piperPath")
-    model_path = config.get("piperModelPath")
-    model_config = config.get("piperConfigPath")
 
-    if not piper_path or not model_path:
-        raise RuntimeError("Piper path or model path is missing in voice_config.json")
+def number_field(data, name, default=None, kind=int):
+    """``data[name]`` converted with ``kind``; anything but a number (or numeric string) is a ValueError"""
+    value = data.get(name)
+    if value is None:
+        return default
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError(f"{name} must be a number")
+    try:
+        return kind(value)
+    except (ValueError, OverflowError):
+        raise ValueError(f"{name} must be a number") from None
 
-    with tempfile.TemporaryDirectory() as tmpdir:
-        out_path = os.path.join(tmpdir, "tts.wav")
-        args = [piper_path, "-m", model_path, "-f", out_path]
-        if model_config:
-            args.extend(["-c", model_config])
 
-        subprocess.run(
-            args,
-            input=text,
-            text=True,
-            check=True,
-            capture_output=True,
-        )
+def split_sentences(text):
+    return [part.strip() for part in SENTENCE_BREAK.split(text) if part and part.strip()]
 
-        with open(out_path, "rb") as handle:
-            return handle.read()
 
+async def iterate(items):
+    for item in items:
+        yield item
 
-async def handle_client(websocket, model, config):
-    recognizer = None
-    sample_rate = config.get("sampleRate", 16000)
 
-    async for message in websocket:
-        if isinstance(message, (bytes, bytearray)):
-            if not recognizer:
-                continue
-            recognizer.AcceptWaveform(message)
-            partial = json.loads(recognizer.PartialResult()).get("partial", "")
-            if partial:
-                await websocket.send(json.dumps({"type": "partial", "text": partial}))
-            continue
+async def stream_tts(websocket, sentences, tts_pool, stream_id):
+    """Synthesize an async stream of sentences and send each as its own WAV chunk
 
+    Synthesis of upcoming sentences overlaps with sending the current one. Each
+    chunk is a ``tts_chunk`` JSON header followed by one binary WAV message, and
+    the stream ends with ``tts_end``.
+    """
+    pending = asyncio.Queue(maxsize=TTS_LOOKAHEAD)
+
+    async def produce():
         try:
-            data = json.loads(message)
-        except json.JSONDecodeError:
-            await websocket.send(json.dumps({"type": "error", "message": "Invalid JSON"}))
-            continue
-
-        msg_type = data.get("type")
-
-        if msg_type == "start":
-            recognizer = build_recognizer(model, sample_rate)
-            await websocket.send(json.dumps({"type": "ready"}))
-            continue
-
-        if msg_type == "end":
-            if recognizer:
-                final_text = json.loads(recognizer.FinalResult()).get("text", "").strip()
-                await websocket.send(json.dumps({"type": "final", "text": final_text}))
-            recognizer = None
-            continue
-
-        if msg_type == "tts":
-            text = (data.get("text") or "").strip()
-            if not text:
-                await websocket.send(json.dumps({"type": "error", "message": "No TTS text"}))
+            async for sentence in sentences:
+                task = asyncio.create_task(asyncio.to_thread(tts_pool.synthesize, sentence))
+                await pending.put((sentence, task))
+        except Exception as exc:
+            # Hand a failed sentence source (e.g. Ollama erroring mid-reply) to the consumer
+            await pending.put(exc)
+            return
+        await pending.put(None)
+
+    producer = asyncio.create_task(produce())
+    seq = 0
+    try:
+        while True:
+            item = await pending.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            sentence, task = item
+            audio = await task
+            await websocket.send(json.dumps({
+                "type": "tts_chunk",
+                "id": stream_id,
+                "seq": seq,
+                "text": sentence,
+                "bytes": len(audio),
+            }))
+            await websocket.send(audio)
+            seq += 1
+        await producer
+        await websocket.send(json.dumps({"type": "tts_end", "id": stream_id, "chunks": seq}))
+    finally:
+        producer.cancel()
+        while not pending.empty():
+            item = pending.get_nowait()
+            if isinstance(item, tuple):
+                item[1].cancel()
+
+
+async def run_tts_stream(websocket, sentences, tts_pool, stream_id):
+    try:
+        await stream_tts(websocket, sentences, tts_pool, stream_id)
+    except asyncio.CancelledError:
+        with contextlib.suppress(websockets.ConnectionClosed):
+            await websocket.send(json.dumps({"type": "tts_cancelled", "id": stream_id}))
+        raise
+    except websockets.ConnectionClosed:
+        pass
+    except Exception as exc:
+        with contextlib.suppress(websockets.ConnectionClosed):
+            await websocket.send(json.dumps({"type": "error", "message": str(exc)}))
+
+
+async def reply_sentences(websocket, chat_engine, session_id, messages, history):
+    """Stream an LLM reply, forwarding text deltas and yielding completed sentences"""
+    buffer = ""
+    reply = []
+    async for token in chat_engine.stream(session_id, messages):
+        reply.append(token)
+        await websocket.send(json.dumps({"type": "reply_delta", "text": token}))
+        buffer += token
+        *sentences, buffer = SENTENCE_BREAK.split(buffer)
+        for sentence in sentences:
+            if sentence.strip():
+                yield sentence.strip()
+    if buffer.strip():
+        yield buffer.strip()
+
+    text = "".join(reply)
+    history.append({"role": "assistant", "content": text})
+    await websocket.send(json.dumps({"type": "reply_end", "text": text}))
+
+
+async def run_converse(websocket, transcript, chat_engine, context_window, session_id, history, tts_pool):
+    """Final transcript -> streaming Ollama chat -> streaming TTS on the same socket"""
+    history.append({"role": "user", "content": transcript})
+
+    # Same prompt assembly as the Streamlit app: stable system prompt, summary, turns, notes
+    notes = chat_engine.chatbot.turn_notes(analyze(transcript)["sentiment"])
+    messages = await asyncio.to_thread(
+        context_window.build, chat_engine.chatbot.system_prompt, history, notes
+    )
+
+    sentences = reply_sentences(websocket, chat_engine, session_id, messages, history)
+    if isinstance(tts_pool, CachedTTS):
+        # Replies rarely repeat word for word; serve cached phrases but do not add new ones
+        tts_pool = tts_pool.read_only()
+    await run_tts_stream(websocket, sentences, tts_pool, session_id)
+
+
+async def handle_client(websocket, registry, config, tts_pool, executor, chat_engine, lifecycle):
+    stream = None
+    recognizer = None
+    recognizer_pool = None
+    tts_task = None
+    partials = None
+    converse = False
+    session_id = f"voice-{id(websocket)}"
+    history = []
+    context_window = ContextWindow(
+        functools.partial(chat_engine.chatbot.summarize, session_id=session_id),
+        max_tokens=chat_engine.chatbot.context_tokens,
+    )
+
+    try:
+        async for message in websocket:
+            if isinstance(message, (bytes, bytearray)):
+                if not stream:
+                    continue
+                # Blocks when this connection's decode queue is full (backpressure)
+                try:
+                    await stream.feed(message)
+                except websockets.ConnectionClosed:
+                    raise
+                except Exception as exc:
+                    recognizer_pool.discard(recognizer)
+                    stream = None
+                    await websocket.send(json.dumps({"type": "error", "message": f"Decoding failed: {exc}"}))
                 continue
+
             try:
-                audio = await asyncio.to_thread(run_piper, text, config)
-                await websocket.send(audio)
-            except Exception as exc:
-                await websocket.send(json.dumps({"type": "error", "message": str(exc)}))
-            continue
+                data = json.loads(message)
+            except json.JSONDecodeError:
+                await websocket.send(json.dumps({"type": "error", "message": "Invalid JSON"}))
+                continue
+            if not isinstance(data, dict):
+                await websocket.send(json.dumps({"type": "error", "message": "Messages must be JSON objects"}))
+                continue
 
-        if msg_type == "ping":
-            await websocket.send(json.dumps({"type": "pong"}))
-            continue
+            msg_type = data.get("type")
 
-        await websocket.send(json.dumps({"type": "error", "message": "Unknown message type"}))
+            if msg_type == "start":
+                # Barge-in: the user started speaking over a reply, so stop it
+                if converse and tts_task and not tts_task.done():
+                    tts_task.cancel()
+                converse = bool(data.get("converse", False))
+                if converse:
+                    # Reload the model in the background if Ollama unloaded it since the last turn
+                    asyncio.get_running_loop().run_in_executor(None, lifecycle.ensure_warm)
+                if stream:
+                    stream.cancel()
+                    recognizer_pool.discard(recognizer)
+                    stream = None
+                # Audio at a rate the model has no recognizers for is resampled to its default rate
+                try:
+                    model = data.get("model")
+                    if model is not None and not isinstance(model, str):
+                        raise ValueError("model must be a string")
+                    sample_rate = number_field(data, "sampleRate")
+                    recognizer_pool = registry.pool_for_input(model, sample_rate)
+                    converter = AudioConverter(
+                        sample_rate or recognizer_pool.sample_rate,
+                        channels=number_field(data, "channels", 1),
+                        encoding=data.get("encoding", "pcm_s16le"),
+                        target_rate=recognizer_pool.sample_rate,
+                    )
+                    min_interval = number_field(
+                        data, "partialIntervalMs", config.get("partialIntervalMs", 100), kind=float
+                    ) / 1000
+                except KeyError as exc:
+                    await websocket.send(json.dumps({"type": "error", "message": str(exc.args[0])}))
+                    continue
+                except ValueError as exc:
+                    await websocket.send(json.dumps({"type": "error", "message": str(exc)}))
+                    continue
+                recognizer = await asyncio.get_running_loop().run_in_executor(executor, recognizer_pool.acquire)
+                if partials:
+                    partials.close()
+                partials = PartialEmitter(
+                    websocket,
+                    min_interval=min_interval,
+                    delta=bool(data.get("partialDelta", False)),
+                )
+                stream = DecodeStream(
+                    recognizer,
+                    executor,
+                    partials.update,
+                    max_pending=int(config.get("decodeQueueFrames", 32)),
+                    converter=None if converter.passthrough else converter,
+                )
+                await websocket.send(json.dumps({
+                    "type": "ready",
+                    "sampleRate": recognizer_pool.sample_rate,
+                    **converter.describe(),
+                }))
+                continue
 
+            if msg_type == "end":
+                if stream:
+                    try:
+                        final_text = await stream.finish()
+                    except websockets.ConnectionClosed:
+                        raise
+                    except Exception as exc:
+                        recognizer_pool.discard(recognizer)
+                        stream = None
+                        await websocket.send(json.dumps({"type": "error", "message": f"Decoding failed: {exc}"}))
+                        continue
+                    # The last hypothesis always reaches the client before the final
+                    await partials.flush()
+                    final = {"type": "final", "text": final_text}
+                    if converter.dropped_frames:
+                        # Opus packets that failed to decode and were skipped
+                        final["droppedFrames"] = converter.dropped_frames
+                    await websocket.send(json.dumps(final))
+                    await asyncio.get_running_loop().run_in_executor(executor, recognizer_pool.release, recognizer)
+                    if converse and final_text:
+                        if tts_task and not tts_task.done():
+                            tts_task.cancel()
+                        tts_task = asyncio.create_task(run_converse(
+                            websocket, final_text, chat_engine, context_window, session_id, history, tts_pool
+                        ))
+                stream = None
+                continue
 
-async def main():
-    config = load_config()
-    model_path = config.get("voskModelPath")
-    if not model_path:
-        raise RuntimeError("voskModelPath missing in voice_config.json")
+            if msg_type == "models":
+                await websocket.send(json.dumps({"type": "models", "models": registry.describe()}))
+                continue
+
+            if msg_type == "stats":
+                stats = {"type": "stats", "recognizers": registry.stats()}
+                if isinstance(tts_pool, CachedTTS):
+                    stats["ttsCache"] = tts_pool.cache.summary()
+                if isinstance(chat_engine.chatbot.client, OllamaPool):
+                    stats["ollama"] = chat_engine.chatbot.client.stats()
+                stats["model"] = await asyncio.to_thread(lifecycle.status)
+                await websocket.send(json.dumps(stats))
+                continue
+
+            if msg_type == "tts":
+                text = (data.get("text") or "").strip()
+                if not text:
+                    await websocket.send(json.dumps({"type": "error", "message": "No TTS text"}))
+                    continue
+                if data.get("stream"):
+                    # Only one stream per connection; a new one replaces the old
+                    if tts_task and not tts_task.done():
+                        tts_task.cancel()
+                    tts_task = asyncio.create_task(
+                        run_tts_stream(websocket, iterate(split_sentences(text)), tts_pool, data.get("id"))
+                    )
+                    continue
+                try:
+                    audio = await asyncio.to_thread(tts_pool.synthesize, text)
+                    await websocket.send(audio)
+                except Exception as exc:
+                    await websocket.send(json.dumps({"type": "error", "message": str(exc)}))
+                continue
+
+            if msg_type == "tts_cancel":
+                if tts_task and not tts_task.done():
+                    tts_task.cancel()
+                continue
 
+            if msg_type == "ping":
+                await websocket.send(json.dumps({"type": "pong"}))
+                continue
+
+            await websocket.send(json.dumps({"type": "error", "message": "Unknown message type"}))
+    finally:
+        # Stop any decoding or TTS stream still running for this connection
+        if stream:
+            stream.cancel()
+            recognizer_pool.discard(recognizer)
+        if partials:
+            partials.close()
+        if tts_task and not tts_task.done():
+            tts_task.cancel()
+        chat_engine.cancel_session(session_id)
+
+
+async def serve(config, registry, tts_pool, reuse_port=False):
+    """Accept clients until cancelled, using already-built STT and TTS backends"""
     host = config.get("host", "0.0.0.0")
     port = int(config.get("port", 8765))
-    sample_rate = config.get("sampleRate", 16000)
 
-    model = Model(model_path)
-    print(f"Voice server listening on ws://{host}:{port} at {sample_rate} Hz")
+    # Kaldi releases the GIL while decoding, so threads scale across cores
+    executor = ThreadPoolExecutor(
+        max_workers=int(config.get("decodeThreads", os.cpu_count() or 4)),
+        thread_name_prefix="vosk",
+    )
+    # Server-side voice turns (start with "converse": true) talk to Ollama directly
+    # Several "ollamaUrls" are load-balanced, with each voice session pinned to one backend
+    urls = config.get("ollamaUrls") or [config.get("ollamaUrl", DEFAULT_BASE_URL)]
+    chatbot = LocalChatbot(
+        model_name=config.get("ollamaModel", "llama3.2:latest"),
+        client=OllamaPool(urls) if len(urls) > 1 else OllamaClient(urls[0]),
+        num_predict=int(config.get("ollamaNumPredict", 800)),
+        keep_alive=config.get("ollamaKeepAlive", "30m"),
+    )
+    chat_engine = AsyncChatEngine(chatbot, max_concurrency=int(config.get("ollamaConcurrency", 2)))
+    # Load the model while the server starts instead of on the first voice turn
+    lifecycle = ModelLifecycle(chatbot, prefill_system_prompt=bool(config.get("ollamaPrefillSystemPrompt", True)))
+    lifecycle.start()
+    print(f"Voice server listening on ws://{host}:{port} with models {registry.describe()} (pid {os.getpid()})")
+
+    try:
+        async with websockets.serve(
+            lambda ws: handle_client(ws, registry, config, tts_pool, executor, chat_engine, lifecycle),
+            host,
+            port,
+            reuse_port=reuse_port,
+        ):
+            await asyncio.Future()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        tts_pool.close()
+
+
+async def main(reuse_port=False):
+    config = load_config()
+
+    # Every configured model and its recognizer pools are warmed before accepting clients
+    registry = ModelRegistry(config)
+    tts_pool = PiperPool(config, size=int(config.get("piperWorkers", 2)))
+    try:
+        tts_pool.start()
+    except Exception as exc:
+        # Speech recognition still works; TTS requests report the error until Piper is fixed
+        print(f"Piper unavailable, TTS requests will fail: {exc}")
+    memory_entries = int(config.get("ttsCacheMemoryEntries", 128))
+    if memory_entries > 0 or config.get("ttsCacheDir"):
+        cache = TTSCache(
+            config.get("ttsCacheDir"),
+            voice_key=f"{config.get('piperModelPath')}|{config.get('piperConfigPath')}",
+            memory_entries=memory_entries,
+            max_disk_bytes=int(config.get("ttsCacheMaxMB", 256)) * 1024 * 1024,
+        )
+        tts_pool = CachedTTS(tts_pool, cache)
+        if config.get("ttsWarmPhrasesPath"):
+            try:
+                warmed = tts_pool.warm(config["ttsWarmPhrasesPath"])
+            except Exception as exc:
+                print(f"TTS cache warm-up skipped: {exc}")
+            else:
+                print(f"TTS cache warmed with {warmed} new phrases")
+
+    await serve(config, registry, tts_pool, reuse_port=reuse_port)
+
+
+def run_worker():
+    asyncio.run(main(reuse_port=True))
+
+
+def run():
+    processes = int(load_config().get("serverProcesses", 1))
+    if processes <= 1:
+        asyncio.run(main())
+        return
+
+    # Several processes share the port through SO_REUSEPORT (Linux/BSD only);
+    # each loads its own models, so size this against available memory
+    if sys.platform == "win32":
+        raise RuntimeError("serverProcesses > 1 needs SO_REUSEPORT, which Windows does not support")
 
-    async with websockets.serve(lambda ws: handle_client(ws, model, config), host, port):
-        await asyncio.Future()
+    workers = [multiprocessing.Process(target=run_worker, daemon=True) for _ in range(processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    run()